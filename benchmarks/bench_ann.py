@@ -0,0 +1,77 @@
+"""
+Benchmark de búsqueda aproximada (IVF) frente a búsqueda exacta en NpyVectorStore.
+
+Genera una matriz sintética de embeddings agrupados (mezcla de gaussianas normalizada,
+similar a los chunks de varios planes de desarrollo), construye el índice IVF y mide
+recall@k y latencia por consulta con el `nprobe` calibrado al construir el índice y con
+otros valores alrededor de él.
+
+Uso:
+    python -m benchmarks.bench_ann --vectors 100000 --dim 384 --queries 200
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+from langchain_core.embeddings import FakeEmbeddings
+
+from src.databases.npy_vectorstore import NpyVectorStore
+
+
+def synthetic_embeddings(n_vectors: int, dim: int, n_topics: int, noise: float, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    topics = rng.normal(size=(n_topics, dim))
+    vectors = topics[rng.integers(0, n_topics, n_vectors)] + noise * rng.normal(size=(n_vectors, dim))
+    return vectors.astype(np.float32)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vectors", type=int, default=100000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--topics", type=int, default=500)
+    parser.add_argument("--noise", type=float, default=2.5, help="Dispersión alrededor de cada tema (mayor = más difícil)")
+    args = parser.parse_args()
+
+    vectors = synthetic_embeddings(args.vectors + args.queries, args.dim, args.topics, args.noise, seed=0)
+    corpus, queries = vectors[:args.vectors], vectors[args.vectors:]
+    texts = [f"chunk {i}" for i in range(args.vectors)]
+    embedding = FakeEmbeddings(size=args.dim)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        exact_path = os.path.join(tmp_dir, "exact.npystore")
+        ivf_path = os.path.join(tmp_dir, "ivf.npystore")
+        NpyVectorStore.write(exact_path, texts, corpus, ann="exact")
+        start = time.perf_counter()
+        NpyVectorStore.write(ivf_path, texts, corpus, ann="ivf")
+        build_time = time.perf_counter() - start
+        exact_store = NpyVectorStore(embedding, exact_path)
+        ivf_store = NpyVectorStore(embedding, ivf_path)
+        ivf = ivf_store._ann
+        print(f"Corpus: {args.vectors} vectores x {args.dim} dims | IVF: {ivf.params['n_lists']} listas, "
+              f"construcción (escritura incluida) {build_time:.1f} s")
+        print(f"nprobe calibrado: {ivf.nprobe} (recall@10 {ivf.params['calibrated_recall']:.3f} en la muestra, "
+              f"objetivo {ivf.params['target_recall']:.2f})")
+
+        start = time.perf_counter()
+        truth = [set(exact_store.search_vector(query, args.k)[0].tolist()) for query in queries]
+        exact_latency = (time.perf_counter() - start) / len(queries) * 1000
+        print(f"{'búsqueda':>18} | {'recall@' + str(args.k):>9} | {'ms/consulta':>11} | {'speedup':>7}")
+        print(f"{'exacta':>18} | {1.0:9.3f} | {exact_latency:11.2f} | {1.0:6.1f}x")
+
+        default_nprobe = ivf.nprobe
+        for nprobe in sorted({1, max(1, default_nprobe // 4), max(1, default_nprobe // 2), default_nprobe, 2 * default_nprobe}):
+            ivf.params["nprobe"] = nprobe
+            start = time.perf_counter()
+            found = [set(ivf_store.search_vector(query, args.k)[0].tolist()) for query in queries]
+            latency = (time.perf_counter() - start) / len(queries) * 1000
+            recall = np.mean([len(f & t) / len(t) for f, t in zip(found, truth)])
+            print(f"{'ivf nprobe=' + str(nprobe):>18} | {recall:9.3f} | {latency:11.2f} | {exact_latency / latency:6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Benchmark de la extracción de contenido principal para web_rag_pipeline_tool.
+
+Compara, sobre páginas HTML guardadas, el texto visible completo (`get_text`) contra el
+contenido principal (`extract_main_content`) y reporta por página y en total:
+
+- caracteres, chunks (mismo splitter que web_rag_pipeline_tool) y tokens a embeber;
+- reducción de chunks y tokens;
+- tiempo de extracción.
+
+Los tokens se cuentan con tiktoken (cl100k_base, el de text-embedding-3-small) y, si la
+codificación no está disponible sin red, se estiman como caracteres / 4.
+
+Uso:
+    python -m benchmarks.bench_main_content --pages-dir paginas_guardadas/ --output reporte.md
+    python -m benchmarks.bench_main_content --synthetic 20
+"""
+import argparse
+import glob
+import os
+import random
+import time
+from typing import Callable, List, Tuple
+
+from bs4 import BeautifulSoup
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from src.utils.main_content import extract_main_content
+
+PARRAFOS = [
+    "El departamento cuenta con {n} hectáreas dedicadas a cultivos permanentes, principalmente café, plátano y cacao, con una productividad inferior al promedio nacional.",
+    "Según el DANE, el {n}% de los productores no tiene acceso a asistencia técnica, lo que limita la adopción de tecnologías, la certificación y el acceso a mercados.",
+    "El plan de desarrollo prioriza la transformación productiva, la conectividad rural y el fortalecimiento de capacidades de ciencia, tecnología e innovación en {n} municipios.",
+    "La tasa de cobertura en educación superior alcanza el {n}%, con brechas marcadas entre la zona urbana y la rural y entre subregiones del departamento.",
+]
+MENU = ["Inicio", "Transparencia", "Atención al ciudadano", "Noticias", "Trámites y servicios", "Secretarías", "Contratación", "Participa", "Normatividad", "Contacto"]
+
+
+def synthetic_page(rng: random.Random, paragraphs: int) -> str:
+    """Página con la plantilla típica de un portal institucional alrededor del contenido."""
+    menu = "".join(f'<li><a href="/{i}">{item}</a></li>' for i, item in enumerate(MENU))
+    sidebar = "".join(f'<li><a href="/s/{i}">Secretaría de {item}</a></li>' for i, item in enumerate(MENU))
+    news = "".join(f'<li><a href="/n/{i}">Noticia {i}: {rng.choice(PARRAFOS).format(n=i)[:60]}</a></li>' for i in range(8))
+    body = []
+    for i in range(paragraphs):
+        if i % 4 == 0:
+            body.append(f"<h2>Sección {i // 4 + 1}</h2>")
+        body.append(f"<p>{rng.choice(PARRAFOS).format(n=rng.randint(10, 99000))}</p>")
+    rows = "".join(f"<tr><td>Municipio {i}</td><td>{rng.randint(100, 9000)}</td><td>{rng.randint(10, 900)}</td></tr>" for i in range(6))
+    return f"""<html><head><title>Portal</title><script>window.dataLayer=[];</script></head><body>
+<div id="cookie-banner">Este sitio usa cookies propias y de terceros para mejorar su experiencia. Al continuar navegando acepta su uso. Aceptar Configurar Rechazar</div>
+<header class="site-header"><a href="/">Gobernación</a><nav><ul class="menu">{menu}</ul></nav></header>
+<div class="breadcrumb"><a href="/">Inicio</a> / <a href="/p">Planeación</a> / Diagnóstico</div>
+<div class="row"><aside class="sidebar"><ul>{sidebar}</ul></aside>
+<div class="content"><h1>Diagnóstico territorial</h1>{''.join(body)}
+<table><tr><th>Municipio</th><th>Hectáreas</th><th>Productores</th></tr>{rows}</table>
+<div class="share"><a href="#">Facebook</a> <a href="#">X</a> <a href="#">WhatsApp</a></div></div>
+<div class="related-news"><h3>Noticias relacionadas</h3><ul>{news}</ul></div></div>
+<footer>Gobernación - Dirección, teléfono, horario de atención, correo institucional. Política de tratamiento de datos. Mapa del sitio. Todos los derechos reservados.</footer>
+</body></html>"""
+
+
+def token_counter() -> Tuple[str, Callable[[str], int]]:
+    try:
+        import tiktoken
+
+        encoding = tiktoken.get_encoding("cl100k_base")
+        return "tiktoken cl100k_base", lambda text: len(encoding.encode(text))
+    except Exception:
+        return "estimación caracteres / 4", lambda text: len(text) // 4
+
+
+def full_text(html: str) -> str:
+    """Texto que se embebía antes: todo el texto visible de la página."""
+    return " ".join(BeautifulSoup(html, "html.parser").get_text(" ").split())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages-dir", help="Directorio con páginas .html guardadas")
+    parser.add_argument("--synthetic", type=int, default=10, help="Páginas sintéticas si no se indica --pages-dir")
+    parser.add_argument("--output", help="Ruta opcional para guardar el reporte en Markdown")
+    args = parser.parse_args()
+
+    if args.pages_dir:
+        pages = []
+        for path in sorted(glob.glob(os.path.join(args.pages_dir, "*.htm*"))):
+            with open(path, "rb") as f:
+                pages.append((os.path.basename(path), f.read()))
+    else:
+        rng = random.Random(0)
+        pages = [(f"sintetica_{i:02d}", synthetic_page(rng, paragraphs=rng.randint(4, 40))) for i in range(args.synthetic)]
+    if not pages:
+        raise SystemExit("No se encontraron páginas para el benchmark.")
+
+    # Mismos parámetros que split_content en web_rag_pipeline
+    splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200, separators=["\n\n", "\n", " "])
+    token_source, count_tokens = token_counter()
+
+    rows: List[str] = []
+    totals = [0, 0, 0, 0, 0.0]
+    for name, html in pages:
+        before = full_text(html)
+        start = time.perf_counter()
+        after = extract_main_content(html)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        chunks_before, chunks_after = splitter.split_text(before), splitter.split_text(after)
+        tokens_before = sum(count_tokens(chunk) for chunk in chunks_before)
+        tokens_after = sum(count_tokens(chunk) for chunk in chunks_after)
+        for i, value in enumerate((len(chunks_before), len(chunks_after), tokens_before, tokens_after, elapsed_ms)):
+            totals[i] += value
+        rows.append(
+            f"| {name:24} | {len(before):8} | {len(after):8} | {len(chunks_before):6} | {len(chunks_after):6} | "
+            f"{tokens_before:8} | {tokens_after:8} | {1 - tokens_after / max(tokens_before, 1):8.1%} | {elapsed_ms:7.1f} |"
+        )
+
+    chunks_before, chunks_after, tokens_before, tokens_after, elapsed_ms = totals
+    report = "\n".join(
+        [
+            f"Páginas: {len(pages)}, tokens: {token_source}",
+            "",
+            "| página                   | chars    | chars    | chunks | chunks | tokens   | tokens   | reducción | ms      |",
+            "|                          | antes    | después  | antes  | después| antes    | después  | tokens    |         |",
+            "|--------------------------|---------:|---------:|-------:|-------:|---------:|---------:|---------:|--------:|",
+            *rows,
+            "",
+            f"Total: chunks {chunks_before} -> {chunks_after} ({1 - chunks_after / max(chunks_before, 1):.1%} menos), "
+            f"tokens de embeddings {tokens_before} -> {tokens_after} ({1 - tokens_after / max(tokens_before, 1):.1%} menos), "
+            f"extracción {elapsed_ms / len(pages):.1f} ms/página",
+        ]
+    )
+    print(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(report + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Benchmark del loader de PDF: PyPDFLoader secuencial vs ParallelPDFLoader.
+
+Genera un PDF sintético de varios cientos de páginas con texto denso y mide el tiempo
+de extracción de cada loader, verificando que ambos produzcan el mismo contenido. Con
+una sola CPU los procesos no corren en paralelo y el benchmark no se ejecuta (salvo
+con --force).
+
+Uso:
+    python -m benchmarks.bench_pdf_loader --pages 400 --workers 4
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from langchain_community.document_loaders import PyPDFLoader
+
+from src.databases.loaders import ParallelPDFLoader
+
+PARRAFO = (
+    "El Plan Nacional de Desarrollo establece las bases para la transformacion productiva, "
+    "la convergencia regional y la seguridad humana, con metas de ciencia tecnologia e innovacion"
+)
+
+
+def write_synthetic_pdf(path: str, pages: int, lines_per_page: int = 45) -> None:
+    """Escribe un PDF mínimo (fuente Helvetica, texto plano) sin dependencias externas."""
+    objects = []
+
+    def add(body: bytes) -> int:
+        objects.append(body)
+        return len(objects)
+
+    font_id = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    pages_id = add(b"")  # se completa al final
+    page_ids = []
+    for page in range(pages):
+        lines = [b"BT /F1 9 Tf 40 800 Td 11 TL"]
+        for line in range(lines_per_page):
+            text = f"{page + 1}.{line + 1} {PARRAFO}".encode("latin-1")
+            lines.append(b"(" + text + b") '")
+        lines.append(b"ET")
+        stream = b"\n".join(lines)
+        content_id = add(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        page_ids.append(add(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>" % (pages_id, font_id, content_id)
+        ))
+    kids = b" ".join(b"%d 0 R" % page_id for page_id in page_ids)
+    objects[pages_id - 1] = b"<< /Type /Pages /Kids [" + kids + b"] /Count %d >>" % pages
+    catalog_id = add(b"<< /Type /Catalog /Pages %d 0 R >>" % pages_id)
+
+    with open(path, "wb") as f:
+        f.write(b"%PDF-1.4\n")
+        offsets = []
+        for number, body in enumerate(objects, start=1):
+            offsets.append(f.tell())
+            f.write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+        xref = f.tell()
+        f.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+        for offset in offsets:
+            f.write(b"%010d 00000 n \n" % offset)
+        f.write(b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, catalog_id, xref))
+
+
+def timed(loader) -> tuple:
+    start = time.perf_counter()
+    docs = list(loader.lazy_load())
+    return time.perf_counter() - start, docs
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=400)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--pages-per-task", type=int, default=16)
+    parser.add_argument("--force", action="store_true", help="Ejecutar aunque solo haya una CPU")
+    args = parser.parse_args()
+
+    cpus = os.cpu_count() or 1
+    print(f"CPUs disponibles: {cpus}")
+    if cpus < 2:
+        print("Advertencia: con una sola CPU el loader paralelo no puede ser más rápido que el secuencial.")
+        if not args.force:
+            print("Benchmark omitido; use --force para ejecutarlo de todos modos.")
+            return
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pdf_path = os.path.join(tmp_dir, "plan_sintetico.pdf")
+        write_synthetic_pdf(pdf_path, args.pages)
+        print(f"PDF sintético: {args.pages} páginas, {os.path.getsize(pdf_path) / 1e6:.1f} MB")
+
+        sequential_time, sequential_docs = timed(PyPDFLoader(file_path=pdf_path))
+        parallel_time, parallel_docs = timed(
+            ParallelPDFLoader(pdf_path, max_workers=args.workers, min_pages=0, pages_per_task=args.pages_per_task)
+        )
+
+    same_content = [d.page_content for d in sequential_docs] == [d.page_content for d in parallel_docs]
+    same_pages = [d.metadata["page"] for d in sequential_docs] == [d.metadata["page"] for d in parallel_docs]
+    print(f"Secuencial (PyPDFLoader):        {sequential_time:7.2f} s")
+    print(f"Paralelo ({args.workers} procesos):          {parallel_time:7.2f} s")
+    print(f"Speedup:                         {sequential_time / parallel_time:7.2f}x")
+    print(f"Contenido idéntico: {same_content} | Orden de páginas idéntico: {same_pages}")
+
+
+if __name__ == "__main__":
+    main()
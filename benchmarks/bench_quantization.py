@@ -0,0 +1,92 @@
+"""
+Benchmark de almacenamiento cuantizado en NpyVectorStore: float32 vs float16 vs int8.
+
+Escribe el mismo corpus sintético (embeddings agrupados por tema, como los chunks de un
+catálogo de TDR y planes) en los tres formatos y reporta, frente a la búsqueda exacta en
+float32:
+
+- disco total del store y bytes de la matriz que se recorre en cada búsqueda;
+- recall@k y error absoluto medio del score de los resultados;
+- latencia por consulta (en float16/int8 incluye el re-puntaje exacto de candidatos).
+
+Uso:
+    python -m benchmarks.bench_quantization --vectors 50000 --dim 1536 --queries 200 --output reporte.md
+"""
+import argparse
+import os
+import tempfile
+import time
+from typing import List
+
+import numpy as np
+from langchain_core.embeddings import FakeEmbeddings
+
+from src.databases.npy_vectorstore import EMBEDDINGS_FILE, NpyVectorStore
+from benchmarks.bench_ann import synthetic_embeddings
+
+
+def directory_size(path: str) -> int:
+    return sum(entry.stat().st_size for entry in os.scandir(path) if entry.is_file())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vectors", type=int, default=50000)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--output", help="Ruta opcional para guardar el reporte en Markdown")
+    args = parser.parse_args()
+
+    vectors = synthetic_embeddings(args.vectors + args.queries, args.dim, n_topics=500, noise=2.5, seed=0)
+    corpus, queries = vectors[:args.vectors], vectors[args.vectors:]
+    texts = [f"chunk {i}" for i in range(args.vectors)]
+    embedding = FakeEmbeddings(size=args.dim)
+
+    rows: List[str] = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        stores = {}
+        for dtype in ("float32", "float16", "int8"):
+            path = os.path.join(tmp_dir, f"{dtype}.npystore")
+            NpyVectorStore.write(path, texts, corpus, dtype=dtype, ann="exact")
+            stores[dtype] = (path, NpyVectorStore(embedding, path))
+
+        reference = stores["float32"][1]
+        truth = [reference.search_vector(query, args.k) for query in queries]
+        baseline_latency = None
+        for dtype, (path, store) in stores.items():
+            store.search_vector(queries[0], args.k)  # calienta el page cache
+            start = time.perf_counter()
+            results = [store.search_vector(query, args.k) for query in queries]
+            latency = (time.perf_counter() - start) / len(queries) * 1000
+            baseline_latency = baseline_latency or latency
+
+            recall = np.mean([len(set(found[0]) & set(exact[0])) / args.k for found, exact in zip(results, truth)])
+            # Error del score reportado frente al coseno exacto de los mismos chunks
+            errors = [
+                np.abs(found[1] - reference.vectors(found[0]) @ (query / np.linalg.norm(query))).mean()
+                for found, query in zip(results, queries)
+            ]
+            matrix_bytes = os.path.getsize(os.path.join(path, EMBEDDINGS_FILE))
+            rows.append(
+                f"| {dtype:7} | {directory_size(path) / 1e6:9.1f} | {matrix_bytes / 1e6:11.1f} | "
+                f"{recall:9.3f} | {np.mean(errors):9.2e} | {latency:11.2f} | {baseline_latency / latency:7.2f}x |"
+            )
+
+    report = "\n".join(
+        [
+            f"Corpus: {args.vectors} vectores x {args.dim} dims, {args.queries} consultas, k={args.k}",
+            "",
+            "| dtype   | disco (MB) | matriz (MB) | recall@k  | error     | ms/consulta | speedup |",
+            "|---------|-----------:|------------:|----------:|----------:|------------:|--------:|",
+            *rows,
+        ]
+    )
+    print(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(report + "\n")
+
+
+if __name__ == "__main__":
+    main()
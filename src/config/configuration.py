@@ -1,10 +1,137 @@
-from dataclasses import dataclass, field
+import os
+from dataclasses import dataclass, field, fields
 from dotenv import load_dotenv
+from pathlib import Path
 from typing import List
 from textwrap import dedent
 
 load_dotenv()  # Cargar variables de entorno desde .env
 
+
+def _env_bool(name: str, default: bool) -> bool:
+    """Lee una variable de entorno booleana ("1", "true", "yes", "on")."""
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in {"1", "true", "yes", "on"}
+
+
+# === Almacenamiento local y cachés ===
+# Directorio raíz para vector stores y cachés persistentes
+TEMP_UPLOADS_DIR = Path(os.environ.get("FORMULADOR_TEMP_DIR", Path(os.getcwd()) / "temp_uploads"))
+
+# Grabación/reproducción de llamadas externas (HTTP, embeddings y LLM) en un cassette local:
+# "off", "record" o "replay". En replay estricto una llamada sin grabar es un error. Para que
+# el cassette quede completo, grabe con un FORMULADOR_TEMP_DIR vacío (sin cachés persistentes).
+RECORD_REPLAY_MODE = os.environ.get("RECORD_REPLAY_MODE", "off")
+RECORD_REPLAY_STRICT = _env_bool("RECORD_REPLAY_STRICT", True)
+RECORD_REPLAY_CASSETTE = Path(os.environ.get("RECORD_REPLAY_CASSETTE", TEMP_UPLOADS_DIR / "cassettes" / "default.sqlite"))
+# Namespace de almacenamiento fijo mientras el cassette está activo: las rutas que se muestran
+# en los prompts no dependen del thread_id y la reproducción encuentra las mismas llamadas
+RECORD_REPLAY_NAMESPACE = os.environ.get("RECORD_REPLAY_NAMESPACE", "record_replay")
+
+# Caché de embeddings direccionada por contenido (modelo, dimensiones, sha256 del texto)
+EMBEDDING_CACHE_ENABLED = _env_bool("EMBEDDING_CACHE_ENABLED", True)
+EMBEDDING_CACHE_PATH = Path(os.environ.get("EMBEDDING_CACHE_PATH", TEMP_UPLOADS_DIR / "cache" / "embeddings.sqlite"))
+EMBEDDING_CACHE_MAX_BYTES = int(os.environ.get("EMBEDDING_CACHE_MAX_BYTES", 1024 * 1024 * 1024))
+
+# Caché HTTP de web_rag_pipeline_tool: texto extraído por URL normalizada, con TTL por defecto
+# cuando el servidor no envía Cache-Control/Expires
+HTTP_CACHE_ENABLED = _env_bool("HTTP_CACHE_ENABLED", True)
+HTTP_CACHE_PATH = Path(os.environ.get("HTTP_CACHE_PATH", TEMP_UPLOADS_DIR / "cache" / "http.sqlite"))
+HTTP_CACHE_MAX_BYTES = int(os.environ.get("HTTP_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+HTTP_CACHE_DEFAULT_TTL_SECONDS = int(os.environ.get("HTTP_CACHE_DEFAULT_TTL_SECONDS", 24 * 60 * 60))
+
+# Sesión HTTP compartida por las herramientas de investigación: hosts con pool, conexiones
+# por host (ancho de los fan-outs), timeouts de conexión/lectura y reintentos con backoff
+HTTP_POOL_CONNECTIONS = int(os.environ.get("HTTP_POOL_CONNECTIONS", 32))
+HTTP_POOL_MAXSIZE = int(os.environ.get("HTTP_POOL_MAXSIZE", 24))
+HTTP_CONNECT_TIMEOUT = float(os.environ.get("HTTP_CONNECT_TIMEOUT", 5))
+HTTP_READ_TIMEOUT = float(os.environ.get("HTTP_READ_TIMEOUT", 20))
+HTTP_MAX_RETRIES = int(os.environ.get("HTTP_MAX_RETRIES", 3))
+HTTP_BACKOFF_FACTOR = float(os.environ.get("HTTP_BACKOFF_FACTOR", 0.5))
+# Espera máxima aceptada de un Retry-After (uno más largo no se reintenta) y tiempo total
+# dedicado a reintentos de una misma solicitud a partir del primer fallo
+HTTP_RETRY_AFTER_MAX_SECONDS = float(os.environ.get("HTTP_RETRY_AFTER_MAX_SECONDS", 10))
+HTTP_RETRY_MAX_SECONDS = float(os.environ.get("HTTP_RETRY_MAX_SECONDS", 30))
+# web_rag_multi_url_tool: URLs por llamada y descargas simultáneas
+WEB_RAG_MAX_URLS = int(os.environ.get("WEB_RAG_MAX_URLS", 10))
+WEB_RAG_MAX_CONCURRENCY = int(os.environ.get("WEB_RAG_MAX_CONCURRENCY", 8))
+# Límites de descarga de las herramientas web: bytes por respuesta, páginas de PDF procesadas
+# y duración total de una descarga
+WEB_FETCH_MAX_BYTES = int(os.environ.get("WEB_FETCH_MAX_BYTES", 15 * 1024 * 1024))
+WEB_FETCH_MAX_PDF_PAGES = int(os.environ.get("WEB_FETCH_MAX_PDF_PAGES", 150))
+WEB_FETCH_TIMEOUT_SECONDS = float(os.environ.get("WEB_FETCH_TIMEOUT_SECONDS", 60))
+# Extraer solo el contenido principal del HTML (sin menús, banners, barras laterales ni pies) antes de fragmentar
+WEB_MAIN_CONTENT_ENABLED = _env_bool("WEB_MAIN_CONTENT_ENABLED", True)
+# Índices por URL (chunks + embeddings) reutilizados entre consultas a la misma página; opcionalmente en disco
+WEB_INDEX_CACHE_ENABLED = _env_bool("WEB_INDEX_CACHE_ENABLED", True)
+WEB_INDEX_CACHE_MAX_BYTES = int(os.environ.get("WEB_INDEX_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+WEB_INDEX_CACHE_PERSIST = _env_bool("WEB_INDEX_CACHE_PERSIST", False)
+WEB_INDEX_CACHE_DIR = Path(os.environ.get("WEB_INDEX_CACHE_DIR", TEMP_UPLOADS_DIR / "cache" / "web_indexes"))
+# Cuota de disco de los índices persistidos; al superarla se borran los menos usados (LRU)
+WEB_INDEX_CACHE_DISK_MAX_BYTES = int(os.environ.get("WEB_INDEX_CACHE_DISK_MAX_BYTES", 1024 * 1024 * 1024))
+
+# Caché en proceso de búsquedas de Serper (consulta normalizada + parámetros) con single-flight
+SERPER_CACHE_ENABLED = _env_bool("SERPER_CACHE_ENABLED", True)
+SERPER_CACHE_TTL_SECONDS = int(os.environ.get("SERPER_CACHE_TTL_SECONDS", 6 * 60 * 60))
+SERPER_CACHE_MAX_ENTRIES = int(os.environ.get("SERPER_CACHE_MAX_ENTRIES", 2048))
+# Búsqueda por lotes: consultas por solicitud a Serper y paralelismo cuando el lote no es aceptado
+SERPER_BATCH_MAX_QUERIES = int(os.environ.get("SERPER_BATCH_MAX_QUERIES", 20))
+SERPER_MAX_CONCURRENCY = int(os.environ.get("SERPER_MAX_CONCURRENCY", 8))
+
+# Regulador de tráfico compartido por Serper y las descargas web: token bucket global,
+# solicitudes simultáneas por dominio, pausa de cortesía y espera tras un 429/503 sin Retry-After
+RATE_GOVERNOR_ENABLED = _env_bool("RATE_GOVERNOR_ENABLED", True)
+RATE_GLOBAL_RPS = float(os.environ.get("RATE_GLOBAL_RPS", 10))
+RATE_GLOBAL_BURST = int(os.environ.get("RATE_GLOBAL_BURST", 20))
+RATE_DOMAIN_MAX_CONCURRENCY = int(os.environ.get("RATE_DOMAIN_MAX_CONCURRENCY", 4))
+RATE_DOMAIN_MIN_INTERVAL_SECONDS = float(os.environ.get("RATE_DOMAIN_MIN_INTERVAL_SECONDS", 0.25))
+RATE_THROTTLE_BACKOFF_SECONDS = float(os.environ.get("RATE_THROTTLE_BACKOFF_SECONDS", 5))
+# Pausa máxima que un Retry-After impone a un dominio, y espera máxima en cola: una solicitud
+# que tendría que esperar más falla de inmediato en vez de bloquear el hilo de la herramienta
+RATE_THROTTLE_MAX_PAUSE_SECONDS = float(os.environ.get("RATE_THROTTLE_MAX_PAUSE_SECONDS", 300))
+RATE_MAX_WAIT_SECONDS = float(os.environ.get("RATE_MAX_WAIT_SECONDS", 30))
+
+# Vector stores persistidos y registro de reutilización por hash de documento
+VECTORSTORE_DIR = Path(os.environ.get("VECTORSTORE_DIR", TEMP_UPLOADS_DIR / "vectorstores"))
+VECTORSTORE_REGISTRY_PATH = Path(os.environ.get("VECTORSTORE_REGISTRY_PATH", VECTORSTORE_DIR / "registry.json"))
+# Formato en disco: "npy" (matriz memmap + chunks con offsets) o "parquet" (SKLearnVectorStore)
+VECTORSTORE_FORMAT = os.environ.get("VECTORSTORE_FORMAT", "npy")
+# Precisión de la matriz que recorre cada búsqueda en formato npy: "float32", "float16" o
+# "int8" (escala por vector). En float16/int8 la matriz cuantizada elige candidatos y estos
+# se re-puntúan con una copia float32 en disco que solo se lee para esas filas
+VECTORSTORE_DTYPE = os.environ.get("VECTORSTORE_DTYPE", "float32")
+# En float16/int8, candidatos por resultado que se re-puntúan con los vectores exactos
+VECTORSTORE_RESCORE_FACTOR = int(os.environ.get("VECTORSTORE_RESCORE_FACTOR", 4))
+# Búsqueda en formato npy: "exact", "ivf" o "auto" (IVF solo desde ANN_MIN_VECTORS chunks;
+# por debajo de ~100k vectores la búsqueda exacta es igual de rápida)
+VECTORSTORE_ANN = os.environ.get("VECTORSTORE_ANN", "auto")
+ANN_MIN_VECTORS = int(os.environ.get("ANN_MIN_VECTORS", 100000))
+# Recall@10 objetivo con el que se calibra el nprobe del índice IVF al construirlo
+ANN_TARGET_RECALL = float(os.environ.get("ANN_TARGET_RECALL", 0.95))
+# Cuota de disco para vector stores; los no referenciados se expulsan por último acceso (LRU)
+VECTORSTORE_DISK_QUOTA_BYTES = int(os.environ.get("VECTORSTORE_DISK_QUOTA_BYTES", 2 * 1024 * 1024 * 1024))
+# Una referencia sin liberar se considera abandonada tras este tiempo (ejecuciones interrumpidas)
+VECTORSTORE_LEASE_TTL_SECONDS = int(os.environ.get("VECTORSTORE_LEASE_TTL_SECONDS", 6 * 60 * 60))
+# Memoria máxima de vector stores cargados en proceso por local_research_query_tool
+VECTORSTORE_CACHE_MAX_BYTES = int(os.environ.get("VECTORSTORE_CACHE_MAX_BYTES", 1024 * 1024 * 1024))
+
+# Ingesta en streaming: chunks por solicitud de embeddings y solicitudes simultáneas en vuelo
+EMBEDDING_BATCH_SIZE = int(os.environ.get("EMBEDDING_BATCH_SIZE", 128))
+EMBEDDING_MAX_IN_FLIGHT = int(os.environ.get("EMBEDDING_MAX_IN_FLIGHT", 4))
+# Deduplicación de chunks antes de embeber: encabezados/pies repetidos, duplicados exactos y casi duplicados (MinHash)
+DEDUP_ENABLED = _env_bool("DEDUP_ENABLED", True)
+DEDUP_MINHASH_THRESHOLD = float(os.environ.get("DEDUP_MINHASH_THRESHOLD", 0.85))
+
+# Índice léxico BM25 construido junto a cada vector store durante la ingesta
+LEXICAL_INDEX_ENABLED = _env_bool("LEXICAL_INDEX_ENABLED", True)
+# Modo de las herramientas de búsqueda local (local_research_query_tool y sus variantes en lote):
+# "vector" (MMR), "hybrid" (BM25 + vectores con RRF) o "lexical" (sin red ni modelo de embeddings)
+RETRIEVAL_MODE = os.environ.get("RETRIEVAL_MODE", "vector")
+# Constante k de reciprocal rank fusion
+RRF_K = int(os.environ.get("RRF_K", 60))
+
 SECCIONES_TDR = {
     "objetivo_tdr": {
         "definicion": "Esta definición orienta al agente RAG a localizar el OBJETIVO de la convocatoria dentro de los términos de referencia. Busque un párrafo, sección o cuadro que declare explícitamente la finalidad, propósito, meta global o razón de ser del llamado. Los encabezados acostumbrados incluyen “Objetivo de la convocatoria”, “Propósito general”, “Finalidad”, “Objetivo general” o frases afines. El contenido suele describir la problemática que se pretende resolver, el impacto esperado, los beneficiarios y la contribución al desarrollo científico, tecnológico o de innovación. También puede incorporar objetivos específicos, aunque el núcleo será un enunciado claro, medible y alineado con la política pública o la estrategia institucional de la entidad financiadora. Señales contextuales: aparece normalmente en las primeras dos páginas, tras la introducción, acompañado de verbos en infinitivo como “promover”, “fortalecer”, “financiar”, “estimular”, “apoyar”, “impulsar”, “consolidar” o “fomentar”. Incluye a veces indicadores clave (p. ej., número de proyectos, montos, regiones o áreas prioritarias) y vincula las líneas temáticas o demandas territoriales. El agente debe extraer el texto completo y descartar apartados posteriores. Esta guía enfatiza diferenciar la declaración central de cualquier nota aclaratoria, relevancia pertinencia alineación elegibilidad contexto resultado impacto cobertura financiación modalidad región sector institucional obligatorio opcional guía detallada descripción."
@@ -48,6 +175,12 @@ class MultiAgentConfiguration:
     gpt41mini: str = "gpt-4.1-mini"
     gemini2flash: str = "gemini-2.0-flash-lite"
     embedding_model: str = "text-embedding-3-small"
+    pdf_loader: str = "sequential"  # "sequential" | "parallel"
+    pdf_parallel_workers: int = 0  # 0 = número de CPUs
+    pdf_parallel_min_pages: int = 64
+    tdr_preretrieval: bool = True  # pre-recuperación de pasajes por sección antes del fan-out
+    tdr_preretrieval_k: int = 6
+    tdr_preretrieval_min_score: float = 0.40  # por debajo, el agente busca con la herramienta
     base_consistency_score: int = 10
     objetivo_tdr: List = field(default_factory=lambda: [SECCIONES_TDR["objetivo_tdr"]])
     dirigida_a_tdr: List = field(default_factory=lambda: [SECCIONES_TDR["dirigida_a_tdr"]])
@@ -61,6 +194,10 @@ class MultiAgentConfiguration:
     
     @classmethod
     def from_runnable_config(cls, config):
-        """Convierte un RunnableConfig en una instancia de Configuration"""
-        configurable_for_agents = config.configurable if hasattr(config, "configurable") else {}
-        return cls(**configurable_for_agents)
\ No newline at end of file
+        """
+        Convierte un RunnableConfig (un dict en LangGraph) en una instancia de Configuration.
+        De `configurable` solo se toman los campos de la clase (LangGraph agrega otros, como thread_id).
+        """
+        configurable = (config or {}).get("configurable", {})
+        names = {f.name for f in fields(cls)}
+        return cls(**{key: value for key, value in configurable.items() if key in names})
\ No newline at end of file
@@ -0,0 +1,258 @@
+import json
+import math
+import os
+from typing import Optional, Tuple
+
+import numpy as np
+
+from src.config.configuration import ANN_MIN_VECTORS, ANN_TARGET_RECALL
+from src.databases.quantization import quantize, quantized_scores
+
+IVF_INDEX_FILE = "ivf.npz"
+IVF_VECTORS_FILE = "ivf_vectors.npy"
+
+# Filas por bloque al asignar vectores a centroides (acota la memoria de la matriz de distancias)
+_ASSIGN_BLOCK_ROWS = 8192
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def _assign(matrix: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Centroide más cercano (producto punto) de cada fila, por bloques."""
+    assignments = np.empty(matrix.shape[0], dtype=np.int32)
+    for start in range(0, matrix.shape[0], _ASSIGN_BLOCK_ROWS):
+        block = np.asarray(matrix[start:start + _ASSIGN_BLOCK_ROWS], dtype=np.float32)
+        assignments[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+    return assignments
+
+
+def _exact_neighbours(matrix: np.ndarray, query_ids: np.ndarray, k: int) -> np.ndarray:
+    """Top-k exacto de las filas `query_ids` contra toda la matriz, sin contarse a sí mismas."""
+    queries = np.asarray(matrix[query_ids], dtype=np.float32)
+    rows = np.arange(len(query_ids))
+    best_ids = np.empty((len(query_ids), 0), dtype=np.int64)
+    best_scores = np.empty((len(query_ids), 0), dtype=np.float32)
+    for start in range(0, matrix.shape[0], _ASSIGN_BLOCK_ROWS):
+        block = np.asarray(matrix[start:start + _ASSIGN_BLOCK_ROWS], dtype=np.float32)
+        scores = queries @ block.T
+        own = (query_ids >= start) & (query_ids < start + len(block))
+        scores[rows[own], query_ids[own] - start] = -np.inf
+        ids = np.concatenate([best_ids, np.broadcast_to(np.arange(start, start + len(block)), scores.shape)], axis=1)
+        scores = np.concatenate([best_scores, scores], axis=1)
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k] if scores.shape[1] > k else np.argsort(-scores, axis=1)
+        best_ids = np.take_along_axis(ids, top, axis=1)
+        best_scores = np.take_along_axis(scores, top, axis=1)
+    return best_ids
+
+
+def _calibrate_nprobe(
+    matrix: np.ndarray,
+    centroids: np.ndarray,
+    assignments: np.ndarray,
+    target_recall: float,
+    n_queries: int,
+    k: int,
+    rng: np.random.Generator,
+) -> Tuple[int, float]:
+    """
+    Menor `nprobe` cuyo recall@k medio alcanza `target_recall` sobre una muestra de filas
+    de la matriz usadas como consultas. Los vecinos exactos de cada consulta se calculan
+    por búsqueda exhaustiva; un vecino se encuentra con `nprobe` listas si la suya está
+    entre las `nprobe` listas cuyos centroides son más cercanos a la consulta. Retorna
+    (nprobe, recall medido).
+    """
+    n_vectors, n_lists = matrix.shape[0], len(centroids)
+    n_queries = min(n_queries, n_vectors - 1)
+    k = min(k, n_vectors - 1)
+    if n_queries <= 0 or k <= 0:
+        return n_lists, 1.0
+    query_ids = np.sort(rng.choice(n_vectors, n_queries, replace=False))
+    neighbours = _exact_neighbours(matrix, query_ids, k)
+    # Rango de cada lista para cada consulta (0 = centroide más cercano)
+    order = np.argsort(-(np.asarray(matrix[query_ids], dtype=np.float32) @ centroids.T), axis=1)
+    list_rank = np.empty_like(order)
+    np.put_along_axis(list_rank, order, np.broadcast_to(np.arange(n_lists), order.shape), axis=1)
+    neighbour_rank = np.take_along_axis(list_rank, assignments[neighbours], axis=1)
+    recall_at = np.cumsum(np.bincount(neighbour_rank.ravel(), minlength=n_lists)) / neighbour_rank.size
+    nprobe = int(np.argmax(recall_at >= target_recall - 1e-9)) + 1
+    return nprobe, float(recall_at[nprobe - 1])
+
+
+class IVFIndex:
+    """
+    Índice IVF (inverted file) sobre la matriz normalizada de un `NpyVectorStore`.
+
+    Los vectores se agrupan con k-means esférico en `n_lists` listas; una consulta solo
+    compara contra los vectores de las `nprobe` listas cuyos centroides son más cercanos.
+    `nprobe` se calibra al construir el índice contra un recall objetivo y queda en `params`.
+    Además de centroides y posiciones, el índice guarda una copia de los vectores ordenada
+    por lista (`ivf_vectors.npy`, abierta con memmap), de modo que recorrer una lista es
+    leer un bloque contiguo en lugar de filas dispersas de la matriz del store. La copia
+    usa la misma precisión que el store (float32, float16 o int8 con escalas por vector).
+    """
+
+    def __init__(
+        self,
+        centroids: np.ndarray,
+        list_offsets: np.ndarray,
+        list_ids: np.ndarray,
+        list_vectors: np.ndarray,
+        params: dict,
+        list_scales: Optional[np.ndarray] = None,
+    ):
+        self.centroids = centroids
+        self.list_offsets = list_offsets
+        self.list_ids = list_ids
+        self.list_vectors = list_vectors
+        self.list_scales = list_scales
+        self.params = params
+
+    @property
+    def nprobe(self) -> int:
+        return self.params["nprobe"]
+
+    @classmethod
+    def build(
+        cls,
+        matrix: np.ndarray,
+        n_lists: Optional[int] = None,
+        nprobe: Optional[int] = None,
+        n_iter: int = 10,
+        sample_size: Optional[int] = None,
+        seed: int = 0,
+        dtype: str = "float32",
+        target_recall: float = ANN_TARGET_RECALL,
+        calibration_queries: int = 256,
+        calibration_k: int = 10,
+    ) -> "IVFIndex":
+        """
+        Entrena los centroides sobre una muestra de la matriz (float32 normalizada) y asigna
+        todos los vectores; la copia por lista se guarda en `dtype`. Por defecto `n_lists`
+        ≈ 4·sqrt(n) y `nprobe` es el menor que alcanza `target_recall` (recall@`calibration_k`)
+        sobre `calibration_queries` filas de la matriz, medido contra la búsqueda exacta.
+        """
+        n_vectors = matrix.shape[0]
+        n_lists = n_lists or max(1, int(4 * math.sqrt(n_vectors)))
+        n_lists = min(n_lists, n_vectors)
+        sample_size = min(n_vectors, sample_size or 64 * n_lists)
+
+        rng = np.random.default_rng(seed)
+        sample = np.asarray(matrix[np.sort(rng.choice(n_vectors, sample_size, replace=False))], dtype=np.float32)
+        centroids = sample[rng.choice(sample_size, n_lists, replace=False)].copy()
+        for _ in range(n_iter):
+            assignments = _assign(sample, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignments, sample)
+            counts = np.bincount(assignments, minlength=n_lists)
+            # Centroides vacíos se reinician en un vector aleatorio de la muestra
+            empty = counts == 0
+            sums[empty] = sample[rng.choice(sample_size, int(empty.sum()))]
+            centroids = _normalize(sums)
+
+        assignments = _assign(matrix, centroids)
+        calibrated_recall = None
+        if nprobe is None:
+            nprobe, calibrated_recall = _calibrate_nprobe(
+                matrix, centroids, assignments, target_recall, calibration_queries, calibration_k, rng
+            )
+        nprobe = min(nprobe, n_lists)
+        list_ids = np.argsort(assignments, kind="stable").astype(np.int64)
+        list_offsets = np.zeros(n_lists + 1, dtype=np.int64)
+        list_offsets[1:] = np.cumsum(np.bincount(assignments, minlength=n_lists))
+        params = {
+            "type": "ivf",
+            "n_vectors": int(n_vectors),
+            "n_lists": int(n_lists),
+            "nprobe": int(nprobe),
+            "n_iter": n_iter,
+            "sample_size": int(sample_size),
+            "seed": seed,
+            "dtype": dtype,
+        }
+        if calibrated_recall is not None:
+            params.update(
+                target_recall=target_recall,
+                calibrated_recall=calibrated_recall,
+                calibration_queries=int(min(calibration_queries, n_vectors - 1)),
+                calibration_k=calibration_k,
+            )
+        list_vectors, list_scales = quantize(np.asarray(matrix[list_ids], dtype=np.float32), dtype)
+        return cls(centroids.astype(np.float32), list_offsets, list_ids, list_vectors, params, list_scales)
+
+    # --- Persistencia ---
+    def save(self, directory: str) -> str:
+        """Escribe el índice dentro del directorio del store (antes de su renombrado atómico)."""
+        np.save(os.path.join(directory, IVF_VECTORS_FILE), self.list_vectors)
+        extra = {"list_scales": self.list_scales} if self.list_scales is not None else {}
+        np.savez(
+            os.path.join(directory, IVF_INDEX_FILE),
+            centroids=self.centroids,
+            list_offsets=self.list_offsets,
+            list_ids=self.list_ids,
+            params=np.asarray(json.dumps(self.params)),
+            **extra,
+        )
+        return directory
+
+    @classmethod
+    def load(cls, directory: str) -> Optional["IVFIndex"]:
+        """Carga el índice del store, o None si el store no tiene uno."""
+        index_path = os.path.join(directory, IVF_INDEX_FILE)
+        if not os.path.exists(index_path):
+            return None
+        list_vectors = np.load(os.path.join(directory, IVF_VECTORS_FILE), mmap_mode="r")
+        with np.load(index_path) as data:
+            return cls(
+                data["centroids"],
+                data["list_offsets"],
+                data["list_ids"],
+                list_vectors,
+                json.loads(str(data["params"])),
+                data["list_scales"] if "list_scales" in data else None,
+            )
+
+    def memory_usage(self) -> int:
+        """Memoria propia del proceso; los vectores por lista viven en el page cache."""
+        scales_bytes = self.list_scales.nbytes if self.list_scales is not None else 0
+        return self.centroids.nbytes + self.list_offsets.nbytes + self.list_ids.nbytes + scales_bytes
+
+    # --- Consulta ---
+    def _scan(self, query: np.ndarray, nprobe: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Posiciones y similitudes de los vectores en las `nprobe` listas más cercanas a `query`."""
+        nprobe = min(nprobe, len(self.centroids))
+        probes = np.sort(np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe])
+        ids, scores = [], []
+        for c in probes:
+            start, end = self.list_offsets[c], self.list_offsets[c + 1]
+            ids.append(self.list_ids[start:end])
+            scales = self.list_scales[start:end] if self.list_scales is not None else None
+            scores.append(quantized_scores(self.list_vectors[start:end], scales, query))
+        return np.concatenate(ids), np.concatenate(scores)
+
+    def search(self, query: np.ndarray, k: int, nprobe: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Top-k aproximado: índices y similitudes en orden descendente."""
+        ids, scores = self._scan(query, nprobe or self.nprobe)
+        if len(ids) < k:
+            # Listas demasiado pequeñas para completar k: se recorren todas
+            ids, scores = self._scan(query, len(self.centroids))
+        k = min(k, len(ids))
+        if k <= 0:
+            return np.asarray([], dtype=np.int64), np.asarray([], dtype=np.float32)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return ids[top], scores[top]
+
+
+def should_build_ann(ann: str, n_vectors: int) -> bool:
+    """"ivf" fuerza el índice, "exact" lo omite y "auto" lo construye desde ANN_MIN_VECTORS vectores."""
+    if ann == "ivf":
+        return n_vectors > 0
+    if ann == "auto":
+        return n_vectors >= ANN_MIN_VECTORS
+    if ann == "exact":
+        return False
+    raise ValueError(f"Unsupported ANN backend: {ann}")
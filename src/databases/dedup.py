@@ -0,0 +1,230 @@
+import hashlib
+import logging
+import re
+import zlib
+from collections import Counter, deque
+from dataclasses import dataclass
+from typing import Deque, Dict, Iterable, Iterator, List, Optional, Set
+
+import numpy as np
+from langchain_core.documents import Document
+
+from src.config.configuration import DEDUP_MINHASH_THRESHOLD
+from src.databases.lexical_index import fold_accents
+from src.databases.splitters import approximate_tokens
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_DIGITS_RE = re.compile(r"\d+")
+_WORD_RE = re.compile(r"\w+")
+
+# Aritmética de MinHash módulo 2^32 con hashes de 32 bits (sin desbordar uint64)
+_MASK_32 = np.uint64(0xFFFFFFFF)
+
+
+def normalize_text(text: str) -> str:
+    """Forma canónica para comparar chunks: sin tildes, minúsculas y espacios colapsados (las cifras se conservan)."""
+    return _WHITESPACE_RE.sub(" ", fold_accents(text)).strip()
+
+
+def normalize_edge_line(line: str) -> str:
+    """Forma canónica de una línea de encabezado o pie: además, cifras como '#' (números de página)."""
+    return _DIGITS_RE.sub("#", normalize_text(line))
+
+
+@dataclass
+class DedupStats:
+    """Resumen de lo que la deduplicación evitó enviar a la API de embeddings."""
+    chunks_in: int = 0
+    exact_duplicates: int = 0
+    near_duplicates: int = 0
+    boilerplate_lines: int = 0
+    tokens_saved: int = 0
+
+    @property
+    def chunks_dropped(self) -> int:
+        return self.exact_duplicates + self.near_duplicates
+
+
+class ChunkDeduplicator:
+    """
+    Etapa de deduplicación entre el splitter y los embeddings, en streaming.
+
+    1. Encabezados y pies de página: las líneas que se repiten (módulo números de página)
+       al inicio o al final de varias páginas se eliminan antes de dividir.
+    2. Duplicados exactos: hash del texto normalizado de cada chunk.
+    3. Casi duplicados: MinHash sobre shingles de palabras con LSH por bandas; un chunk
+       cuya similitud de Jaccard estimada con uno ya emitido supera `threshold` y que
+       contiene las mismas cifras se descarta.
+
+    Las cifras solo se ignoran al detectar encabezados y pies: dos chunks que difieren
+    únicamente en números (metas, presupuestos, puntajes) son contenidos distintos.
+
+    Los chunks descartados no se embeben; el chunk conservado registra en su metadata
+    (`duplicate_pages`) las páginas donde se repetía su contenido.
+    """
+
+    def __init__(
+        self,
+        threshold: float = DEDUP_MINHASH_THRESHOLD,
+        num_perm: int = 64,
+        bands: int = 16,
+        shingle_size: int = 5,
+        edge_lines: int = 3,
+        boilerplate_min_pages: int = 3,
+        boilerplate_min_ratio: float = 0.5,
+        boilerplate_max_words: int = 20,
+        lookahead_pages: int = 8,
+        seed: int = 0,
+    ):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows_per_band = num_perm // bands
+        self.shingle_size = shingle_size
+        self.edge_lines = edge_lines
+        self.boilerplate_min_pages = boilerplate_min_pages
+        self.boilerplate_min_ratio = boilerplate_min_ratio
+        self.boilerplate_max_words = boilerplate_max_words
+        self.lookahead_pages = lookahead_pages
+
+        rng = np.random.default_rng(seed)
+        self._perm_a = rng.integers(1, 2**32 - 1, size=num_perm, dtype=np.uint64) | np.uint64(1)
+        self._perm_b = rng.integers(0, 2**32 - 1, size=num_perm, dtype=np.uint64)
+        self.stats = DedupStats()
+
+    # --- Encabezados y pies de página ---
+    def _edge_lines(self, page: Document) -> Set[str]:
+        lines = [line for line in page.page_content.splitlines() if line.strip()]
+        edges = lines[:self.edge_lines] + lines[-self.edge_lines:]
+        # Encabezados y pies son líneas cortas; un párrafo repetido se deja a la deduplicación de chunks
+        return {normalize_edge_line(line) for line in edges if len(line.split()) <= self.boilerplate_max_words}
+
+    def strip_boilerplate(self, pages: Iterable[Document]) -> Iterator[Document]:
+        """
+        Elimina líneas cortas repetidas en el borde de al menos `boilerplate_min_pages` páginas
+        y de una fracción `boilerplate_min_ratio` de las páginas vistas. Las primeras
+        `lookahead_pages` se retienen para detectar el patrón; después cada página se
+        limpia al llegar.
+        """
+        counts: Counter = Counter()
+        seen_pages = 0
+        buffer: Deque[Document] = deque()
+
+        def boilerplate() -> Set[str]:
+            min_count = max(self.boilerplate_min_pages, self.boilerplate_min_ratio * seen_pages)
+            return {line for line, count in counts.items() if count >= min_count}
+
+        def clean(page: Document, repeated: Set[str]) -> Document:
+            lines = page.page_content.splitlines()
+            non_empty = [i for i, line in enumerate(lines) if line.strip()]
+            edge_positions = set(non_empty[:self.edge_lines] + non_empty[-self.edge_lines:])
+            kept = []
+            for i, line in enumerate(lines):
+                if i in edge_positions and normalize_edge_line(line) in repeated:
+                    self.stats.boilerplate_lines += 1
+                    self.stats.tokens_saved += approximate_tokens(line)
+                    continue
+                kept.append(line)
+            return Document(page_content="\n".join(kept), metadata=page.metadata)
+
+        for page in pages:
+            counts.update(self._edge_lines(page))
+            seen_pages += 1
+            if seen_pages <= self.lookahead_pages:
+                buffer.append(page)
+                continue
+            repeated = boilerplate()
+            while buffer:
+                yield clean(buffer.popleft(), repeated)
+            yield clean(page, repeated)
+
+        repeated = boilerplate()
+        while buffer:
+            yield clean(buffer.popleft(), repeated)
+
+    # --- Duplicados de chunks ---
+    def _signature(self, normalized: str) -> Optional[np.ndarray]:
+        words = _WORD_RE.findall(normalized)
+        if len(words) < self.shingle_size:
+            return None
+        shingles = {" ".join(words[i:i + self.shingle_size]) for i in range(len(words) - self.shingle_size + 1)}
+        hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.uint64, count=len(shingles))
+        permuted = (hashes[:, np.newaxis] * self._perm_a + self._perm_b) & _MASK_32
+        return permuted.min(axis=0)
+
+    def filter(self, chunks: Iterable[Document]) -> Iterator[Document]:
+        """Emite solo los chunks que no duplican (exacta o aproximadamente) a uno anterior."""
+        exact: Dict[str, Document] = {}
+        buckets: Dict[tuple, List[int]] = {}
+        signatures: List[np.ndarray] = []
+        numbers: List[List[str]] = []
+        kept: List[Document] = []
+
+        for chunk in chunks:
+            self.stats.chunks_in += 1
+            normalized = normalize_text(chunk.page_content)
+            digest = hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+            original = exact.get(digest)
+            if original is None:
+                signature = self._signature(normalized)
+                chunk_numbers = _DIGITS_RE.findall(normalized)
+                original = (
+                    self._near_duplicate(signature, chunk_numbers, buckets, signatures, numbers, kept)
+                    if signature is not None else None
+                )
+                if original is None:
+                    exact[digest] = chunk
+                    if signature is not None:
+                        self._index(signature, len(kept), buckets, signatures)
+                        numbers.append(chunk_numbers)
+                        kept.append(chunk)
+                    yield chunk
+                    continue
+                self.stats.near_duplicates += 1
+            else:
+                self.stats.exact_duplicates += 1
+
+            self.stats.tokens_saved += approximate_tokens(chunk.page_content)
+            if "page" in chunk.metadata:
+                original.metadata.setdefault("duplicate_pages", []).append(chunk.metadata["page"])
+
+    def _bands(self, signature: np.ndarray) -> List[tuple]:
+        return [
+            (band, signature[band * self.rows_per_band:(band + 1) * self.rows_per_band].tobytes())
+            for band in range(self.bands)
+        ]
+
+    def _index(self, signature: np.ndarray, position: int, buckets: Dict[tuple, List[int]], signatures: List[np.ndarray]) -> None:
+        signatures.append(signature)
+        for key in self._bands(signature):
+            buckets.setdefault(key, []).append(position)
+
+    def _near_duplicate(
+        self,
+        signature: np.ndarray,
+        chunk_numbers: List[str],
+        buckets: Dict[tuple, List[int]],
+        signatures: List[np.ndarray],
+        numbers: List[List[str]],
+        kept: List[Document],
+    ) -> Optional[Document]:
+        candidates = {position for key in self._bands(signature) for position in buckets.get(key, ())}
+        for position in sorted(candidates):
+            # Un texto casi igual con otras cifras (otra meta, otro año) no es un duplicado
+            if numbers[position] != chunk_numbers:
+                continue
+            if np.mean(signatures[position] == signature) >= self.threshold:
+                return kept[position]
+        return None
+
+    def log_stats(self, source: str = "") -> None:
+        stats = self.stats
+        logger.info(
+            f"Deduplicación {source}: {stats.chunks_dropped}/{stats.chunks_in} chunks descartados "
+            f"({stats.exact_duplicates} exactos, {stats.near_duplicates} casi duplicados), "
+            f"{stats.boilerplate_lines} líneas de encabezado/pie eliminadas, ~{stats.tokens_saved} tokens ahorrados"
+        )
@@ -0,0 +1,134 @@
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from src.databases.ingestion import IngestionResult
+from src.databases.lexical_index import fold_accents
+from src.databases.vectorstore_io import vectorstore_suffix
+from src.databases.vectorstore_registry import get_vectorstore_registry
+from src.databases.vectorstore_storage import SHARED_NAMESPACE, get_vectorstore_storage
+
+COLLECTIONS_MANIFEST = "collections.json"
+
+
+def collection_name_for(file_path: str, prefix: str = "anexo") -> str:
+    """Nombre de colección legible a partir del archivo ("Guía Sectorial.pdf" -> "anexo_guia_sectorial")."""
+    stem = "".join(c if c.isalnum() else "_" for c in fold_accents(Path(file_path).stem))
+    return f"{prefix}_{'_'.join(part for part in stem.split('_') if part)}"
+
+
+class DocumentCollections:
+    """
+    Índice multi-colección de los documentos de una ejecución.
+
+    Cada documento fuente (TDR, planes de desarrollo, cada anexo) es una colección con su
+    propio vector store, direccionado por contenido a través del registro: agregar un
+    documento nuevo solo carga, divide y embebe ese documento, y volver a agregar uno ya
+    procesado (en esta u otra ejecución) reutiliza su store. El manifiesto
+    `collections.json` del namespace asocia cada nombre de colección con su store, de modo
+    que las consultas pueden filtrar por colección.
+    """
+
+    def __init__(self):
+        self.registry = get_vectorstore_registry()
+        self.storage = get_vectorstore_storage()
+        self._lock = threading.Lock()
+
+    def manifest_path(self, namespace: str) -> str:
+        """Ruta (POSIX) del manifiesto de colecciones del namespace."""
+        return self.storage.allocate(namespace, COLLECTIONS_MANIFEST)
+
+    # --- Manifiesto ---
+    @staticmethod
+    def read(manifest_path: str) -> Dict[str, Dict[str, Any]]:
+        """Colecciones registradas cuyo store aún existe en disco."""
+        if not manifest_path or not os.path.exists(manifest_path):
+            return {}
+        try:
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {}
+        return {name: entry for name, entry in entries.items() if os.path.exists(entry["persist_path"])}
+
+    def _write(self, manifest_path: str, entries: Dict[str, Dict[str, Any]]) -> None:
+        # El namespace pudo haberse cerrado (remove_namespace) si la ejecución se reanuda
+        os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+        tmp_path = f"{manifest_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entries, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, manifest_path)
+
+    def add(self, manifest_path: str, name: str, persist_path: str, **metadata: Any) -> None:
+        """Registra (o reemplaza) la colección `name` en el manifiesto sin tocar las demás."""
+        with self._lock:
+            entries = self.read(manifest_path)
+            entries[name] = {"persist_path": persist_path, "added_at": time.time(), **metadata}
+            self._write(manifest_path, entries)
+
+    # --- Indexación ---
+    def get_or_create_store(
+        self,
+        file_path: str,
+        ingestion_params: Dict[str, Any],
+        build: Callable[[str, str], IngestionResult],
+        prefix: str = "vectorstore",
+        leases: int = 0,
+        owner: Optional[str] = None,
+    ) -> str:
+        """
+        `persist_path` del store de `file_path` con `ingestion_params`, construyéndolo con
+        `build(file_path, persist_path)` solo si no existe. El store queda con `leases`
+        referencias de `owner` que el consumidor debe liberar.
+        """
+        key = self.registry.make_key(file_path, **ingestion_params)
+        persist_path = self.registry.lookup(key)
+        if persist_path and self.storage.acquire(persist_path, leases, owner=owner):
+            print(f"Reutilizando vector store de {Path(file_path).name}: {persist_path}")
+            return persist_path
+
+        persist_path = self.registry.path_for(key, prefix=prefix, suffix=vectorstore_suffix())
+        ingestion = build(file_path, persist_path)
+        self.storage.acquire(persist_path, leases, owner=owner)
+        self.storage.register(persist_path, SHARED_NAMESPACE)
+        self.registry.register(key, persist_path, source=Path(file_path).name, chunks=len(ingestion.texts))
+        return persist_path
+
+    def index_document(
+        self,
+        manifest_path: str,
+        name: str,
+        file_path: str,
+        ingestion_params: Dict[str, Any],
+        build: Callable[[str, str], IngestionResult],
+        leases: int = 0,
+        owner: Optional[str] = None,
+    ) -> str:
+        """Agrega `file_path` como la colección `name` del manifiesto y retorna el `persist_path` de su store."""
+        persist_path = self.get_or_create_store(file_path, ingestion_params, build, prefix=name, leases=leases, owner=owner)
+        self.add(manifest_path, name, persist_path, source=Path(file_path).name)
+        return persist_path
+
+
+def select_collections(manifest_path: str, names: Optional[List[str]] = None) -> Dict[str, str]:
+    """Nombre -> `persist_path` de las colecciones del manifiesto, filtradas por `names` si se indica."""
+    entries = DocumentCollections.read(manifest_path)
+    if names:
+        entries = {name: entry for name, entry in entries.items() if name in names}
+    return {name: entry["persist_path"] for name, entry in entries.items()}
+
+
+_collections: Optional[DocumentCollections] = None
+_collections_lock = threading.Lock()
+
+
+def get_document_collections() -> DocumentCollections:
+    """Retorna el índice de colecciones compartido por todo el proceso."""
+    global _collections
+    with _collections_lock:
+        if _collections is None:
+            _collections = DocumentCollections()
+        return _collections
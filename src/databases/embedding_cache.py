@@ -0,0 +1,192 @@
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from array import array
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+from langchain_core.embeddings import Embeddings
+
+from src.config.configuration import EMBEDDING_CACHE_MAX_BYTES, EMBEDDING_CACHE_PATH
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingCache:
+    """
+    Caché persistente (SQLite) de embeddings direccionada por contenido.
+
+    Cada vector se indexa por (modelo, dimensiones, sha256 del texto), de modo que un
+    mismo fragmento nunca se envía dos veces a la API de embeddings, sin importar la
+    ejecución o el vector store que lo produzca. Cuando el tamaño total supera
+    `max_bytes` se eliminan las entradas con acceso más antiguo (LRU).
+    """
+
+    def __init__(self, path: Path | str, max_bytes: int = EMBEDDING_CACHE_MAX_BYTES):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path.as_posix(), check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT NOT NULL,
+                dimensions INTEGER NOT NULL,
+                text_hash TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL,
+                PRIMARY KEY (model, dimensions, text_hash)
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_last_access ON embeddings (last_access)")
+        self._conn.commit()
+
+    @staticmethod
+    def hash_text(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def get_many(self, model: str, dimensions: Optional[int], texts: Sequence[str]) -> List[Optional[List[float]]]:
+        """
+        Busca los embeddings de `texts`. Retorna una lista alineada con `texts`
+        con `None` en las posiciones que no están en caché.
+        """
+        hashes = [self.hash_text(text) for text in texts]
+        found: Dict[str, List[float]] = {}
+        now = time.time()
+        with self._lock:
+            unique_hashes = list(dict.fromkeys(hashes))
+            # SQLite limita el número de parámetros por consulta
+            for start in range(0, len(unique_hashes), 500):
+                batch = unique_hashes[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings "
+                    f"WHERE model = ? AND dimensions = ? AND text_hash IN ({placeholders})",
+                    [model, dimensions or 0, *batch],
+                ).fetchall()
+                for text_hash, blob in rows:
+                    vector = array("f")
+                    vector.frombytes(blob)
+                    found[text_hash] = vector.tolist()
+            if found:
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_access = ? WHERE model = ? AND dimensions = ? AND text_hash = ?",
+                    [(now, model, dimensions or 0, text_hash) for text_hash in found],
+                )
+                self._conn.commit()
+            results = [found.get(text_hash) for text_hash in hashes]
+            hit_count = sum(result is not None for result in results)
+            self.hits += hit_count
+            self.misses += len(results) - hit_count
+        return results
+
+    def put_many(self, model: str, dimensions: Optional[int], texts: Sequence[str], vectors: Sequence[Sequence[float]]) -> None:
+        """Guarda los embeddings de `texts` y aplica la política de expulsión LRU."""
+        now = time.time()
+        rows = []
+        for text, vector in zip(texts, vectors):
+            blob = array("f", vector).tobytes()
+            rows.append((model, dimensions or 0, self.hash_text(text), blob, len(blob), now))
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, dimensions, text_hash, vector, size, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._conn.commit()
+            self._evict_if_needed()
+
+    def _evict_if_needed(self) -> None:
+        total_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM embeddings").fetchone()[0]
+        if total_bytes <= self.max_bytes:
+            return
+        # Se libera hasta el 90% de la cuota para no expulsar en cada inserción
+        to_free = total_bytes - int(self.max_bytes * 0.9)
+        victims = []
+        for rowid, size in self._conn.execute("SELECT rowid, size FROM embeddings ORDER BY last_access ASC"):
+            victims.append((rowid,))
+            to_free -= size
+            if to_free <= 0:
+                break
+        self._conn.executemany("DELETE FROM embeddings WHERE rowid = ?", victims)
+        self._conn.commit()
+        self.evictions += len(victims)
+        logger.info(f"Embedding cache: {len(victims)} entradas expulsadas (LRU)")
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries, total_bytes = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM embeddings"
+            ).fetchone()
+            lookups = self.hits + self.misses
+            return {
+                "entries": entries,
+                "bytes": total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM embeddings")
+            self._conn.commit()
+            self.hits = self.misses = self.evictions = 0
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Envoltorio de un modelo de embeddings de LangChain que consulta la caché
+    persistente antes de llamar a la API y solo envía los textos faltantes.
+    """
+
+    def __init__(self, underlying: Embeddings, cache: EmbeddingCache):
+        self.underlying = underlying
+        self.cache = cache
+        self.model = getattr(underlying, "model", type(underlying).__name__)
+        self.dimensions = getattr(underlying, "dimensions", None)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        vectors = self.cache.get_many(self.model, self.dimensions, texts)
+        # Textos repetidos dentro del mismo lote se envían una sola vez
+        missing = list(dict.fromkeys(text for text, vector in zip(texts, vectors) if vector is None))
+        if missing:
+            new_vectors = self.underlying.embed_documents(missing)
+            self.cache.put_many(self.model, self.dimensions, missing, new_vectors)
+            computed = dict(zip(missing, new_vectors))
+            vectors = [vector if vector is not None else list(computed[text]) for text, vector in zip(texts, vectors)]
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        cached = self.cache.get_many(self.model, self.dimensions, [text])[0]
+        if cached is not None:
+            return cached
+        vector = self.underlying.embed_query(text)
+        self.cache.put_many(self.model, self.dimensions, [text], [vector])
+        return vector
+
+
+_embedding_cache: Optional[EmbeddingCache] = None
+_embedding_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    """Retorna la caché de embeddings compartida por todo el proceso."""
+    global _embedding_cache
+    with _embedding_cache_lock:
+        if _embedding_cache is None:
+            _embedding_cache = EmbeddingCache(EMBEDDING_CACHE_PATH)
+        return _embedding_cache
@@ -0,0 +1,256 @@
+import hashlib
+import logging
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Mapping, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from src.config.configuration import HTTP_CACHE_DEFAULT_TTL_SECONDS, HTTP_CACHE_MAX_BYTES, HTTP_CACHE_PATH
+
+logger = logging.getLogger(__name__)
+
+_MAX_AGE_RE = re.compile(r"(?:s-maxage|max-age)\s*=\s*(\d+)")
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+# Parámetros de seguimiento que no cambian el contenido de la página
+_TRACKING_PARAMS = ("utm_", "fbclid", "gclid", "mc_cid", "mc_eid")
+
+
+def normalize_url(url: str) -> str:
+    """
+    Forma canónica de una URL para la llave de la caché: esquema y host en minúsculas,
+    sin puerto por defecto, sin fragmento, sin parámetros de seguimiento y con los
+    parámetros de la consulta ordenados.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and parts.port != _DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    query = sorted(
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith(_TRACKING_PARAMS)
+    )
+    return urlunsplit((scheme, host, parts.path or "/", urlencode(query), ""))
+
+
+def _expires_at(headers: Mapping[str, str], default_ttl: int, now: float) -> Optional[float]:
+    """
+    Momento hasta el cual la respuesta es fresca según Cache-Control/Expires, con
+    `default_ttl` cuando el servidor no indica nada. None si no debe almacenarse.
+    """
+    cache_control = (headers.get("Cache-Control") or "").lower()
+    if "no-store" in cache_control:
+        return None
+    if "no-cache" in cache_control:
+        # Se almacena, pero cada uso requiere revalidar con ETag/Last-Modified
+        return now
+    match = _MAX_AGE_RE.search(cache_control)
+    if match:
+        return now + int(match.group(1))
+    expires = headers.get("Expires")
+    if expires:
+        try:
+            return parsedate_to_datetime(expires).timestamp()
+        except (TypeError, ValueError):
+            return now
+    return now + default_ttl
+
+
+@dataclass
+class CachedPage:
+    """Texto extraído de una URL junto con sus validadores HTTP."""
+    url: str
+    text: str
+    content_type: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    expires_at: float
+
+    @property
+    def is_fresh(self) -> bool:
+        return time.time() < self.expires_at
+
+    def conditional_headers(self) -> dict:
+        """Encabezados para un GET condicional (respuesta 304 si el recurso no cambió)."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class HTTPCache:
+    """
+    Caché persistente (SQLite) de páginas web ya procesadas por `web_rag_pipeline_tool`.
+
+    Se indexa por la URL normalizada y guarda el texto extraído (comprimido), no el cuerpo
+    crudo, de modo que un acierto evita tanto la descarga como el parseo del HTML/PDF.
+    Respeta Cache-Control (`no-store`, `no-cache`, `max-age`) y Expires; sin indicación
+    del servidor se usa `default_ttl`. Las entradas vencidas se revalidan con ETag o
+    Last-Modified antes de volver a descargar. Cuando el tamaño total supera `max_bytes`
+    se eliminan las entradas con acceso más antiguo (LRU).
+    """
+
+    def __init__(
+        self,
+        path: Path | str,
+        max_bytes: int = HTTP_CACHE_MAX_BYTES,
+        default_ttl: int = HTTP_CACHE_DEFAULT_TTL_SECONDS,
+    ):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.hits = 0
+        self.revalidations = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path.as_posix(), check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS pages (
+                url_hash TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                content_type TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                expires_at REAL NOT NULL,
+                text BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_pages_last_access ON pages (last_access)")
+        self._conn.commit()
+
+    @staticmethod
+    def hash_url(url: str) -> str:
+        return hashlib.sha256(normalize_url(url).encode("utf-8")).hexdigest()
+
+    def get(self, url: str) -> Optional[CachedPage]:
+        """Entrada almacenada para `url` (fresca o vencida), o None."""
+        url_hash = self.hash_url(url)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url, content_type, etag, last_modified, expires_at, text FROM pages WHERE url_hash = ?",
+                (url_hash,),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE pages SET last_access = ? WHERE url_hash = ?", (time.time(), url_hash))
+            self._conn.commit()
+        stored_url, content_type, etag, last_modified, expires_at, blob = row
+        page = CachedPage(stored_url, zlib.decompress(blob).decode("utf-8"), content_type, etag, last_modified, expires_at)
+        if page.is_fresh:
+            self.hits += 1
+        return page
+
+    def put(self, url: str, text: str, content_type: str, headers: Mapping[str, str], status_code: int) -> None:
+        """
+        Guarda el texto extraído de `url` con los validadores y la vigencia de `headers`.
+        Solo se almacenan respuestas 2xx: una página de error no debe servirse como contenido.
+        """
+        if not 200 <= status_code < 300:
+            return
+        now = time.time()
+        expires_at = _expires_at(headers, self.default_ttl, now)
+        if expires_at is None:
+            return
+        blob = zlib.compress(text.encode("utf-8"))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages "
+                "(url_hash, url, content_type, etag, last_modified, expires_at, text, size, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    self.hash_url(url),
+                    normalize_url(url),
+                    content_type,
+                    headers.get("ETag"),
+                    headers.get("Last-Modified"),
+                    expires_at,
+                    blob,
+                    len(blob),
+                    now,
+                ),
+            )
+            self._conn.commit()
+            self._evict_if_needed()
+
+    def revalidate(self, url: str, headers: Mapping[str, str]) -> None:
+        """Renueva la vigencia de una entrada cuyo contenido el servidor confirmó sin cambios."""
+        now = time.time()
+        expires_at = _expires_at(headers, self.default_ttl, now)
+        with self._lock:
+            if expires_at is None:
+                self._conn.execute("DELETE FROM pages WHERE url_hash = ?", (self.hash_url(url),))
+            else:
+                self._conn.execute(
+                    "UPDATE pages SET expires_at = ?, last_access = ? WHERE url_hash = ?",
+                    (expires_at, now, self.hash_url(url)),
+                )
+            self._conn.commit()
+            self.revalidations += 1
+
+    def _evict_if_needed(self) -> None:
+        total_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+        if total_bytes <= self.max_bytes:
+            return
+        # Se libera hasta el 90% de la cuota para no expulsar en cada inserción
+        to_free = total_bytes - int(self.max_bytes * 0.9)
+        victims = []
+        for url_hash, size in self._conn.execute("SELECT url_hash, size FROM pages ORDER BY last_access ASC"):
+            victims.append((url_hash,))
+            to_free -= size
+            if to_free <= 0:
+                break
+        self._conn.executemany("DELETE FROM pages WHERE url_hash = ?", victims)
+        self._conn.commit()
+        self.evictions += len(victims)
+        logger.info(f"HTTP cache: {len(victims)} páginas expulsadas (LRU)")
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries, total_bytes = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM pages"
+            ).fetchone()
+            return {
+                "entries": entries,
+                "bytes": total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "revalidations": self.revalidations,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM pages")
+            self._conn.commit()
+            self.hits = self.revalidations = self.misses = self.evictions = 0
+
+
+_http_cache: Optional[HTTPCache] = None
+_http_cache_lock = threading.Lock()
+
+
+def get_http_cache() -> HTTPCache:
+    """Retorna la caché HTTP compartida por todo el proceso."""
+    global _http_cache
+    with _http_cache_lock:
+        if _http_cache is None:
+            _http_cache = HTTPCache(HTTP_CACHE_PATH)
+        return _http_cache
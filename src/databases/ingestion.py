@@ -0,0 +1,141 @@
+import logging
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Deque, Iterable, Iterator, List, Optional, Union
+
+from langchain_core.document_loaders import BaseLoader
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_text_splitters import TextSplitter
+
+from src.config.configuration import DEDUP_ENABLED, EMBEDDING_BATCH_SIZE, EMBEDDING_MAX_IN_FLIGHT, VECTORSTORE_ANN
+from src.databases.dedup import ChunkDeduplicator, DedupStats
+from src.databases.loaders import create_document_loader
+from src.databases.splitters import StructuralTDRSplitter
+from src.databases.vectorstore_io import write_vectorstore
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class IngestionResult:
+    """Chunks de un documento con sus embeddings, en el orden original."""
+    texts: List[str] = field(default_factory=list)
+    metadatas: List[dict] = field(default_factory=list)
+    vectors: List[List[float]] = field(default_factory=list)
+    pages: int = 0
+    elapsed_seconds: float = 0.0
+    dedup: Optional[DedupStats] = None
+
+
+class StreamingIngestionPipeline:
+    """
+    Ingesta en streaming: las páginas de `loader.lazy_load()` pasan por el splitter y los
+    chunks resultantes se envían a la API de embeddings en lotes mientras el loader sigue
+    procesando las páginas siguientes.
+
+    El parseo (CPU) ocurre en el hilo actual y los lotes de embeddings (red) en un pool de
+    hilos con a lo sumo `max_in_flight` solicitudes simultáneas; cuando se alcanza ese
+    límite el loader espera al lote más antiguo (backpressure).
+
+    Con `deduplicator`, los encabezados/pies repetidos se eliminan de las páginas antes de
+    dividir y los chunks duplicados se descartan antes de formar los lotes.
+    """
+
+    def __init__(
+        self,
+        embedding: Embeddings,
+        splitter: Union[TextSplitter, StructuralTDRSplitter],
+        batch_size: int = EMBEDDING_BATCH_SIZE,
+        max_in_flight: int = EMBEDDING_MAX_IN_FLIGHT,
+        deduplicator: Optional[ChunkDeduplicator] = None,
+    ):
+        self.embedding = embedding
+        self.splitter = splitter
+        self.deduplicator = deduplicator
+        self.batch_size = max(1, batch_size)
+        self.max_in_flight = max(1, max_in_flight)
+
+    @staticmethod
+    def _count_pages(pages: Iterable[Document], result: IngestionResult) -> Iterator[Document]:
+        for page in pages:
+            result.pages += 1
+            yield page
+
+    def _split_stream(self, pages: Iterable[Document]) -> Iterator[Document]:
+        """
+        Divide las páginas a medida que llegan. Los splitters estructurales (`lazy_split`)
+        reciben el flujo completo porque una sección puede abarcar varias páginas.
+        """
+        if self.deduplicator is not None:
+            pages = self.deduplicator.strip_boilerplate(pages)
+        if isinstance(self.splitter, StructuralTDRSplitter):
+            chunks = self.splitter.lazy_split(pages)
+        else:
+            chunks = (chunk for page in pages for chunk in self.splitter.split_documents([page]))
+        if self.deduplicator is not None:
+            chunks = self.deduplicator.filter(chunks)
+        yield from chunks
+
+    def run(self, loader: BaseLoader) -> IngestionResult:
+        start = time.perf_counter()
+        result = IngestionResult()
+        pending: List[Document] = []
+        in_flight: Deque[Future] = deque()
+
+        with ThreadPoolExecutor(max_workers=self.max_in_flight, thread_name_prefix="embeddings") as executor:
+
+            def submit(batch: List[Document]) -> None:
+                if len(in_flight) >= self.max_in_flight:
+                    result.vectors.extend(in_flight.popleft().result())
+                result.texts.extend(doc.page_content for doc in batch)
+                result.metadatas.extend(doc.metadata for doc in batch)
+                in_flight.append(executor.submit(self.embedding.embed_documents, [doc.page_content for doc in batch]))
+
+            for chunk in self._split_stream(self._count_pages(loader.lazy_load(), result)):
+                pending.append(chunk)
+                if len(pending) >= self.batch_size:
+                    submit(pending)
+                    pending = []
+
+            if pending:
+                submit(pending)
+            # Los futuros se consumen en orden de envío, así los vectores quedan alineados con los textos
+            while in_flight:
+                result.vectors.extend(in_flight.popleft().result())
+
+        result.elapsed_seconds = time.perf_counter() - start
+        if self.deduplicator is not None:
+            result.dedup = self.deduplicator.stats
+            self.deduplicator.log_stats()
+        logger.info(
+            f"Ingesta en streaming: {result.pages} páginas, {len(result.texts)} chunks "
+            f"en {result.elapsed_seconds:.1f}s"
+        )
+        return result
+
+
+def ingest_document(
+    file_path: str,
+    persist_path: str,
+    embedding: Embeddings,
+    splitter: Union[TextSplitter, StructuralTDRSplitter],
+    loader: Optional[BaseLoader] = None,
+    ann: str = VECTORSTORE_ANN,
+    dedup: bool = DEDUP_ENABLED,
+) -> IngestionResult:
+    """
+    Carga, divide y embebe `file_path` en streaming y persiste el vector store en `persist_path`.
+    Si no se indica `loader` se usa el loader por defecto según la extensión del archivo;
+    `ann` selecciona la búsqueda exacta o aproximada (IVF) del store y `dedup` activa la
+    eliminación de encabezados/pies y chunks duplicados antes de embeber.
+    """
+    loader = loader or create_document_loader(file_path)
+    deduplicator = ChunkDeduplicator() if dedup else None
+    ingestion = StreamingIngestionPipeline(embedding, splitter, deduplicator=deduplicator).run(loader)
+    if not ingestion.texts:
+        raise ValueError(f"No content could be extracted from {file_path}")
+    write_vectorstore(persist_path, ingestion.texts, ingestion.vectors, ingestion.metadatas, ann=ann)
+    return ingestion
@@ -0,0 +1,183 @@
+import json
+import math
+import os
+import re
+import unicodedata
+import uuid
+from collections import Counter
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from src.databases.npy_vectorstore import NPY_STORE_SUFFIX
+from src.databases.vectorstore_cache import get_vectorstore_cache
+
+LEXICAL_INDEX_FILE = "lexical.npz"
+LEXICAL_INDEX_SUFFIX = ".lexical.npz"
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Palabras vacías del español (ya sin tildes)
+SPANISH_STOPWORDS = frozenset(
+    """
+    a al algo algunas algunos ante antes como con contra cual cuales cuando de del desde donde
+    durante e el ella ellas ellos en entre era eran es esa esas ese eso esos esta estas este esto
+    estos fue fueron ha han hasta hay la las le les lo los mas me mi mientras muy ni no nos o otra
+    otras otro otros para pero poco por porque que quien quienes se sea sean segun ser si sin sobre
+    son su sus tal tambien tanto te tiene tienen todo todos tras tu u un una unas uno unos y ya
+    """.split()
+)
+
+
+def fold_accents(text: str) -> str:
+    """Minúsculas y sin tildes ni diéresis ("Evaluación" -> "evaluacion", "ñ" -> "n")."""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def _light_stem(token: str) -> str:
+    # Solo se reducen plurales regulares: "criterios" -> "criterio", "entidades" -> "entidad"
+    if len(token) > 4 and token.endswith("es") and token[-3] in "dlrnjz":
+        return token[:-2]
+    if len(token) > 4 and token.endswith("s"):
+        return token[:-1]
+    return token
+
+
+def tokenize(text: str) -> List[str]:
+    """Tokenización para español: sin tildes, sin palabras vacías y con plurales reducidos."""
+    return [_light_stem(token) for token in TOKEN_RE.findall(fold_accents(text)) if token not in SPANISH_STOPWORDS]
+
+
+def lexical_index_path(persist_path: str) -> str:
+    """Ruta del índice léxico de un store: dentro del directorio (npy) o junto al archivo (parquet)."""
+    if os.path.isdir(persist_path) or persist_path.endswith(NPY_STORE_SUFFIX):
+        return os.path.join(persist_path, LEXICAL_INDEX_FILE)
+    return f"{persist_path}{LEXICAL_INDEX_SUFFIX}"
+
+
+class BM25Index:
+    """
+    Índice invertido BM25 sobre los chunks de un vector store, en el mismo orden que la
+    matriz de embeddings (el índice de documento coincide con la posición del chunk).
+
+    Las listas de postings se guardan como arreglos planos (formato CSR) en un `.npz`,
+    de modo que la consulta no requiere red ni modelo de embeddings.
+    """
+
+    def __init__(
+        self,
+        vocabulary: List[str],
+        term_offsets: np.ndarray,
+        postings_docs: np.ndarray,
+        postings_tf: np.ndarray,
+        doc_lengths: np.ndarray,
+        k1: float = 1.5,
+        b: float = 0.75,
+    ):
+        self.vocabulary = vocabulary
+        self.term_ids: Dict[str, int] = {term: i for i, term in enumerate(vocabulary)}
+        self.term_offsets = term_offsets
+        self.postings_docs = postings_docs
+        self.postings_tf = postings_tf
+        self.doc_lengths = doc_lengths
+        self.k1 = k1
+        self.b = b
+        self.avg_doc_length = float(doc_lengths.mean()) if len(doc_lengths) else 0.0
+
+    def __len__(self) -> int:
+        return len(self.doc_lengths)
+
+    @classmethod
+    def build(cls, texts: Iterable[str], k1: float = 1.5, b: float = 0.75) -> "BM25Index":
+        postings: Dict[str, List[tuple]] = {}
+        doc_lengths = []
+        for doc_id, text in enumerate(texts):
+            tokens = tokenize(text)
+            doc_lengths.append(len(tokens))
+            for term, tf in Counter(tokens).items():
+                postings.setdefault(term, []).append((doc_id, tf))
+
+        vocabulary = sorted(postings)
+        term_offsets = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+        docs, tfs = [], []
+        for i, term in enumerate(vocabulary):
+            docs.extend(doc_id for doc_id, _ in postings[term])
+            tfs.extend(tf for _, tf in postings[term])
+            term_offsets[i + 1] = len(docs)
+        return cls(
+            vocabulary,
+            term_offsets,
+            np.asarray(docs, dtype=np.int32),
+            np.asarray(tfs, dtype=np.float32),
+            np.asarray(doc_lengths, dtype=np.float32),
+            k1=k1,
+            b=b,
+        )
+
+    # --- Persistencia ---
+    def save(self, path: str) -> str:
+        """Escritura atómica del índice en `path` (.npz)."""
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp.npz"
+        np.savez(
+            tmp_path,
+            vocabulary=np.asarray(json.dumps(self.vocabulary, ensure_ascii=False)),
+            term_offsets=self.term_offsets,
+            postings_docs=self.postings_docs,
+            postings_tf=self.postings_tf,
+            doc_lengths=self.doc_lengths,
+            params=np.asarray([self.k1, self.b], dtype=np.float64),
+        )
+        os.replace(tmp_path, path)
+        return path
+
+    @classmethod
+    def load(cls, path: str) -> "BM25Index":
+        with np.load(path) as data:
+            k1, b = data["params"].tolist()
+            return cls(
+                json.loads(str(data["vocabulary"])),
+                data["term_offsets"],
+                data["postings_docs"],
+                data["postings_tf"],
+                data["doc_lengths"],
+                k1=k1,
+                b=b,
+            )
+
+    def memory_usage(self) -> int:
+        arrays = (self.term_offsets, self.postings_docs, self.postings_tf, self.doc_lengths)
+        return sum(array.nbytes for array in arrays) + sum(len(term) + 64 for term in self.vocabulary)
+
+    # --- Consulta ---
+    def scores(self, query: str) -> np.ndarray:
+        """Puntaje BM25 de `query` para cada chunk."""
+        scores = np.zeros(len(self), dtype=np.float32)
+        n_docs = len(self)
+        length_norm = self.k1 * (1 - self.b + self.b * self.doc_lengths / max(self.avg_doc_length, 1e-9))
+        for term in set(tokenize(query)):
+            term_id = self.term_ids.get(term)
+            if term_id is None:
+                continue
+            start, end = self.term_offsets[term_id], self.term_offsets[term_id + 1]
+            docs, tf = self.postings_docs[start:end], self.postings_tf[start:end]
+            df = end - start
+            idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+            scores[docs] += idf * tf * (self.k1 + 1) / (tf + length_norm[docs])
+        return scores
+
+
+def build_lexical_index(persist_path: str, texts: List[str]) -> str:
+    """Construye y persiste el índice BM25 de un store recién escrito."""
+    return BM25Index.build(texts).save(lexical_index_path(persist_path))
+
+
+def get_lexical_index(persist_path: str) -> Optional[BM25Index]:
+    """
+    Índice léxico del store desde la caché de stores cargados, o None si el store se
+    creó sin él.
+    """
+    path = lexical_index_path(persist_path)
+    if not os.path.exists(path):
+        return None
+    return get_vectorstore_cache().get(path, BM25Index.load)
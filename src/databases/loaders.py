@@ -0,0 +1,111 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Tuple
+
+from langchain_community.document_loaders import PyPDFLoader, UnstructuredWordDocumentLoader
+from langchain_core.document_loaders import BaseLoader
+from langchain_core.documents import Document
+
+
+def _extract_page_range(file_path: str, start: int, end: int) -> List[Tuple[int, str, str]]:
+    """Extrae el texto de las páginas [start, end) en un proceso independiente."""
+    import pypdf
+
+    reader = pypdf.PdfReader(file_path)
+    pages = []
+    for page_number in range(start, end):
+        text = reader.pages[page_number].extract_text().strip()
+        pages.append((page_number, reader.page_labels[page_number], text))
+    return pages
+
+
+def _page_count(file_path: str) -> int:
+    """
+    Número de páginas según `/Count` del árbol de páginas: solo lee el xref y el catálogo,
+    sin recorrer las páginas ni extraer texto.
+    """
+    import pypdf
+
+    reader = pypdf.PdfReader(file_path)
+    try:
+        return int(reader.trailer["/Root"]["/Pages"]["/Count"])
+    except (KeyError, TypeError, ValueError):
+        return len(reader.pages)
+
+
+class ParallelPDFLoader(BaseLoader):
+    """
+    Loader de PDF que reparte el rango de páginas entre un pool de procesos.
+
+    Cada proceso abre el archivo por su cuenta y extrae el texto de un bloque de
+    páginas contiguas; los `Document` se reensamblan en el orden original con la misma
+    metadata de página que `PyPDFLoader`. Los bloques se entregan a medida que terminan
+    (en orden), de modo que la ingesta en streaming puede empezar con las primeras páginas.
+    Para archivos pequeños se usa directamente el loader secuencial.
+
+    Los procesos se crean con el método `spawn`: el loader corre dentro del servidor de
+    LangGraph, que tiene varios hilos, y un `fork` podría heredar locks tomados por otros
+    hilos y bloquear al hijo.
+    """
+
+    def __init__(self, file_path: str, max_workers: int = 0, min_pages: int = 64, pages_per_task: int = 16):
+        self.file_path = file_path
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.min_pages = min_pages
+        self.pages_per_task = max(1, pages_per_task)
+
+    def lazy_load(self) -> Iterator[Document]:
+        total_pages = _page_count(self.file_path)
+        if total_pages < self.min_pages or self.max_workers <= 1:
+            yield from PyPDFLoader(file_path=self.file_path).lazy_load()
+            return
+
+        ranges = [
+            (start, min(start + self.pages_per_task, total_pages))
+            for start in range(0, total_pages, self.pages_per_task)
+        ]
+        with ProcessPoolExecutor(
+            max_workers=min(self.max_workers, len(ranges)),
+            mp_context=multiprocessing.get_context("spawn"),
+        ) as executor:
+            results = executor.map(
+                _extract_page_range,
+                [self.file_path] * len(ranges),
+                [start for start, _ in ranges],
+                [end for _, end in ranges],
+            )
+            for pages in results:
+                for page_number, page_label, text in pages:
+                    yield Document(
+                        page_content=text,
+                        metadata={
+                            "source": self.file_path,
+                            "total_pages": total_pages,
+                            "page": page_number,
+                            "page_label": page_label,
+                        },
+                    )
+
+
+def create_document_loader(
+    file_path: str,
+    pdf_loader: str = "sequential",
+    pdf_parallel_workers: int = 0,
+    pdf_parallel_min_pages: int = 64,
+) -> BaseLoader:
+    """
+    Selecciona el loader de LangChain según la extensión del documento (PDF o DOCX).
+    :param pdf_loader: "sequential" (PyPDFLoader) o "parallel" (ParallelPDFLoader).
+    :param pdf_parallel_workers: Procesos del loader paralelo (0 = número de CPUs).
+    :param pdf_parallel_min_pages: Por debajo de este número de páginas se usa el loader secuencial.
+    """
+    ext = os.path.splitext(file_path)[1].lower()
+    if ext == ".pdf":
+        if pdf_loader == "parallel":
+            return ParallelPDFLoader(file_path, max_workers=pdf_parallel_workers, min_pages=pdf_parallel_min_pages)
+        return PyPDFLoader(file_path=file_path)
+    elif ext == ".docx":
+        return UnstructuredWordDocumentLoader(file_path)
+    else:
+        raise ValueError(f"Unsupported file format: {ext}. Please provide a PDF or DOCX file.")
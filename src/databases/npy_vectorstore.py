@@ -0,0 +1,316 @@
+import json
+import os
+import shutil
+import uuid
+from typing import Any, List, Optional, Tuple
+
+import numpy as np
+from langchain_community.vectorstores.utils import maximal_marginal_relevance
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+from src.config.configuration import VECTORSTORE_RESCORE_FACTOR
+from src.databases.ann_index import IVFIndex, should_build_ann
+from src.databases.quantization import dequantize, quantize, quantized_scores
+
+NPY_STORE_SUFFIX = ".npystore"
+FORMAT_VERSION = 2
+
+EMBEDDINGS_FILE = "embeddings.npy"
+CHUNKS_FILE = "chunks.jsonl"
+OFFSETS_FILE = "offsets.npy"
+SCALES_FILE = "scales.npy"
+EXACT_FILE = "exact.npy"
+MANIFEST_FILE = "manifest.json"
+
+
+def is_npy_store(persist_path: str) -> bool:
+    return os.path.isfile(os.path.join(persist_path, MANIFEST_FILE))
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def _publish(tmp_path: str, persist_path: str, overwrite: bool) -> None:
+    """Mueve el store terminado de `tmp_path` a `persist_path` (ver `NpyVectorStore.write`)."""
+    old_path = None
+    if os.path.exists(persist_path):
+        if is_npy_store(persist_path) and not overwrite:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            return
+        old_path = f"{persist_path}.{uuid.uuid4().hex}.old"
+        try:
+            os.rename(persist_path, old_path)
+        except FileNotFoundError:
+            old_path = None
+    try:
+        os.replace(tmp_path, persist_path)
+    except OSError:
+        # Otro escritor publicó el mismo store entre el rename y el replace (ENOTEMPTY/EEXIST)
+        if not is_npy_store(persist_path):
+            raise
+        shutil.rmtree(tmp_path, ignore_errors=True)
+    finally:
+        if old_path is not None:
+            shutil.rmtree(old_path, ignore_errors=True)
+
+
+class NpyVectorStore(VectorStore):
+    """
+    Vector store de solo lectura sobre un directorio con formato NumPy:
+
+    - `embeddings.npy`: matriz contigua de vectores normalizados en float32, float16 o
+      int8, abierta con `np.memmap` (varios procesos comparten la misma copia en page cache).
+    - `scales.npy` (solo int8): escala por vector.
+    - `exact.npy` (solo float16/int8): vectores float32, abiertos con memmap y leídos solo
+      para las filas candidatas.
+
+    En float16 e int8 la búsqueda tiene dos etapas: la matriz cuantizada (la única que se
+    recorre completa) elige `k * VECTORSTORE_RESCORE_FACTOR` candidatos y esos se
+    re-puntúan con los vectores exactos de `exact.npy`, de modo que los scores retornados
+    son los mismos que en float32.
+    - `chunks.jsonl`: un registro JSON por chunk (id, texto y metadatos).
+    - `offsets.npy`: posiciones en bytes de cada registro dentro de `chunks.jsonl`,
+      para leer solo los chunks devueltos por la búsqueda.
+
+    - `ivf.npz` / `ivf_vectors.npy` (opcionales): índice IVF para búsqueda aproximada en
+      stores grandes; sin ellos la búsqueda es exacta.
+
+    La similitud es coseno, calculada como producto punto sobre la matriz mapeada. El
+    store no se modifica después de escrito (no implementa `add_texts`): para agregar
+    documentos se escribe un store nuevo con `write` o `from_texts`.
+    """
+
+    def __init__(self, embedding: Embeddings, persist_path: str):
+        self._embedding_function = embedding
+        self.persist_path = persist_path
+        with open(os.path.join(persist_path, MANIFEST_FILE), "r", encoding="utf-8") as f:
+            self.manifest = json.load(f)
+        self._embeddings = np.load(os.path.join(persist_path, EMBEDDINGS_FILE), mmap_mode="r")
+        scales_path = os.path.join(persist_path, SCALES_FILE)
+        self._scales = np.load(scales_path) if os.path.exists(scales_path) else None
+        exact_path = os.path.join(persist_path, EXACT_FILE)
+        if self._embeddings.dtype == np.float32:
+            self._exact = self._embeddings
+        else:
+            # Stores cuantizados del formato 1 no tienen copia exacta: se re-puntúa descuantizando
+            self._exact = np.load(exact_path, mmap_mode="r") if os.path.exists(exact_path) else None
+        self._offsets = np.load(os.path.join(persist_path, OFFSETS_FILE))
+        self._chunks = np.memmap(os.path.join(persist_path, CHUNKS_FILE), dtype=np.uint8, mode="r")
+        self._ann = IVFIndex.load(persist_path)
+
+    @property
+    def is_quantized(self) -> bool:
+        return self._embeddings.dtype != np.float32
+
+    @property
+    def embeddings(self) -> Optional[Embeddings]:
+        return self._embedding_function
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def memory_usage(self) -> int:
+        """Memoria propia del proceso; la matriz y los textos viven en el page cache del sistema."""
+        scales_bytes = self._scales.nbytes if self._scales is not None else 0
+        return self._offsets.nbytes + scales_bytes + (self._ann.memory_usage() if self._ann is not None else 0)
+
+    # --- Escritura ---
+    @staticmethod
+    def write(
+        persist_path: str,
+        texts: List[str],
+        vectors: Any,
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+        dtype: str = "float32",
+        ann: str = "exact",
+        overwrite: bool = False,
+        **manifest_extra: Any,
+    ) -> str:
+        """
+        Escribe el store en un directorio temporal y lo renombra al final, de modo que
+        ningún lector observe un store a medio escribir. `dtype` ("float32", "float16" o
+        "int8") fija la precisión de la matriz y `ann` ("exact", "ivf" o "auto") decide si
+        se construye el índice IVF.
+
+        Las rutas de los stores son direccionadas por contenido: si `persist_path` ya tiene
+        un store completo (otro proceso lo escribió primero) se conserva y se descarta el
+        temporal. Con `overwrite=True` el store anterior se aparta con un rename antes de
+        poner el nuevo y se borra después; los lectores que ya lo tenían abierto (memmap)
+        siguen leyéndolo.
+        """
+        metadatas = metadatas or [{} for _ in texts]
+        ids = ids or [str(uuid.uuid4()) for _ in texts]
+        matrix = _normalize(np.asarray(vectors, dtype=np.float32))
+        stored, scales = quantize(matrix, dtype)
+
+        tmp_path = f"{persist_path}.{uuid.uuid4().hex}.tmp"
+        os.makedirs(tmp_path)
+        np.save(os.path.join(tmp_path, EMBEDDINGS_FILE), stored)
+        if scales is not None:
+            np.save(os.path.join(tmp_path, SCALES_FILE), scales)
+        if dtype != "float32":
+            np.save(os.path.join(tmp_path, EXACT_FILE), matrix)
+
+        offsets = [0]
+        with open(os.path.join(tmp_path, CHUNKS_FILE), "wb") as f:
+            for text, metadata, id_ in zip(texts, metadatas, ids):
+                line = json.dumps({"id": id_, "text": text, "metadata": metadata}, ensure_ascii=False, default=str)
+                encoded = (line + "\n").encode("utf-8")
+                f.write(encoded)
+                offsets.append(offsets[-1] + len(encoded))
+        np.save(os.path.join(tmp_path, OFFSETS_FILE), np.asarray(offsets, dtype=np.int64))
+
+        if matrix.ndim == 2 and should_build_ann(ann, len(matrix)):
+            ivf = IVFIndex.build(matrix, dtype=dtype)
+            ivf.save(tmp_path)
+            manifest_extra = {**manifest_extra, "ann": ivf.params}
+
+        with open(os.path.join(tmp_path, MANIFEST_FILE), "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "format_version": FORMAT_VERSION,
+                    "count": len(texts),
+                    "dim": int(matrix.shape[1]) if matrix.ndim == 2 else 0,
+                    "dtype": dtype,
+                    **manifest_extra,
+                },
+                f,
+                indent=2,
+            )
+
+        _publish(tmp_path, persist_path, overwrite)
+        return persist_path
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: List[str],
+        embedding: Embeddings,
+        metadatas: Optional[List[dict]] = None,
+        *,
+        ids: Optional[List[str]] = None,
+        persist_path: Optional[str] = None,
+        dtype: str = "float32",
+        ann: str = "exact",
+        **kwargs: Any,
+    ) -> "NpyVectorStore":
+        if persist_path is None:
+            raise ValueError("NpyVectorStore requiere un persist_path.")
+        texts = list(texts)
+        vectors = embedding.embed_documents(texts)
+        cls.write(persist_path, texts, vectors, metadatas=metadatas, ids=ids, dtype=dtype, ann=ann)
+        return cls(embedding=embedding, persist_path=persist_path)
+
+    # --- Lectura ---
+    def get_document(self, index: int) -> Document:
+        start, end = int(self._offsets[index]), int(self._offsets[index + 1])
+        record = json.loads(self._chunks[start:end].tobytes().decode("utf-8"))
+        return Document(page_content=record["text"], metadata={"id": record["id"], **record["metadata"]})
+
+    def vectors(self, indices: np.ndarray) -> np.ndarray:
+        """Vectores float32 en `indices` (ordenados para leer el memmap en secuencia)."""
+        indices = np.asarray(indices, dtype=np.int64)
+        order = np.argsort(indices)
+        result = np.empty((len(indices), self._embeddings.shape[1]), dtype=np.float32)
+        if self._exact is not None:
+            result[order] = self._exact[indices[order]]
+        else:
+            scales = self._scales[indices[order]] if self._scales is not None else None
+            result[order] = dequantize(self._embeddings[indices[order]], scales)
+        return result
+
+    def get_vector(self, index: int) -> np.ndarray:
+        return self.vectors(np.asarray([index]))[0]
+
+    def batch_scores(self, queries: np.ndarray) -> np.ndarray:
+        """
+        Similitud de consultas normalizadas (dim,) o (n_queries, dim) contra toda la matriz;
+        aproximada si el store está cuantizado.
+        """
+        return quantized_scores(self._embeddings, self._scales, queries)
+
+    def _scores(self, embedding: List[float]) -> np.ndarray:
+        return self.batch_scores(_normalize(np.asarray(embedding, dtype=np.float32)))
+
+    @staticmethod
+    def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+        k = min(k, len(scores))
+        if k <= 0:
+            return np.asarray([], dtype=np.int64)
+        candidates = np.argpartition(-scores, k - 1)[:k]
+        return candidates[np.argsort(-scores[candidates])]
+
+    def search_vector(self, embedding: List[float], k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Top-k (índices, similitudes): aproximado con el índice IVF si existe, exacto si no.
+        En stores cuantizados se toman `k * VECTORSTORE_RESCORE_FACTOR` candidatos sobre la
+        matriz cuantizada y se re-puntúan con los vectores exactos.
+        """
+        query = _normalize(np.asarray(embedding, dtype=np.float32))
+        fetch_k = k * VECTORSTORE_RESCORE_FACTOR if self.is_quantized else k
+        if self._ann is not None:
+            indices, scores = self._ann.search(query, fetch_k)
+        else:
+            scores = self.batch_scores(query)
+            indices = self._top_k(scores, fetch_k)
+            scores = scores[indices]
+        if not self.is_quantized:
+            return indices, scores
+        exact_scores = self.vectors(indices) @ query
+        top = self._top_k(exact_scores, k)
+        return indices[top], exact_scores[top]
+
+    def similarity_search_with_score_by_vector(self, embedding: List[float], k: int = 4, **kwargs: Any) -> List[Tuple[Document, float]]:
+        indices, scores = self.search_vector(embedding, k)
+        return [(self.get_document(int(i)), float(score)) for i, score in zip(indices, scores)]
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score_by_vector(embedding, k=k, **kwargs)]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs: Any) -> List[Tuple[Document, float]]:
+        return self.similarity_search_with_score_by_vector(self._embedding_function.embed_query(query), k=k, **kwargs)
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k=k, **kwargs)]
+
+    def _similarity_search_with_relevance_scores(self, query: str, k: int = 4, **kwargs: Any) -> List[Tuple[Document, float]]:
+        # Coseno en [-1, 1] llevado a [0, 1]
+        return [(doc, (score + 1.0) / 2.0) for doc, score in self.similarity_search_with_score(query, k=k, **kwargs)]
+
+    def max_marginal_relevance_search_by_vector(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        fetch_k: int = 20,
+        lambda_mult: float = 0.5,
+        **kwargs: Any,
+    ) -> List[Document]:
+        # Índices ordenados para que la lectura sobre el memmap sea secuencial
+        candidates = np.sort(self.search_vector(embedding, fetch_k)[0])
+        if len(candidates) == 0:
+            return []
+        candidate_vectors = self.vectors(candidates)
+        selected = maximal_marginal_relevance(
+            np.asarray(embedding, dtype=np.float32),
+            candidate_vectors,
+            k=min(k, len(candidates)),
+            lambda_mult=lambda_mult,
+        )
+        return [self.get_document(int(candidates[i])) for i in selected]
+
+    def max_marginal_relevance_search(
+        self,
+        query: str,
+        k: int = 4,
+        fetch_k: int = 20,
+        lambda_mult: float = 0.5,
+        **kwargs: Any,
+    ) -> List[Document]:
+        embedding = self._embedding_function.embed_query(query)
+        return self.max_marginal_relevance_search_by_vector(embedding, k=k, fetch_k=fetch_k, lambda_mult=lambda_mult, **kwargs)
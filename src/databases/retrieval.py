@@ -0,0 +1,233 @@
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_community.vectorstores import SKLearnVectorStore
+from langchain_core.documents import Document
+from langchain_core.vectorstores import VectorStore
+
+from src.config.configuration import RRF_K
+from src.databases.lexical_index import BM25Index
+from src.databases.npy_vectorstore import NpyVectorStore
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def _sklearn_matrix(vectorstore: VectorStore) -> np.ndarray:
+    if isinstance(vectorstore, SKLearnVectorStore):
+        return _normalize(np.asarray(vectorstore._embeddings_np, dtype=np.float32))
+    raise TypeError(f"Unsupported vectorstore for matrix retrieval: {type(vectorstore).__name__}")
+
+
+def _store_scores(vectorstore: VectorStore, queries: np.ndarray) -> np.ndarray:
+    """Similitud de consultas normalizadas (n_queries, dim) contra todos los chunks del store."""
+    if isinstance(vectorstore, NpyVectorStore):
+        # La matriz puede estar cuantizada (float16/int8); el store resuelve la conversión
+        return vectorstore.batch_scores(queries)
+    return np.asarray(queries @ _sklearn_matrix(vectorstore).T, dtype=np.float32)
+
+
+def _store_vectors(vectorstore: VectorStore, indices: np.ndarray) -> np.ndarray:
+    """Vectores float32 normalizados de los chunks en `indices`."""
+    if isinstance(vectorstore, NpyVectorStore):
+        return vectorstore.vectors(indices)
+    return _sklearn_matrix(vectorstore)[indices]
+
+
+def document_at(vectorstore: VectorStore, index: int) -> Document:
+    """Documento en la posición `index` del store."""
+    if isinstance(vectorstore, NpyVectorStore):
+        return vectorstore.get_document(index)
+    return Document(page_content=vectorstore._texts[index], metadata=dict(vectorstore._metadatas[index]))
+
+
+def batch_similarity_scores(vectorstore: VectorStore, query_vectors: Sequence[Sequence[float]]) -> np.ndarray:
+    """Similitud coseno de todas las consultas contra todos los chunks en un solo producto matricial: (n_queries, n_chunks)."""
+    return _store_scores(vectorstore, _normalize(np.asarray(query_vectors, dtype=np.float32)))
+
+
+def batch_top_k(scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Índices y scores de los `k` chunks más similares por fila, en orden descendente."""
+    k = min(k, scores.shape[1])
+    if k <= 0:
+        empty = np.zeros((scores.shape[0], 0))
+        return empty.astype(np.int64), empty.astype(np.float32)
+    candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+    order = np.argsort(-candidate_scores, axis=1)
+    return np.take_along_axis(candidates, order, axis=1), np.take_along_axis(candidate_scores, order, axis=1)
+
+
+def vector_top_k(vectorstore: VectorStore, query_vector: Sequence[float], k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Top-k de una consulta; usa el índice aproximado del store cuando lo tiene."""
+    if isinstance(vectorstore, NpyVectorStore):
+        return vectorstore.search_vector(query_vector, k)
+    indices, scores = batch_top_k(batch_similarity_scores(vectorstore, [query_vector]), k)
+    return indices[0], scores[0]
+
+
+def batch_similarity_search_with_score(
+    vectorstore: VectorStore,
+    query_vectors: Sequence[Sequence[float]],
+    k: int = 4,
+) -> List[List[Tuple[int, Document, float]]]:
+    """Top-k por consulta como tuplas (índice, documento, score), calculado en una sola pasada."""
+    indices, scores = batch_top_k(batch_similarity_scores(vectorstore, query_vectors), k)
+    return [
+        [(int(i), document_at(vectorstore, int(i)), float(s)) for i, s in zip(row_indices, row_scores)]
+        for row_indices, row_scores in zip(indices, scores)
+    ]
+
+
+def batch_max_marginal_relevance(
+    query_vectors: np.ndarray,
+    candidate_vectors: np.ndarray,
+    candidate_mask: np.ndarray,
+    k: int = 4,
+    lambda_mult: float = 0.5,
+) -> np.ndarray:
+    """
+    MMR vectorizado para varias consultas a la vez.
+
+    :param query_vectors: (n_queries, dim) normalizados.
+    :param candidate_vectors: (n_queries, fetch_k, dim) normalizados.
+    :param candidate_mask: (n_queries, fetch_k) con False en posiciones de relleno.
+    :return: (n_queries, k) posiciones seleccionadas dentro de los candidatos; -1 si no hay más.
+    """
+    n_queries, fetch_k = candidate_mask.shape
+    k = min(k, fetch_k)
+    query_similarity = np.einsum("qd,qfd->qf", query_vectors, candidate_vectors)
+    pairwise_similarity = np.einsum("qfd,qgd->qfg", candidate_vectors, candidate_vectors)
+    rows = np.arange(n_queries)
+
+    selected = np.full((n_queries, k), -1, dtype=np.int64)
+    available = candidate_mask.copy()
+    max_redundancy = np.full((n_queries, fetch_k), -np.inf, dtype=np.float32)
+    for step in range(k):
+        # El primer elegido es siempre el más similar, como en `maximal_marginal_relevance`
+        scores = query_similarity if step == 0 else lambda_mult * query_similarity - (1 - lambda_mult) * max_redundancy
+        scores = np.where(available, scores, -np.inf)
+        best = np.argmax(scores, axis=1)
+        has_candidate = available[rows, best]
+        selected[:, step] = np.where(has_candidate, best, -1)
+        available[rows, best] = False
+        max_redundancy = np.maximum(max_redundancy, pairwise_similarity[rows, best])
+    return selected
+
+
+def batch_mmr_search(
+    vectorstores: Sequence[VectorStore],
+    query_vectors: Sequence[Sequence[float]],
+    k: int = 4,
+    fetch_k: int = 20,
+    lambda_mult: float = 0.5,
+) -> List[List[Tuple[int, Document, float]]]:
+    """
+    Búsqueda MMR de varias consultas sobre uno o más stores: las similitudes de todas las
+    consultas contra todos los stores se calculan en un producto matricial por store, los
+    candidatos se toman del conjunto combinado y el MMR se resuelve para todas las consultas
+    a la vez. Retorna por consulta tuplas (índice del store, documento, similitud).
+    """
+    queries = _normalize(np.asarray(query_vectors, dtype=np.float32))
+    store_scores = [_store_scores(vectorstore, queries) for vectorstore in vectorstores]
+    scores = np.concatenate(store_scores, axis=1)
+    offsets = np.cumsum([0] + [block.shape[1] for block in store_scores])
+
+    candidates, candidate_scores = batch_top_k(scores, fetch_k)
+    n_queries, n_candidates = candidates.shape
+    candidate_vectors = np.zeros((n_queries, n_candidates, queries.shape[1]), dtype=np.float32)
+    candidate_store = np.searchsorted(offsets, candidates, side="right") - 1
+    for store_index, vectorstore in enumerate(vectorstores):
+        mask = candidate_store == store_index
+        if mask.any():
+            candidate_vectors[mask] = _store_vectors(vectorstore, candidates[mask] - offsets[store_index])
+    # Similitud recalculada con los vectores de precisión completa (stores cuantizados)
+    candidate_scores = np.einsum("qd,qfd->qf", queries, candidate_vectors)
+
+    selected = batch_max_marginal_relevance(
+        queries, candidate_vectors, np.ones(candidates.shape, dtype=bool), k=k, lambda_mult=lambda_mult
+    )
+    results = []
+    for row, positions in enumerate(selected):
+        hits = []
+        for position in positions[positions >= 0]:
+            store_index = int(candidate_store[row, position])
+            local_index = int(candidates[row, position] - offsets[store_index])
+            document = document_at(vectorstores[store_index], local_index)
+            hits.append((store_index, document, float(candidate_scores[row, position])))
+        results.append(hits)
+    return results
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[Hashable]], k: int = RRF_K) -> List[Tuple[Hashable, float]]:
+    """
+    Combina varias listas ordenadas por relevancia con RRF: sum(1 / (k + rango)). Los
+    elementos son índices de chunk o, entre varios stores, tuplas (store, índice).
+    """
+    fused: Dict[Hashable, float] = {}
+    for ranking in rankings:
+        for rank, key in enumerate(ranking):
+            fused[key] = fused.get(key, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
+
+
+def lexical_ranking(lexical_index: BM25Index, query: str, fetch_k: int) -> List[int]:
+    """Índices de los chunks con puntaje BM25 positivo, del más al menos relevante."""
+    scores = lexical_index.scores(query)
+    indices, top_scores = batch_top_k(scores[np.newaxis, :], fetch_k)
+    return [int(i) for i, score in zip(indices[0], top_scores[0]) if score > 0]
+
+
+def batch_hybrid_search(
+    vectorstores: Sequence[VectorStore],
+    lexical_indexes: Sequence[Optional[BM25Index]],
+    queries: Sequence[str],
+    k: int = 10,
+    fetch_k: int = 30,
+    mode: str = "hybrid",
+) -> List[List[Tuple[int, Document, float]]]:
+    """
+    Búsqueda léxica o híbrida de varias consultas sobre uno o más stores.
+
+    - "lexical": solo BM25; no llama al modelo de embeddings.
+    - "hybrid": BM25 y similitud coseno fusionados con reciprocal rank fusion.
+
+    Cada store aporta sus propios rankings (los puntajes BM25 de stores distintos no son
+    comparables, sus rangos sí). Un store sin índice léxico (stores antiguos) aporta solo
+    el ranking vectorial. Retorna por consulta tuplas (índice del store, documento, puntaje RRF).
+    """
+    query_vectors = None
+    if mode != "lexical" or any(index is None for index in lexical_indexes):
+        # Una sola solicitud de embeddings para todas las consultas
+        query_vectors = vectorstores[0].embeddings.embed_documents(list(queries))
+    results = []
+    for row, query in enumerate(queries):
+        rankings = []
+        for store_index, (vectorstore, lexical_index) in enumerate(zip(vectorstores, lexical_indexes)):
+            if lexical_index is not None:
+                rankings.append([(store_index, i) for i in lexical_ranking(lexical_index, query, fetch_k)])
+                if mode == "lexical":
+                    continue
+            indices, _ = vector_top_k(vectorstore, query_vectors[row], fetch_k)
+            rankings.append([(store_index, int(i)) for i in indices])
+        results.append([
+            (store_index, document_at(vectorstores[store_index], index), score)
+            for (store_index, index), score in reciprocal_rank_fusion(rankings)[:k]
+        ])
+    return results
+
+
+def hybrid_search(
+    vectorstore: VectorStore,
+    lexical_index: Optional[BM25Index],
+    query: str,
+    k: int = 10,
+    fetch_k: int = 30,
+    mode: str = "hybrid",
+) -> List[Document]:
+    """Búsqueda léxica o híbrida de una consulta sobre un store (ver `batch_hybrid_search`)."""
+    hits = batch_hybrid_search([vectorstore], [lexical_index], [query], k=k, fetch_k=fetch_k, mode=mode)[0]
+    return [document for _, document, _ in hits]
@@ -0,0 +1,181 @@
+import json
+import logging
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from src.config.configuration import SERPER_CACHE_MAX_ENTRIES, SERPER_CACHE_TTL_SECONDS
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_query(query: str) -> str:
+    """Forma canónica de una consulta: NFKC, sin mayúsculas, espacios colapsados y sin puntuación final."""
+    query = unicodedata.normalize("NFKC", query).casefold()
+    return _WHITESPACE_RE.sub(" ", query).strip().rstrip("?.!¿¡ ")
+
+
+class SearchCache:
+    """
+    Caché en proceso de resultados de búsqueda (Serper) con vigencia `ttl` segundos.
+
+    La llave es el endpoint más la consulta normalizada y los parámetros de la solicitud,
+    de modo que variaciones triviales ("Bioeconomía  Caldas?" / "bioeconomía caldas")
+    comparten resultado. Solicitudes concurrentes de una misma llave comparten una sola
+    llamada saliente (single-flight): la primera la ejecuta y las demás esperan su
+    resultado. Los errores no se almacenan. Se conservan a lo sumo `max_entries`
+    resultados (LRU).
+    """
+
+    def __init__(self, ttl: int = SERPER_CACHE_TTL_SECONDS, max_entries: int = SERPER_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._loading: Dict[str, threading.Lock] = {}
+
+    @staticmethod
+    def make_key(endpoint: str, query: str, **params: Any) -> str:
+        return json.dumps({"endpoint": endpoint, "q": normalize_query(query), **params}, sort_keys=True, ensure_ascii=False)
+
+    def _lookup(self, key: str) -> Tuple[bool, Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        expires_at, value = entry
+        if time.time() >= expires_at:
+            del self._entries[key]
+            return False, None
+        self._entries.move_to_end(key)
+        return True, value
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """(encontrado, valor) de `key` sin obtenerlo si falta."""
+        with self._lock:
+            found, value = self._lookup(key)
+            if found:
+                self.hits += 1
+            return found, value
+
+    def put(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._store(key, value)
+
+    def _store(self, key: str, value: Any) -> None:
+        self._entries[key] = (time.time() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get_or_fetch(self, key: str, fetch: Callable[[], Any]) -> Any:
+        """Resultado de `key` desde la caché; si no está, lo obtiene con `fetch` una sola vez."""
+        with self._lock:
+            found, value = self._lookup(key)
+            if found:
+                self.hits += 1
+                return value
+            load_lock = self._loading.setdefault(key, threading.Lock())
+
+        with load_lock:
+            with self._lock:
+                found, value = self._lookup(key)
+                if found:
+                    # Otra rama hizo la misma consulta mientras esta esperaba
+                    self.coalesced += 1
+                    return value
+                self.misses += 1
+            try:
+                value = fetch()
+                with self._lock:
+                    self._store(key, value)
+            finally:
+                with self._lock:
+                    self._loading.pop(key, None)
+        return value
+
+    def get_or_fetch_many(self, keys: Sequence[str], fetch: Callable[[List[int]], Dict[int, Any]]) -> Dict[int, Any]:
+        """
+        Variante de `get_or_fetch` para varias llaves. Las que no están en la caché y
+        ninguna otra rama está obteniendo se piden juntas con `fetch(posiciones)`, que
+        retorna por posición los valores que logró obtener; mientras tanto, `get_or_fetch`
+        de esas llaves espera el resultado en lugar de repetir la llamada. Retorna los
+        valores por posición; faltan los que otra rama está obteniendo y los que `fetch`
+        no resolvió, para que el llamador los pida con `get_or_fetch`.
+        """
+        results: Dict[int, Any] = {}
+        claimed: List[Tuple[int, str, threading.Lock]] = []
+        try:
+            for position, key in enumerate(keys):
+                with self._lock:
+                    found, value = self._lookup(key)
+                    if found:
+                        self.hits += 1
+                        results[position] = value
+                        continue
+                    load_lock = self._loading.setdefault(key, threading.Lock())
+                if not load_lock.acquire(blocking=False):
+                    continue
+                with self._lock:
+                    found, value = self._lookup(key)
+                    if not found:
+                        self.misses += 1
+                        claimed.append((position, key, load_lock))
+                        continue
+                    # Otra rama terminó la misma consulta entre la búsqueda y la reserva
+                    self.coalesced += 1
+                    results[position] = value
+                load_lock.release()
+
+            if claimed:
+                fetched = fetch([position for position, _, _ in claimed])
+                with self._lock:
+                    for position, key, _ in claimed:
+                        if position in fetched:
+                            self._store(key, fetched[position])
+                results.update(fetched)
+        finally:
+            for _, key, load_lock in claimed:
+                with self._lock:
+                    self._loading.pop(key, None)
+                load_lock.release()
+        return results
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.coalesced + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "coalesced": self.coalesced,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+            }
+
+
+_search_cache: Optional[SearchCache] = None
+_search_cache_lock = threading.Lock()
+
+
+def get_search_cache() -> SearchCache:
+    """Retorna la caché de búsquedas compartida por todo el proceso."""
+    global _search_cache
+    with _search_cache_lock:
+        if _search_cache is None:
+            _search_cache = SearchCache()
+        return _search_cache
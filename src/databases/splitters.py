@@ -0,0 +1,199 @@
+import re
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+# "3.", "3.2", "3.2.1 Título" (sin punto final de oración)
+NUMBERED_HEADING_RE = re.compile(r"^\s*(\d{1,2}(?:\.\d{1,2}){0,4})\.?\s+([A-ZÁÉÍÓÚÑ¿\"“].{1,118})$")
+# Un título numerado en minúsculas más largo que esto es un ítem de lista ("1. El contratista deberá ...")
+NUMBERED_HEADING_MAX_WORDS = 10
+# "ANEXO 1", "ANEXO IV", "Anexo A - ..."
+ANNEX_RE = re.compile(r"^\s*ANEXO\s+(\d+|[IVXLC]+|[A-Z])\b.*$", re.IGNORECASE)
+# Filas de tabla: celdas separadas por "|", tabuladores o varios espacios, o filas cortas terminadas en cifra/puntaje
+TABLE_CELL_SEP_RE = re.compile(r"\||\t| {2,}")
+TABLE_SCORE_ROW_RE = re.compile(r"\d+(?:[.,]\d+)?\s*(?:%|puntos?|pts\.?|SMMLV)?\s*$", re.IGNORECASE)
+# Aproximación de ~4 caracteres por token en español
+CHARS_PER_TOKEN = 4
+
+
+def approximate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN
+
+
+def _is_uppercase_heading(line: str) -> bool:
+    letters = [c for c in line if c.isalpha()]
+    return (
+        4 <= len(line) <= 100
+        and len(line.split()) >= 2
+        and len(letters) >= 4
+        and all(c.isupper() for c in letters)
+        and not line.endswith((".", ",", ";"))
+    )
+
+
+def _match_numbered_heading(line: str) -> Optional[re.Match]:
+    """Encabezado numerado: título en mayúsculas o corto, sin puntuación final."""
+    match = NUMBERED_HEADING_RE.match(line)
+    if match is None or line.endswith((".", ",", ";")):
+        return None
+    title = match.group(2)
+    letters = [c for c in title if c.isalpha()]
+    if all(c.isupper() for c in letters) or len(title.split()) <= NUMBERED_HEADING_MAX_WORDS:
+        return match
+    return None
+
+
+def _is_table_row(line: str) -> bool:
+    if len(TABLE_CELL_SEP_RE.findall(line.strip())) >= 2:
+        return True
+    return len(line) <= 100 and len(line.split()) >= 2 and bool(TABLE_SCORE_ROW_RE.search(line))
+
+
+class StructuralTDRSplitter:
+    """
+    Splitter estructural para TDR: detecta encabezados numerados, encabezados en
+    mayúsculas, límites de anexo y tablas, y emite un chunk por sección lógica.
+
+    Una sección solo se subdivide cuando supera `chunk_token_budget`; en ese caso los
+    párrafos y las tablas se empaquetan sin partir filas (las continuaciones de una tabla
+    repiten su fila de encabezado) y cada parte repite el título de la sección. La ruta de
+    encabezados ("3. Evaluación > 3.2 Criterios de evaluación") queda en la metadata
+    `heading_path`.
+
+    Funciona en streaming (`lazy_split`): una sección se emite en cuanto aparece el
+    siguiente encabezado, aunque el documento siga cargándose.
+    """
+
+    def __init__(
+        self,
+        chunk_token_budget: int = 1000,
+        chunk_overlap_tokens: int = 50,
+        length_function: Callable[[str], int] = approximate_tokens,
+    ):
+        self.chunk_token_budget = chunk_token_budget
+        self.chunk_overlap_tokens = chunk_overlap_tokens
+        self.length_function = length_function
+
+    # --- Detección de estructura ---
+    def _heading_level(self, line: str, numbered_depth: int) -> Optional[Tuple[int, str]]:
+        """Retorna (nivel, título) si la línea es un encabezado; el nivel 0 corresponde a un anexo."""
+        stripped = line.strip()
+        if ANNEX_RE.match(stripped) and len(stripped) <= 120:
+            return 0, stripped
+        match = _match_numbered_heading(stripped)
+        if match and not _is_table_row(stripped):
+            return match.group(1).count(".") + 1, stripped
+        if _is_uppercase_heading(stripped):
+            return numbered_depth + 1, stripped
+        return None
+
+    def lazy_split(self, documents: Iterable[Document]) -> Iterator[Document]:
+        path: List[Tuple[int, str]] = []
+        lines: List[str] = []
+        section_metadata: dict = {}
+        numbered_depth = 0
+
+        def flush() -> Iterator[Document]:
+            text = "\n".join(lines).strip()
+            if text:
+                heading_path = " > ".join(title for _, title in path)
+                yield from self._emit_section(text, {**section_metadata, "heading_path": heading_path})
+            lines.clear()
+
+        def only_headings() -> bool:
+            # Un encabezado sin cuerpo ("3. EVALUACIÓN" seguido de "3.1 ...") se une a la sección siguiente
+            return bool(lines) and all(
+                not line.strip() or self._heading_level(line, numbered_depth) is not None for line in lines
+            )
+
+        for document in documents:
+            if not section_metadata:
+                section_metadata = dict(document.metadata)
+            for line in document.page_content.splitlines():
+                heading = self._heading_level(line, numbered_depth)
+                if heading is None:
+                    lines.append(line)
+                    continue
+                level, title = heading
+                if level == 0 or not only_headings():
+                    yield from flush()
+                    section_metadata = dict(document.metadata)
+                if level == 0:
+                    path, numbered_depth = [], 0
+                elif _match_numbered_heading(title):
+                    numbered_depth = level
+                path = [(lvl, t) for lvl, t in path if lvl < level] + [(level, title)]
+                lines.append(line)
+        yield from flush()
+
+    def split_documents(self, documents: Iterable[Document]) -> List[Document]:
+        return list(self.lazy_split(documents))
+
+    # --- Subdivisión de secciones largas ---
+    def _blocks(self, text: str) -> List[Tuple[str, List[str]]]:
+        """Agrupa las líneas en bloques ("text" o "table") sin separar filas de una tabla."""
+        blocks: List[Tuple[str, List[str]]] = []
+        for line in text.splitlines():
+            kind = "table" if _is_table_row(line) else "text"
+            if blocks and blocks[-1][0] == kind and (kind == "table" or line.strip()):
+                blocks[-1][1].append(line)
+            elif line.strip():
+                blocks.append((kind, [line]))
+        return blocks
+
+    def _emit_section(self, text: str, metadata: dict) -> Iterator[Document]:
+        if self.length_function(text) <= self.chunk_token_budget:
+            yield Document(page_content=text, metadata=metadata)
+            return
+
+        # El título se separa del cuerpo y se repite al inicio de cada parte
+        title, _, body = text.partition("\n")
+        budget = self.chunk_token_budget - self.length_function(title) - 1
+        parts: List[str] = []
+        current: List[str] = []
+
+        def close() -> None:
+            if current:
+                parts.append("\n".join(current))
+                current.clear()
+
+        for kind, block_lines in self._blocks(body):
+            block = "\n".join(block_lines)
+            if self.length_function("\n".join(current + [block])) <= budget:
+                current.append(block)
+                continue
+            close()
+            if self.length_function(block) <= budget:
+                current.append(block)
+            elif kind == "table" and self.length_function(block_lines[0]) <= budget:
+                # Tabla más grande que el presupuesto: se parte por filas repitiendo el encabezado
+                header, rows = block_lines[0], block_lines[1:]
+                for row in rows:
+                    if self.length_function(f"{header}\n{row}") > budget:
+                        # Fila que ni sola cabe con el encabezado: corte recursivo de la fila
+                        close()
+                        parts.extend(self._split_oversized(row, budget))
+                        continue
+                    if current and self.length_function("\n".join(current + [row])) > budget:
+                        close()
+                    if not current:
+                        current.append(header)
+                    current.append(row)
+                close()
+            else:
+                # Párrafo (o encabezado de tabla) que por sí solo supera el presupuesto
+                parts.extend(self._split_oversized(block, budget))
+        close()
+
+        for index, part in enumerate(parts):
+            yield Document(page_content=f"{title}\n{part}", metadata={**metadata, "section_part": index})
+
+    def _split_oversized(self, text: str, budget: int) -> List[str]:
+        """Corte recursivo por caracteres de un bloque que no cabe en `budget` tokens."""
+        fallback_splitter = RecursiveCharacterTextSplitter(
+            chunk_size=budget * CHARS_PER_TOKEN,
+            chunk_overlap=self.chunk_overlap_tokens * CHARS_PER_TOKEN,
+            separators=["\n\n", "\n", ". ", " ", ""],
+        )
+        return fallback_splitter.split_text(text)
@@ -0,0 +1,140 @@
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+from langchain_core.vectorstores import VectorStore
+
+from src.config.configuration import VECTORSTORE_CACHE_MAX_BYTES
+
+logger = logging.getLogger(__name__)
+
+CacheKey = Tuple[str, float, int]
+
+
+def estimate_vectorstore_bytes(vectorstore: VectorStore) -> int:
+    """Estimación de la memoria ocupada por un vector store cargado."""
+    if hasattr(vectorstore, "memory_usage"):
+        return vectorstore.memory_usage()
+    embeddings_np = getattr(vectorstore, "_embeddings_np", None)
+    texts = getattr(vectorstore, "_texts", [])
+    # SKLearnVectorStore conserva la matriz NumPy y además la lista original de vectores
+    matrix_bytes = 2 * embeddings_np.nbytes if embeddings_np is not None else 0
+    return matrix_bytes + sum(len(text) for text in texts)
+
+
+class VectorStoreCache:
+    """
+    Caché LRU en proceso de vector stores cargados desde disco.
+
+    La llave es (ruta, mtime, tamaño) del archivo persistido, por lo que un store
+    reescrito en disco se recarga automáticamente. El total estimado en memoria se
+    limita a `max_bytes`; al superarlo se descartan los stores menos usados.
+    Cargas concurrentes de una misma ruta comparten una sola lectura.
+    """
+
+    def __init__(self, max_bytes: int = VECTORSTORE_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[CacheKey, Tuple[VectorStore, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._loading: Dict[CacheKey, threading.Lock] = {}
+
+    @staticmethod
+    def make_key(persist_path: str) -> CacheKey:
+        if os.path.isdir(persist_path):
+            # Stores en formato directorio: se agregan mtime y tamaño de sus archivos
+            stats = [entry.stat() for entry in os.scandir(persist_path) if entry.is_file()]
+            return (
+                os.path.abspath(persist_path),
+                max((stat.st_mtime for stat in stats), default=0.0),
+                sum(stat.st_size for stat in stats),
+            )
+        stat = os.stat(persist_path)
+        return (os.path.abspath(persist_path), stat.st_mtime, stat.st_size)
+
+    def get(self, persist_path: str, loader: Callable[[str], VectorStore]) -> VectorStore:
+        """
+        Retorna el vector store de `persist_path`, cargándolo con `loader` si no está en caché.
+        Lanza FileNotFoundError si `persist_path` no existe.
+        """
+        key = self.make_key(persist_path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            load_lock = self._loading.setdefault(key, threading.Lock())
+
+        with load_lock:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[0]
+                self.misses += 1
+            try:
+                vectorstore = loader(persist_path)
+                size = estimate_vectorstore_bytes(vectorstore)
+                with self._lock:
+                    self._drop_stale(key[0])
+                    self._entries[key] = (vectorstore, size)
+                    self._bytes += size
+                    self._evict_if_needed()
+            finally:
+                with self._lock:
+                    self._loading.pop(key, None)
+        return vectorstore
+
+    def _drop_stale(self, path: str) -> None:
+        """Descarta versiones anteriores (otro mtime/tamaño) de la misma ruta."""
+        for key in [key for key in self._entries if key[0] == path]:
+            self._bytes -= self._entries.pop(key)[1]
+
+    def _evict_if_needed(self) -> None:
+        # Siempre se conserva al menos el store recién cargado
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            key, (_, size) = self._entries.popitem(last=False)
+            self._bytes -= size
+            self.evictions += 1
+            logger.info(f"Vector store cache: expulsado {key[0]}")
+
+    def invalidate(self, persist_path: Optional[str] = None) -> None:
+        with self._lock:
+            if persist_path is None:
+                self._entries.clear()
+                self._bytes = 0
+            else:
+                self._drop_stale(os.path.abspath(persist_path))
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+_vectorstore_cache: Optional[VectorStoreCache] = None
+_vectorstore_cache_lock = threading.Lock()
+
+
+def get_vectorstore_cache() -> VectorStoreCache:
+    """Retorna la caché de vector stores cargados compartida por todo el proceso."""
+    global _vectorstore_cache
+    with _vectorstore_cache_lock:
+        if _vectorstore_cache is None:
+            _vectorstore_cache = VectorStoreCache()
+        return _vectorstore_cache
@@ -0,0 +1,128 @@
+import os
+import threading
+import uuid
+from typing import Callable, List, Optional
+
+from langchain_community.vectorstores import SKLearnVectorStore
+from langchain_community.vectorstores.sklearn import ParquetSerializer
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+from src.config.configuration import LEXICAL_INDEX_ENABLED, VECTORSTORE_ANN, VECTORSTORE_DTYPE, VECTORSTORE_FORMAT
+from src.databases.lexical_index import build_lexical_index
+from src.databases.npy_vectorstore import NPY_STORE_SUFFIX, NpyVectorStore, is_npy_store
+from src.llms.llm import create_embedding_model
+
+
+def vectorstore_suffix(store_format: str = VECTORSTORE_FORMAT) -> str:
+    """Extensión de la ruta de persistencia para el formato indicado."""
+    if store_format == "npy":
+        return NPY_STORE_SUFFIX
+    if store_format == "parquet":
+        return ".parquet"
+    raise ValueError(f"Unsupported vectorstore format: {store_format}")
+
+
+def write_vectorstore(
+    persist_path: str,
+    texts: List[str],
+    vectors: List[List[float]],
+    metadatas: Optional[List[dict]] = None,
+    store_format: str = VECTORSTORE_FORMAT,
+    dtype: str = VECTORSTORE_DTYPE,
+    ann: str = VECTORSTORE_ANN,
+) -> str:
+    """
+    Persiste chunks cuyos embeddings ya fueron calculados (p. ej. por la ingesta en
+    streaming), sin volver a llamar al modelo de embeddings. `ann` solo aplica al formato npy.
+    """
+    metadatas = metadatas or [{} for _ in texts]
+    if store_format == "npy":
+        NpyVectorStore.write(persist_path, texts, vectors, metadatas=metadatas, dtype=dtype, ann=ann)
+    elif store_format == "parquet":
+        # Mismo esquema que SKLearnVectorStore.persist
+        tmp_path = f"{persist_path}.{uuid.uuid4().hex}.tmp"
+        ParquetSerializer(persist_path=tmp_path).save(
+            {
+                "ids": [str(uuid.uuid4()) for _ in texts],
+                "texts": list(texts),
+                "metadatas": list(metadatas),
+                "embeddings": [list(vector) for vector in vectors],
+            }
+        )
+        os.replace(tmp_path, persist_path)
+    else:
+        raise ValueError(f"Unsupported vectorstore format: {store_format}")
+    if LEXICAL_INDEX_ENABLED:
+        build_lexical_index(persist_path, list(texts))
+    return persist_path
+
+
+def build_vectorstore(
+    splits: List[Document],
+    embedding: Embeddings,
+    persist_path: str,
+    store_format: str = VECTORSTORE_FORMAT,
+    dtype: str = VECTORSTORE_DTYPE,
+) -> VectorStore:
+    """
+    Embebe los chunks y persiste el vector store en `persist_path` con el formato indicado.
+    La escritura es atómica: se usa una ruta temporal que se renombra al final.
+    """
+    if store_format == "npy":
+        return NpyVectorStore.from_documents(splits, embedding, persist_path=persist_path, dtype=dtype)
+    if store_format == "parquet":
+        tmp_path = f"{persist_path}.{uuid.uuid4().hex}.tmp"
+        vectorstore = SKLearnVectorStore.from_documents(
+            documents=splits,
+            embedding=embedding,
+            persist_path=tmp_path,
+            serializer="parquet",
+        )
+        vectorstore.persist()
+        os.replace(tmp_path, persist_path)
+        return vectorstore
+    raise ValueError(f"Unsupported vectorstore format: {store_format}")
+
+
+class LazyEmbeddings(Embeddings):
+    """
+    Modelo de embeddings que se construye en la primera llamada. Los stores se cargan con
+    él para que las búsquedas que no embeben nada (RETRIEVAL_MODE="lexical") no creen el
+    cliente de OpenAI ni requieran su API key.
+    """
+
+    def __init__(self, factory: Callable[[], Embeddings]):
+        self._factory = factory
+        self._model: Optional[Embeddings] = None
+        self._lock = threading.Lock()
+
+    @property
+    def model(self) -> Embeddings:
+        with self._lock:
+            if self._model is None:
+                self._model = self._factory()
+            return self._model
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.model.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.model.embed_query(text)
+
+
+def load_vectorstore(persist_path: str, embedding: Optional[Embeddings] = None) -> VectorStore:
+    """
+    Carga desde disco el vector store de `persist_path`, detectando su formato. Sin
+    `embedding`, el modelo por defecto se crea solo cuando se embebe la primera consulta.
+    """
+    if embedding is None:
+        embedding = LazyEmbeddings(lambda: create_embedding_model(model="text-embedding-3-small"))
+    if is_npy_store(persist_path):
+        return NpyVectorStore(embedding=embedding, persist_path=persist_path)
+    return SKLearnVectorStore(
+        embedding=embedding,
+        persist_path=persist_path,
+        serializer="parquet",
+    )
@@ -0,0 +1,102 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from src.config.configuration import VECTORSTORE_DIR, VECTORSTORE_REGISTRY_PATH
+
+
+class VectorStoreRegistry:
+    """
+    Registro de vector stores ya construidos, indexado por el hash del contenido del
+    documento fuente más los parámetros de ingesta (splitter, modelo de embeddings).
+
+    Permite que una segunda ejecución sobre la misma convocatoria reutilice el
+    `persist_path` existente en lugar de cargar, dividir y embeber de nuevo el documento.
+    """
+
+    def __init__(self, registry_path: Path | str = VECTORSTORE_REGISTRY_PATH, store_dir: Path | str = VECTORSTORE_DIR / "shared"):
+        self.registry_path = Path(registry_path)
+        self.store_dir = Path(store_dir)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def file_hash(file_path: str) -> str:
+        """Calcula el sha256 del contenido del archivo leyendo por bloques."""
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def make_key(self, file_path: str, **params: Any) -> str:
+        """
+        Construye la llave del registro a partir del hash del documento y los
+        parámetros de ingesta que afectan el contenido del vector store.
+        """
+        payload = json.dumps({"document": self.file_hash(file_path), **params}, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def path_for(self, key: str, prefix: str = "vectorstore", suffix: str = ".parquet") -> str:
+        """Ruta (POSIX) determinística donde se persiste el vector store de `key`."""
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        return (self.store_dir / f"{prefix}_{key[:24]}{suffix}").as_posix()
+
+    def _read(self) -> Dict[str, Dict[str, Any]]:
+        if not self.registry_path.exists():
+            return {}
+        try:
+            with open(self.registry_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {}
+
+    def _write(self, entries: Dict[str, Dict[str, Any]]) -> None:
+        self.registry_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.registry_path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entries, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.registry_path)
+
+    def lookup(self, key: str) -> Optional[str]:
+        """Retorna el `persist_path` registrado para `key` si aún existe en disco."""
+        with self._lock:
+            entries = self._read()
+            entry = entries.get(key)
+            if not entry:
+                return None
+            if not os.path.exists(entry["persist_path"]):
+                entries.pop(key)
+                self._write(entries)
+                return None
+            return entry["persist_path"]
+
+    def register(self, key: str, persist_path: str, **metadata: Any) -> None:
+        with self._lock:
+            entries = self._read()
+            entries[key] = {"persist_path": persist_path, "created_at": time.time(), **metadata}
+            self._write(entries)
+
+    def remove(self, persist_path: str) -> None:
+        """Elimina del registro las entradas que apuntan a `persist_path`."""
+        with self._lock:
+            entries = self._read()
+            remaining = {key: entry for key, entry in entries.items() if entry["persist_path"] != persist_path}
+            if len(remaining) != len(entries):
+                self._write(remaining)
+
+
+_registry: Optional[VectorStoreRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_vectorstore_registry() -> VectorStoreRegistry:
+    """Retorna el registro de vector stores compartido por todo el proceso."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = VectorStoreRegistry()
+        return _registry
@@ -0,0 +1,352 @@
+import json
+import logging
+import os
+import shutil
+import socket
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from src.config.configuration import (
+    RECORD_REPLAY_MODE,
+    RECORD_REPLAY_NAMESPACE,
+    VECTORSTORE_DIR,
+    VECTORSTORE_DISK_QUOTA_BYTES,
+    VECTORSTORE_LEASE_TTL_SECONDS,
+)
+from src.databases.lexical_index import lexical_index_path
+from src.databases.vectorstore_cache import get_vectorstore_cache
+from src.databases.vectorstore_registry import get_vectorstore_registry
+
+try:
+    import fcntl
+except ImportError:  # Windows: el lock del manifiesto solo cubre los hilos del proceso
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+SHARED_NAMESPACE = "shared"
+# Dueño de las referencias tomadas sin indicar el namespace de una ejecución
+PROCESS_OWNER = f"{socket.gethostname()}-{os.getpid()}"
+
+
+def _path_size(path: Path) -> int:
+    if path.is_dir():
+        return sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
+    # Stores de un solo archivo guardan el índice léxico al lado
+    sidecar = Path(lexical_index_path(str(path)))
+    return sum(p.stat().st_size for p in (path, sidecar) if p.exists())
+
+
+class VectorStoreStorage:
+    """
+    Gestor del almacenamiento en disco de los vector stores.
+
+    - Cada ejecución (thread/run de LangGraph) tiene un namespace propio para sus archivos
+      (p. ej. el manifiesto de colecciones), que se elimina al terminar con `remove_namespace`.
+      Los stores direccionados por contenido viven en el namespace compartido: son inmutables
+      y se publican con un rename atómico, por lo que dos ejecuciones concurrentes pueden
+      construir el mismo store sin pisarse.
+    - Lleva las referencias (leases) de cada store en el manifiesto, por dueño: mientras una
+      ejecución lo está usando ningún proceso puede eliminarlo. Una referencia sin liberar
+      se considera abandonada tras `lease_ttl` segundos.
+    - Mantiene en el manifiesto el tamaño y el último acceso de cada store y, cuando el total
+      supera la cuota de disco, expulsa los stores no referenciados menos usados (LRU).
+
+    El manifiesto se lee y escribe bajo un lock de archivo (`flock`), de modo que varios
+    procesos del servidor comparten las referencias.
+    """
+
+    def __init__(
+        self,
+        root: Path | str = VECTORSTORE_DIR,
+        quota_bytes: int = VECTORSTORE_DISK_QUOTA_BYTES,
+        lease_ttl: int = VECTORSTORE_LEASE_TTL_SECONDS,
+    ):
+        self.root = Path(root)
+        self.quota_bytes = quota_bytes
+        self.lease_ttl = lease_ttl
+        self.manifest_path = self.root / "manifest.json"
+        self.lock_path = self.root / "manifest.lock"
+        self._lock = threading.RLock()
+        self._lock_depth = 0
+        self._pending_access: Dict[str, float] = {}
+
+    @staticmethod
+    def namespace_from_config(config: Optional[dict]) -> str:
+        """
+        Deriva el namespace de almacenamiento a partir del thread/run del RunnableConfig.
+        Con grabación/reproducción activa el namespace es fijo (RECORD_REPLAY_NAMESPACE).
+        """
+        if RECORD_REPLAY_MODE != "off":
+            return RECORD_REPLAY_NAMESPACE
+        config = config or {}
+        configurable = config.get("configurable") or {}
+        namespace = configurable.get("thread_id") or config.get("run_id") or (config.get("metadata") or {}).get("run_id")
+        if not namespace:
+            namespace = uuid.uuid4().hex
+        return "".join(c if c.isalnum() or c in "-_" else "_" for c in str(namespace))
+
+    def namespace_of(self, path: Optional[str]) -> Optional[str]:
+        """Namespace al que pertenece `path` (un archivo dentro de la raíz), o None."""
+        if not path:
+            return None
+        try:
+            relative = Path(path).resolve().relative_to(self.root.resolve())
+        except ValueError:
+            return None
+        return relative.parts[0] if len(relative.parts) > 1 else None
+
+    def allocate(self, namespace: str, name: str) -> str:
+        """Reserva una ruta (POSIX) para un nuevo store dentro de `namespace`."""
+        directory = self.root / namespace
+        directory.mkdir(parents=True, exist_ok=True)
+        return (directory / name).as_posix()
+
+    # --- Manifiesto ---
+    @contextmanager
+    def _locked(self):
+        """Exclusión entre hilos (RLock) y entre procesos (flock sobre `manifest.lock`)."""
+        with self._lock:
+            if fcntl is None or self._lock_depth:
+                self._lock_depth += 1
+                try:
+                    yield
+                finally:
+                    self._lock_depth -= 1
+                return
+            self.root.mkdir(parents=True, exist_ok=True)
+            with open(self.lock_path, "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                self._lock_depth += 1
+                try:
+                    yield
+                finally:
+                    self._lock_depth -= 1
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read_manifest(self) -> Dict[str, Dict[str, Any]]:
+        if not self.manifest_path.exists():
+            return {}
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {}
+
+    def _write_manifest(self, manifest: Dict[str, Dict[str, Any]]) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.manifest_path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+    def _flush_access(self, manifest: Dict[str, Dict[str, Any]]) -> None:
+        for path, accessed_at in self._pending_access.items():
+            if path in manifest:
+                manifest[path]["last_access"] = max(manifest[path]["last_access"], accessed_at)
+        self._pending_access.clear()
+
+    def _entry(self, manifest: Dict[str, Dict[str, Any]], persist_path: str, now: float) -> Dict[str, Any]:
+        entry = manifest.get(persist_path)
+        if entry is None:
+            # Store recién construido que aún no pasa por `register`
+            entry = manifest[persist_path] = {
+                "namespace": self.namespace_of(persist_path) or SHARED_NAMESPACE,
+                "size": _path_size(Path(persist_path)),
+                "created_at": now,
+                "last_access": now,
+            }
+        return entry
+
+    def register(self, persist_path: str, namespace: str) -> None:
+        """Agrega un store recién persistido al manifiesto y aplica la cuota de disco."""
+        now = time.time()
+        with self._locked():
+            manifest = self._read_manifest()
+            manifest[persist_path] = {
+                "namespace": namespace,
+                "size": _path_size(Path(persist_path)),
+                "created_at": now,
+                "last_access": now,
+                # Referencias tomadas antes de registrar (el constructor adquiere primero)
+                "leases": manifest.get(persist_path, {}).get("leases", {}),
+            }
+            self._write_manifest(manifest)
+        self.collect_garbage()
+
+    # --- Referencias ---
+    def acquire(self, persist_path: str, count: int = 1, owner: Optional[str] = None) -> bool:
+        """
+        Registra `count` referencias de `owner` (namespace de la ejecución; por defecto el
+        proceso) sobre el store. Retorna False si el store ya no existe en disco (p. ej. fue
+        expulsado), en cuyo caso debe reconstruirse.
+        """
+        now = time.time()
+        with self._locked():
+            if not os.path.exists(persist_path):
+                return False
+            if count <= 0:
+                self._pending_access[persist_path] = now
+                return True
+            manifest = self._read_manifest()
+            self._flush_access(manifest)
+            entry = self._entry(manifest, persist_path, now)
+            lease = entry.setdefault("leases", {}).setdefault(owner or PROCESS_OWNER, {"count": 0})
+            lease["count"] += count
+            lease["at"] = now
+            entry["last_access"] = now
+            self._write_manifest(manifest)
+            return True
+
+    def release(self, persist_path: str, count: int = 1, owner: Optional[str] = None) -> None:
+        """Libera `count` referencias de `owner` sobre el store."""
+        now = time.time()
+        with self._locked():
+            manifest = self._read_manifest()
+            self._flush_access(manifest)
+            entry = manifest.get(persist_path)
+            if entry is not None:
+                leases = entry.get("leases", {})
+                lease = leases.get(owner or PROCESS_OWNER)
+                if lease is not None:
+                    lease["count"] -= count
+                    if lease["count"] <= 0:
+                        leases.pop(owner or PROCESS_OWNER)
+                entry["last_access"] = now
+            self._write_manifest(manifest)
+
+    def touch(self, persist_path: str) -> None:
+        """Marca un acceso de lectura; se persiste en el manifiesto en la siguiente escritura."""
+        with self._lock:
+            self._pending_access[persist_path] = time.time()
+
+    def _live_leases(self, entry: Dict[str, Any], now: float) -> Dict[str, Dict[str, Any]]:
+        return {
+            owner: lease
+            for owner, lease in entry.get("leases", {}).items()
+            if lease["count"] > 0 and now - lease["at"] < self.lease_ttl
+        }
+
+    def is_referenced(self, persist_path: str) -> bool:
+        with self._locked():
+            entry = self._read_manifest().get(persist_path)
+        return entry is not None and bool(self._live_leases(entry, time.time()))
+
+    # --- Namespaces de ejecución ---
+    def _drop_namespace(self, manifest: Dict[str, Dict[str, Any]], namespace: str) -> List[str]:
+        """Libera las referencias de `namespace`, borra su directorio y retorna los stores que contenía."""
+        removed = []
+        for path, entry in list(manifest.items()):
+            entry.get("leases", {}).pop(namespace, None)
+            if self.namespace_of(path) == namespace:
+                manifest.pop(path)
+                removed.append(path)
+        shutil.rmtree(self.root / namespace, ignore_errors=True)
+        return removed
+
+    def remove_namespace(self, namespace: Optional[str]) -> None:
+        """
+        Cierra el namespace de una ejecución terminada: libera todas sus referencias y
+        elimina su directorio. El namespace compartido nunca se elimina.
+        """
+        if not namespace or namespace == SHARED_NAMESPACE:
+            return
+        with self._locked():
+            manifest = self._read_manifest()
+            self._flush_access(manifest)
+            removed = self._drop_namespace(manifest, namespace)
+            self._write_manifest(manifest)
+        self._forget(removed)
+
+    def _stale_namespaces(self, manifest: Dict[str, Dict[str, Any]], now: float) -> List[str]:
+        """Namespaces de ejecuciones interrumpidas: sin referencias vigentes ni cambios en `lease_ttl`."""
+        if not self.root.is_dir():
+            return []
+        owners = {owner for entry in manifest.values() for owner in self._live_leases(entry, now)}
+        stale = []
+        for directory in self.root.iterdir():
+            if not directory.is_dir() or directory.name == SHARED_NAMESPACE or directory.name in owners:
+                continue
+            modified = max((p.stat().st_mtime for p in directory.rglob("*")), default=directory.stat().st_mtime)
+            if now - modified >= self.lease_ttl:
+                stale.append(directory.name)
+        return stale
+
+    # --- Recolección de basura ---
+    def _delete(self, persist_path: str) -> None:
+        path = Path(persist_path)
+        if path.is_dir():
+            shutil.rmtree(path, ignore_errors=True)
+        elif path.exists():
+            path.unlink()
+            Path(lexical_index_path(persist_path)).unlink(missing_ok=True)
+
+    def _forget(self, paths: List[str]) -> None:
+        """Descarta del registro y de la caché en memoria los stores eliminados."""
+        registry = get_vectorstore_registry()
+        for path in paths:
+            registry.remove(path)
+            get_vectorstore_cache().invalidate(path)
+            get_vectorstore_cache().invalidate(lexical_index_path(path))
+
+    def collect_garbage(self) -> List[str]:
+        """
+        Elimina los namespaces abandonados y expulsa stores no referenciados, del menos al
+        más recientemente usado, hasta que el total quede por debajo de la cuota. Retorna
+        las rutas de los stores eliminados.
+        """
+        evicted = []
+        now = time.time()
+        with self._locked():
+            manifest = self._read_manifest()
+            self._flush_access(manifest)
+            for namespace in self._stale_namespaces(manifest, now):
+                evicted.extend(self._drop_namespace(manifest, namespace))
+            # Stores borrados por fuera del gestor
+            manifest = {path: entry for path, entry in manifest.items() if os.path.exists(path)}
+            total_bytes = sum(entry["size"] for entry in manifest.values())
+            if total_bytes > self.quota_bytes:
+                candidates = sorted(
+                    (path for path, entry in manifest.items() if not self._live_leases(entry, now)),
+                    key=lambda path: manifest[path]["last_access"],
+                )
+                for path in candidates:
+                    if total_bytes <= self.quota_bytes:
+                        break
+                    self._delete(path)
+                    total_bytes -= manifest.pop(path)["size"]
+                    evicted.append(path)
+            self._write_manifest(manifest)
+
+        self._forget(evicted)
+        if evicted:
+            logger.info(f"Vector store GC: {len(evicted)} stores eliminados")
+        return evicted
+
+    def stats(self) -> dict:
+        now = time.time()
+        with self._locked():
+            manifest = self._read_manifest()
+        return {
+            "stores": len(manifest),
+            "bytes": sum(entry["size"] for entry in manifest.values()),
+            "quota_bytes": self.quota_bytes,
+            "referenced": sum(1 for entry in manifest.values() if self._live_leases(entry, now)),
+        }
+
+
+_storage: Optional[VectorStoreStorage] = None
+_storage_lock = threading.Lock()
+
+
+def get_vectorstore_storage() -> VectorStoreStorage:
+    """Retorna el gestor de almacenamiento de vector stores compartido por todo el proceso."""
+    global _storage
+    with _storage_lock:
+        if _storage is None:
+            _storage = VectorStoreStorage()
+        return _storage
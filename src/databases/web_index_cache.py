@@ -0,0 +1,319 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_community.vectorstores.utils import maximal_marginal_relevance
+from langchain_core.documents import Document
+
+from src.config.configuration import (
+    WEB_INDEX_CACHE_DIR,
+    WEB_INDEX_CACHE_DISK_MAX_BYTES,
+    WEB_INDEX_CACHE_MAX_BYTES,
+    WEB_INDEX_CACHE_PERSIST,
+)
+from src.databases.http_cache import normalize_url
+
+logger = logging.getLogger(__name__)
+
+IndexKey = Tuple[str, str, str]
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def hash_content(content: str) -> str:
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class URLIndex:
+    """Chunks de una página web y su matriz de embeddings normalizada (float32, una fila por chunk)."""
+    url: str
+    content_hash: str
+    model: str
+    documents: List[Document]
+    matrix: np.ndarray
+
+    @property
+    def key(self) -> IndexKey:
+        return (normalize_url(self.url), self.content_hash, self.model)
+
+    def memory_usage(self) -> int:
+        return self.matrix.nbytes + sum(len(doc.page_content) for doc in self.documents)
+
+    @classmethod
+    def build(cls, url: str, content_hash: str, model: str, documents: List[Document], vectors: Sequence[Sequence[float]]) -> "URLIndex":
+        if not documents:
+            return cls(url, content_hash, model, [], np.zeros((0, 0), dtype=np.float32))
+        matrix = _normalize(np.asarray(vectors, dtype=np.float32))
+        return cls(url, content_hash, model, documents, matrix)
+
+
+def mmr_search(
+    indexes: Sequence[URLIndex],
+    query_vector: Sequence[float],
+    k: int = 4,
+    fetch_k: int = 20,
+    lambda_mult: float = 0.5,
+) -> List[Document]:
+    """MMR sobre los chunks de uno o varios índices, como si fueran un único vector store."""
+    indexes = [index for index in indexes if len(index.documents)]
+    if not indexes:
+        return []
+    documents = [doc for index in indexes for doc in index.documents]
+    matrix = indexes[0].matrix if len(indexes) == 1 else np.vstack([index.matrix for index in indexes])
+    query = _normalize(np.asarray(query_vector, dtype=np.float32))
+    scores = matrix @ query
+    fetch_k = min(fetch_k, len(documents))
+    candidates = np.argpartition(-scores, fetch_k - 1)[:fetch_k]
+    candidates = candidates[np.argsort(-scores[candidates])]
+    selected = maximal_marginal_relevance(query, matrix[candidates], k=min(k, fetch_k), lambda_mult=lambda_mult)
+    return [documents[int(candidates[i])] for i in selected]
+
+
+class URLIndexCache:
+    """
+    Caché LRU en proceso de índices por URL (chunks + matriz de embeddings) para
+    `web_rag_pipeline_tool` y `web_rag_multi_url_tool`.
+
+    La llave es (URL normalizada, hash del contenido, modelo de embeddings): una página
+    que cambió se vuelve a indexar y la misma página con otra consulta solo paga el
+    embedding de la consulta y una búsqueda local. El total en memoria se limita a
+    `max_bytes`. Construcciones concurrentes de una misma llave comparten una sola
+    pasada de embeddings. Con `persist_dir` los índices también se guardan en disco
+    (un `.npz` por llave) y sobreviven al proceso; el total en disco se limita a
+    `disk_max_bytes` borrando los archivos menos usados.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = WEB_INDEX_CACHE_MAX_BYTES,
+        persist_dir: Optional[Path | str] = None,
+        disk_max_bytes: int = WEB_INDEX_CACHE_DISK_MAX_BYTES,
+    ):
+        self.max_bytes = max_bytes
+        self.disk_max_bytes = disk_max_bytes
+        self.persist_dir = Path(persist_dir) if persist_dir is not None else None
+        if self.persist_dir is not None:
+            self.persist_dir.mkdir(parents=True, exist_ok=True)
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_evictions = 0
+        self._entries: "OrderedDict[IndexKey, URLIndex]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._loading: Dict[IndexKey, threading.Lock] = {}
+
+    @staticmethod
+    def make_key(url: str, content_hash: str, model: str) -> IndexKey:
+        return (normalize_url(url), content_hash, model)
+
+    def _disk_path(self, key: IndexKey) -> Path:
+        digest = hashlib.sha256(json.dumps(key).encode("utf-8")).hexdigest()
+        return self.persist_dir / f"{digest}.npz"
+
+    def _load(self, key: IndexKey) -> Optional[URLIndex]:
+        if self.persist_dir is None:
+            return None
+        path = self._disk_path(key)
+        if not path.exists():
+            return None
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                header = json.loads(str(data["header"]))
+                matrix = np.asarray(data["matrix"], dtype=np.float32)
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Web index cache: índice ilegible {path}: {e}")
+            return None
+        # El mtime hace de último acceso para la cuota de disco
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        documents = [Document(page_content=text, metadata=metadata) for text, metadata in header["chunks"]]
+        return URLIndex(header["url"], key[1], key[2], documents, matrix)
+
+    def _save(self, index: URLIndex) -> None:
+        if self.persist_dir is None:
+            return
+        path = self._disk_path(index.key)
+        header = {
+            "url": index.url,
+            "chunks": [(doc.page_content, doc.metadata) for doc in index.documents],
+        }
+        # Escritura atómica: ningún lector observa un archivo a medio escribir
+        tmp_path = path.with_name(f"{path.stem}.{uuid.uuid4().hex}.tmp.npz")
+        np.savez(tmp_path, header=np.asarray(json.dumps(header, ensure_ascii=False, default=str)), matrix=index.matrix)
+        os.replace(tmp_path, path)
+        self._enforce_disk_quota()
+
+    def _enforce_disk_quota(self) -> None:
+        """Borra los índices persistidos menos usados hasta que el total quede bajo `disk_max_bytes`."""
+        files = []
+        for path in self.persist_dir.glob("*.npz"):
+            if path.name.endswith(".tmp.npz"):
+                continue
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        total_bytes = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total_bytes <= self.disk_max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total_bytes -= size
+            with self._lock:
+                self.disk_evictions += 1
+
+    def get(self, url: str, content_hash: str, model: str) -> Optional[URLIndex]:
+        """Índice de la página en memoria (o en disco si se persiste), o None."""
+        key = self.make_key(url, content_hash, model)
+        with self._lock:
+            index = self._entries.get(key)
+            if index is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return index
+        index = self._load(key)
+        with self._lock:
+            if index is None:
+                self.misses += 1
+            else:
+                self.disk_hits += 1
+                self._insert(index)
+        return index
+
+    def put(self, index: URLIndex) -> None:
+        self._save(index)
+        with self._lock:
+            self._insert(index)
+
+    def get_or_build(self, url: str, content_hash: str, model: str, build: Callable[[], URLIndex]) -> URLIndex:
+        """Índice de la página desde la caché; si no está, lo construye con `build` una sola vez."""
+        index = self.get(url, content_hash, model)
+        if index is not None:
+            return index
+        key = self.make_key(url, content_hash, model)
+        with self._lock:
+            load_lock = self._loading.setdefault(key, threading.Lock())
+
+        with load_lock:
+            with self._lock:
+                index = self._entries.get(key)
+                if index is not None:
+                    # Otra rama indexó la misma página mientras esta esperaba
+                    self._entries.move_to_end(key)
+                    return index
+            try:
+                index = build()
+                self.put(index)
+            finally:
+                with self._lock:
+                    self._loading.pop(key, None)
+        return index
+
+    def get_or_build_many(
+        self,
+        keys: Sequence[Tuple[str, str, str]],
+        build: Callable[[List[int]], List[URLIndex]],
+    ) -> List[URLIndex]:
+        """
+        Variante de `get_or_build` para varias páginas `(url, hash, modelo)`. Las que no
+        están en la caché y ninguna otra rama está indexando se construyen juntas con
+        `build(posiciones)` (una sola pasada de embeddings); las que otra rama está
+        indexando se esperan en lugar de embeberse de nuevo.
+        """
+        results: Dict[int, URLIndex] = {}
+        claimed: List[Tuple[int, IndexKey, threading.Lock]] = []
+        in_progress = []
+        for position, (url, content_hash, model) in enumerate(keys):
+            index = self.get(url, content_hash, model)
+            if index is not None:
+                results[position] = index
+                continue
+            key = self.make_key(url, content_hash, model)
+            with self._lock:
+                load_lock = self._loading.setdefault(key, threading.Lock())
+            if load_lock.acquire(blocking=False):
+                claimed.append((position, key, load_lock))
+            else:
+                in_progress.append(position)
+
+        try:
+            if claimed:
+                for (position, _, _), index in zip(claimed, build([position for position, _, _ in claimed])):
+                    self.put(index)
+                    results[position] = index
+        finally:
+            for _, key, load_lock in claimed:
+                with self._lock:
+                    self._loading.pop(key, None)
+                load_lock.release()
+
+        # Se esperan después de soltar las llaves propias, para no bloquearse entre ramas
+        for position in in_progress:
+            url, content_hash, model = keys[position]
+            results[position] = self.get_or_build(url, content_hash, model, lambda position=position: build([position])[0])
+        return [results[position] for position in range(len(keys))]
+
+    def _insert(self, index: URLIndex) -> None:
+        key = index.key
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._bytes -= previous.memory_usage()
+        self._entries[key] = index
+        self._bytes += index.memory_usage()
+        # Siempre se conserva al menos el índice recién insertado
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            evicted_key, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.memory_usage()
+            self.evictions += 1
+            logger.info(f"Web index cache: expulsado {evicted_key[0]}")
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "disk_evictions": self.disk_evictions,
+                "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            }
+
+
+_url_index_cache: Optional[URLIndexCache] = None
+_url_index_cache_lock = threading.Lock()
+
+
+def get_url_index_cache() -> URLIndexCache:
+    """Retorna la caché de índices por URL compartida por todo el proceso."""
+    global _url_index_cache
+    with _url_index_cache_lock:
+        if _url_index_cache is None:
+            _url_index_cache = URLIndexCache(persist_dir=WEB_INDEX_CACHE_DIR if WEB_INDEX_CACHE_PERSIST else None)
+        return _url_index_cache
@@ -8,16 +8,9 @@ from langgraph.types import Command
 from typing import Literal
 from pydantic import BaseModel, Field, model_validator
 from typing import List
-from langchain_community.document_loaders import PyPDFLoader, UnstructuredWordDocumentLoader
-from langchain_openai import OpenAIEmbeddings
-from langchain_community.vectorstores import SKLearnVectorStore
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain.schema import Document
-from pathlib import Path
+from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_core.runnables import RunnableConfig
 from langgraph.types import Command
-import os
-import uuid
 
 from src.graph.state import (
     FormuladorCTeIAgent, 
@@ -31,12 +24,16 @@ from src.graph.state import (
     ArbolDeObjetivos,
     Alternativa,
 )
-from src.config.configuration import MultiAgentConfiguration
-from src.llms.llm import create_llm_model
+from src.config.configuration import DEDUP_ENABLED, LEXICAL_INDEX_ENABLED, VECTORSTORE_DTYPE, VECTORSTORE_FORMAT, MultiAgentConfiguration
+from src.llms.llm import create_llm_model, create_embedding_model
+from src.databases.vectorstore_storage import get_vectorstore_storage
+from src.databases.document_collections import get_document_collections
+from src.databases.ingestion import IngestionResult, ingest_document
+from src.databases.loaders import create_document_loader
 from src.prompts.template import apply_prompt_template
-from src.tools.local_research_query_tool import local_research_query_tool
-from src.tools.serper_dev_tool import serper_dev_search_tool
-from src.tools.web_rag_pipeline import web_rag_pipeline_tool
+from src.tools.local_research_query_tool import document_collections_query_tool, local_research_batch_query_tool, local_research_query_tool
+from src.tools.serper_dev_tool import serper_dev_batch_search_tool, serper_dev_search_tool
+from src.tools.web_rag_pipeline import web_rag_multi_url_tool, web_rag_pipeline_tool
 
 class ProblemaIdentificacionOutput(BaseModel):
     problema_central: str
@@ -171,86 +168,87 @@ class AnalyticalCoreState(FormuladorCTeIAgent):
     
 
 class AnalyticalCore:
+    EMBEDDING_MODEL = "text-embedding-3-small"
+
     def __init__(self) -> None:
-        self.tools_problem_identification_agent = [serper_dev_search_tool, web_rag_pipeline_tool, local_research_query_tool]
-        self.tools_stakeholder_analysis_agent = [local_research_query_tool]
-        self.tools_population_analysis_agent = [serper_dev_search_tool, web_rag_pipeline_tool, local_research_query_tool]
+        self.storage = get_vectorstore_storage()
+        self.collections = get_document_collections()
+        self.tools_problem_identification_agent = [serper_dev_search_tool, serper_dev_batch_search_tool, web_rag_pipeline_tool, web_rag_multi_url_tool, local_research_query_tool, local_research_batch_query_tool, document_collections_query_tool]
+        self.tools_stakeholder_analysis_agent = [local_research_query_tool, local_research_batch_query_tool, document_collections_query_tool]
+        self.tools_population_analysis_agent = [serper_dev_search_tool, serper_dev_batch_search_tool, web_rag_pipeline_tool, web_rag_multi_url_tool, local_research_query_tool, local_research_batch_query_tool, document_collections_query_tool]
         self.tools_objective_analysis_agent = []
         self.tools_alternative_analysis_agent = []
 
-    def load_document(self, file_path: str) -> List[Document]:
-        """Loads document content from the given file path."""
-        ext = os.path.splitext(file_path)[1].lower()
-        if ext == ".pdf":
-            loader = PyPDFLoader(file_path=file_path)
-        elif ext == ".docx":
-            loader = UnstructuredWordDocumentLoader(file_path)
-        else:
-            raise ValueError(f"Unsupported file format: {ext}. Please provide a PDF or DOCX file.")
-        
-        docs = loader.load()
-        if not docs:
-            raise ValueError(f"No content could be extracted from {file_path}")
-        
-        return docs
-
-    def split_documents(self, docs):
-        """
-        Divide el texto en chunks para crear embeddings.
-        :param docs: Documentos (chunks).
-        :return: Lista de documentos (chunks).
-        """
-        splitter = RecursiveCharacterTextSplitter(
+    def create_splitter(self) -> RecursiveCharacterTextSplitter:
+        """Splitter usado para dividir los planes de desarrollo en chunks."""
+        return RecursiveCharacterTextSplitter(
             chunk_size=800,
             chunk_overlap=200,
             separators=["\n\n", "\n", " ", ""]
         )
-        return splitter.split_documents(docs)
 
-    def create_vectorstore(self, splits):
+    def ingestion_params(self) -> dict:
+        """Parámetros de ingesta que forman parte de la llave del registro de vector stores."""
+        return {
+            "splitter": "recursive",
+            "chunk_size": 800,
+            "chunk_overlap": 200,
+            "embedding_model": self.EMBEDDING_MODEL,
+            "format": VECTORSTORE_FORMAT,
+            "dtype": VECTORSTORE_DTYPE,
+            "lexical_index": LEXICAL_INDEX_ENABLED,
+            "dedup": DEDUP_ENABLED,
+        }
+
+    def create_vectorstore(self, file_path: str, persist_path: str, agent_configuration: MultiAgentConfiguration) -> IngestionResult:
         """
-        Crea y persiste un vector store a partir de los chunks de la transcripción.
-        :param splits: Lista de chunks.
-        :return: vectorstore y la ruta de persistencia.
+        Carga, divide y embebe el documento en streaming y persiste el vector store.
+        :param file_path: Ruta del documento (PDF o DOCX).
+        :param persist_path: Ruta final del vector store.
+        :param agent_configuration: Configuración con la selección del loader de PDF.
+        :return: Resultado de la ingesta (chunks, páginas y tiempo).
         """
-        embeddings = OpenAIEmbeddings(model="text-embedding-3-small")
-        # Generate a unique filename using UUID
-        unique_filename = f"vectorstore_{uuid.uuid4()}.parquet"
-        # Usar Path para generar el directorio y convertirlo a POSIX (con "/" como separador)
-        persist_path = Path(os.getcwd()) / "temp_uploads" / unique_filename
-        
-        # Ensure the temp_uploads directory exists
-        persist_path.parent.mkdir(parents=True, exist_ok=True)
-        
-        persist_path_str = persist_path.as_posix()  # Se convierte a formato POSIX ("/")
-
-        vectorstore = SKLearnVectorStore.from_documents(
-            documents=splits,
-            embedding=embeddings,
-            persist_path=persist_path_str, # Use the string version of the path
-            serializer="parquet",
+        embeddings = create_embedding_model(model=self.EMBEDDING_MODEL)
+        loader = create_document_loader(
+            file_path,
+            pdf_loader=agent_configuration.pdf_loader,
+            pdf_parallel_workers=agent_configuration.pdf_parallel_workers,
+            pdf_parallel_min_pages=agent_configuration.pdf_parallel_min_pages,
         )
-
-        vectorstore.persist()
-        return vectorstore, persist_path_str
+        return ingest_document(file_path, persist_path, embeddings, self.create_splitter(), loader=loader)
     
-    def RAG_pipeline(self, file_path):
-        documents = self.load_document(file_path)
-        splits = self.split_documents(documents)
-        _, persist_path = self.create_vectorstore(splits)
-        return persist_path
+    def RAG_pipeline(self, file_path, collection: str, manifest_path: str, agent_configuration: MultiAgentConfiguration) -> str:
+        """
+        Indexa el documento como la colección `collection` de la ejecución. Los planes son
+        direccionados por contenido: si el mismo plan ya fue embebido se reutiliza su store.
+        La referencia es del namespace de la ejecución y se libera cuando termina el subgrafo
+        de análisis.
+        """
+        return self.collections.index_document(
+            manifest_path,
+            collection,
+            file_path,
+            self.ingestion_params(),
+            lambda path, persist_path: self.create_vectorstore(path, persist_path, agent_configuration),
+            leases=1,
+            owner=self.storage.namespace_of(manifest_path),
+        )
         
     def plan_desarrollo_vectorstore(self, state: AnalyticalCoreState, config: RunnableConfig) -> Command[Literal["problem_identification"]]:
+        agent_configuration = MultiAgentConfiguration.from_runnable_config(config)
+        manifest_path = state.get("document_collections_path")
+
         plan_desarrollo_nacional = state.get("plan_desarrollo_nacional")
-        persist_path_plan_desarrollo_nacional = self.RAG_pipeline(plan_desarrollo_nacional)
+        persist_path_plan_desarrollo_nacional = self.RAG_pipeline(plan_desarrollo_nacional, "plan_desarrollo_nacional", manifest_path, agent_configuration)
         
         plan_desarrollo_departamental = state.get("plan_desarrollo_departamental")
-        persist_path_plan_desarrollo_departamental = self.RAG_pipeline(plan_desarrollo_departamental)
+        persist_path_plan_desarrollo_departamental = self.RAG_pipeline(plan_desarrollo_departamental, "plan_desarrollo_departamental", manifest_path, agent_configuration)
         
         return Command(
             update={
                 "plan_desarrollo_nacional_vectorstore": persist_path_plan_desarrollo_nacional,
                 "plan_desarrollo_departamental_vectorstore": persist_path_plan_desarrollo_departamental,
+                "document_collections_path": manifest_path,
             },
             goto="problem_identification"
         )
@@ -285,7 +283,7 @@ class AnalyticalCore:
         
         stakeholder_analysis_agent_builder = create_react_agent(
             create_llm_model(model=agent_model),
-            tools=[local_research_query_tool],
+            tools=self.tools_stakeholder_analysis_agent,
             prompt=lambda state: apply_prompt_template("stakeholder_analysis_agent", state),
             response_format=AnalisisParticipantesOutput,
             name="stakeholder_analysis_agent",
@@ -387,8 +385,20 @@ class AnalyticalCore:
         
         invoke_config = config.copy() if config else {}
         invoke_config["recursion_limit"] = 100
-        
-        result = graph.invoke(state, invoke_config)
+
+        # Sin manifiesto de colecciones (TDR no indexado) se crea uno en el namespace de la ejecución
+        manifest_path = state.get("document_collections_path") or self.collections.manifest_path(
+            self.storage.namespace_from_config(config)
+        )
+        state = {**state, "document_collections_path": manifest_path}
+
+        result = {}
+        try:
+            result = graph.invoke(state, invoke_config)
+        finally:
+            # Libera las referencias que tomó la ejecución (TDR, planes y documentos adicionales),
+            # también si el subgrafo falló a mitad de camino, y borra su namespace
+            self.storage.remove_namespace(self.storage.namespace_of(manifest_path))
         
         return Command(
             update = {
@@ -408,6 +418,7 @@ class AnalyticalCore:
                 "arbol_de_objetivos": result.get("arbol_de_objetivos"),
                 "alternativas": result.get("alternativas"),
                 "analisis_tecnico_seleccionada": result.get("analisis_tecnico_seleccionada"),
+                "document_collections_path": result.get("document_collections_path") or state.get("document_collections_path"),
             },
             goto="project_design"
         )
\ No newline at end of file
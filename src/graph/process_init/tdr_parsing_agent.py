@@ -2,13 +2,14 @@ from langchain_core.runnables import RunnableConfig
 from langchain_core.messages import AIMessage
 from langgraph.types import Command
 from langsmith import traceable
-from typing import Literal, Any
+from typing import Literal, Any, Optional
 from src.llms.llm import create_llm_model
 from src.prompts.template import apply_prompt_template
 from src.tools.local_research_query_tool import local_research_query_tool
 from src.config.configuration import MultiAgentConfiguration
 from src.utils.json_utils import repair_json_output
 from src.graph.state import SeccionTDR
+from src.databases.vectorstore_storage import get_vectorstore_storage
 
 from langgraph.prebuilt import create_react_agent
 from langgraph.prebuilt.chat_agent_executor import AgentState
@@ -16,6 +17,7 @@ from langgraph.prebuilt.chat_agent_executor import AgentState
 class TDRParsingAgentState(AgentState):
     seccion_tdr: str
     persist_path: str
+    lease_owner: Optional[str]
 
 class TDRParsingAgent:
     def __init__(self):
@@ -67,4 +69,7 @@ class TDRParsingAgent:
                 },
                 goto="coordinador_general",
             )
-        
\ No newline at end of file
+
+        finally:
+            # Libera la referencia tomada por TDRVectorStore para esta rama del fan-out
+            get_vectorstore_storage().release(state["persist_path"], owner=state.get("lease_owner"))
@@ -1,78 +1,214 @@
+import logging
 import os
-from typing import Literal, List
+from typing import Dict, List, Literal, Optional, Tuple
 from pathlib import Path
 
-from langchain_community.document_loaders import PyPDFLoader, UnstructuredWordDocumentLoader
-from langchain_openai import OpenAIEmbeddings
-from langchain_community.vectorstores import SKLearnVectorStore
+from langchain_core.documents import Document
 from langchain_core.messages import AIMessage
 from langchain_core.runnables import RunnableConfig
 from langgraph.types import Command, Send
 from langsmith import traceable
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain.schema import Document
 
 from src.graph.state import FormuladorCTeIAgent
-from src.config.configuration import SECCIONES_TDR
-from src.prompts.prompt_process_init import USER_PROMPT_TEMPLATE
+from src.config.configuration import DEDUP_ENABLED, LEXICAL_INDEX_ENABLED, SECCIONES_TDR, VECTORSTORE_DTYPE, VECTORSTORE_FORMAT, MultiAgentConfiguration
+from src.prompts.prompt_process_init import PRERETRIEVED_PROMPT_TEMPLATE, USER_PROMPT_TEMPLATE
+from src.llms.llm import create_embedding_model
+from src.databases.document_collections import collection_name_for, get_document_collections
+from src.databases.vectorstore_storage import get_vectorstore_storage
+from src.databases.vectorstore_cache import get_vectorstore_cache
+from src.databases.vectorstore_io import load_vectorstore
+from src.databases.retrieval import batch_similarity_scores, batch_top_k, document_at
+from src.databases.ingestion import IngestionResult, ingest_document
+from src.databases.loaders import create_document_loader
+from src.databases.splitters import StructuralTDRSplitter, approximate_tokens
+
+logger = logging.getLogger(__name__)
 
 class TDRVectorStore:
+    SPLITTER = "structural"
+    CHUNK_TOKEN_BUDGET = 1000
+    CHUNK_OVERLAP_TOKENS = 50
+    EMBEDDING_MODEL = "text-embedding-3-small"
+    PRERETRIEVAL_MAX_TOKENS = 6000
+
     def __init__(self):
-        pass
+        self.storage = get_vectorstore_storage()
+        self.collections = get_document_collections()
+
+    def ingestion_params(self) -> dict:
+        """Parámetros de ingesta que forman parte de la llave del registro de vector stores."""
+        return {
+            "splitter": self.SPLITTER,
+            "chunk_token_budget": self.CHUNK_TOKEN_BUDGET,
+            "chunk_overlap_tokens": self.CHUNK_OVERLAP_TOKENS,
+            "embedding_model": self.EMBEDDING_MODEL,
+            "format": VECTORSTORE_FORMAT,
+            "dtype": VECTORSTORE_DTYPE,
+            "lexical_index": LEXICAL_INDEX_ENABLED,
+            "dedup": DEDUP_ENABLED,
+        }
+
+    def create_splitter(self) -> StructuralTDRSplitter:
+        """
+        Splitter estructural: un chunk por sección del TDR (encabezados numerados, tablas y
+        anexos), subdividido solo cuando la sección supera el presupuesto de tokens.
+        """
+        return StructuralTDRSplitter(
+            chunk_token_budget=self.CHUNK_TOKEN_BUDGET,
+            chunk_overlap_tokens=self.CHUNK_OVERLAP_TOKENS,
+        )
 
     @traceable
-    def load_document(self, file_path: str) -> List[Document]:
-        """Loads document content from the given file path."""
-        ext = os.path.splitext(file_path)[1].lower()
-        if ext == ".pdf":
-            loader = PyPDFLoader(file_path=file_path)
-        elif ext == ".docx":
-            loader = UnstructuredWordDocumentLoader(file_path)
-        else:
-            raise ValueError(f"Unsupported file format: {ext}. Please provide a PDF or DOCX file.")
-        
-        docs = loader.load()
-        if not docs:
-            raise ValueError(f"No content could be extracted from {file_path}")
-        
-        return docs
+    def create_vectorstore(self, file_path: str, persist_path: str, agent_configuration: MultiAgentConfiguration) -> IngestionResult:
+        """
+        Carga, divide y embebe el documento en streaming y persiste el vector store.
+        :param file_path: Ruta del documento TDR (PDF o DOCX).
+        :param persist_path: Ruta final del vector store.
+        :param agent_configuration: Configuración con la selección del loader de PDF.
+        :return: Resultado de la ingesta (chunks, páginas y tiempo).
+        """
+        embeddings = create_embedding_model(model=self.EMBEDDING_MODEL)
+        loader = create_document_loader(
+            file_path,
+            pdf_loader=agent_configuration.pdf_loader,
+            pdf_parallel_workers=agent_configuration.pdf_parallel_workers,
+            pdf_parallel_min_pages=agent_configuration.pdf_parallel_min_pages,
+        )
+        # Un TDR tiene pocos cientos de chunks: la búsqueda exacta es suficiente
+        return ingest_document(file_path, persist_path, embeddings, self.create_splitter(), loader=loader, ann="exact")
 
     @traceable
-    def split_documents(self, docs):
+    def get_or_create_vectorstore(self, tdr_file_path: str, agent_configuration: MultiAgentConfiguration, leases: int = 1, owner: Optional[str] = None) -> str:
         """
-        Divide el texto en chunks para crear embeddings.
-        :param docs: Documentos (chunks).
-        :return: Lista de documentos (chunks).
+        Retorna el `persist_path` del vector store del TDR, reutilizando uno existente
+        si el mismo documento ya fue procesado con los mismos parámetros de ingesta.
+        El store queda con `leases` referencias de `owner` que cada consumidor debe liberar.
         """
-        splitter = RecursiveCharacterTextSplitter(
-            chunk_size=800,
-            chunk_overlap=200,
-            separators=["\n\n", "\n", " ", ""]
+        # Los stores del TDR son direccionados por contenido e inmutables, por lo que se
+        # comparten entre ejecuciones en lugar de aislarse por thread
+        return self.collections.get_or_create_store(
+            tdr_file_path,
+            self.ingestion_params(),
+            lambda file_path, persist_path: self.create_vectorstore(file_path, persist_path, agent_configuration),
+            prefix="tdr_vectorstore",
+            leases=leases,
+            owner=owner,
         )
-        return splitter.split_documents(docs)
-    
+
+    @traceable
+    def index_collections(self, state: FormuladorCTeIAgent, tdr_persist_path: str, manifest_path: str, agent_configuration: MultiAgentConfiguration) -> str:
+        """
+        Registra el TDR y cada documento adicional (anexos, guías sectoriales) como colecciones
+        del índice de la ejecución. Solo se embeben los documentos que aún no tienen store,
+        de modo que un anexo agregado a mitad de la conversación no reprocesa los demás.
+        Cada colección queda con una referencia del namespace de la ejecución, que se libera
+        al cerrarlo (ver `AnalyticalCore.run`).
+        :return: Ruta del manifiesto de colecciones.
+        """
+        lease_owner = self.storage.namespace_of(manifest_path)
+        self.storage.acquire(tdr_persist_path, owner=lease_owner)
+        self.collections.add(manifest_path, "tdr", tdr_persist_path, source=Path(state.get("tdr_document_path")).name)
+        for file_path in state.get("additional_documents_paths") or []:
+            if not os.path.exists(file_path):
+                print(f"Documento adicional no encontrado, se omite: {file_path}")
+                continue
+            try:
+                self.collections.index_document(
+                    manifest_path,
+                    collection_name_for(file_path),
+                    file_path,
+                    self.ingestion_params(),
+                    lambda path, persist_path: self.create_vectorstore(path, persist_path, agent_configuration),
+                    leases=1,
+                    owner=lease_owner,
+                )
+            except ValueError as e:
+                print(f"No se pudo indexar el documento adicional {file_path}: {e}")
+        return manifest_path
+        
     @traceable
-    def create_vectorstore(self, splits):
+    def pre_retrieve_sections(self, persist_path: str, agent_configuration: MultiAgentConfiguration) -> Dict[str, Tuple[List[Document], float]]:
+        """
+        Recupera en una sola pasada los pasajes candidatos de todas las secciones del TDR:
+        las definiciones de `SECCIONES_TDR` se embeben en un único lote y se comparan con la
+        matriz del TDR en un solo producto matricial.
+
+        Los chunks contiguos de una misma sección (`heading_path`) se agregan para no entregar
+        tablas o listas cortadas. Retorna, por sección, los pasajes en orden del documento y
+        la similitud máxima obtenida.
+        """
+        vectorstore = get_vectorstore_cache().get(persist_path, load_vectorstore)
+        secciones = list(SECCIONES_TDR.keys())
+        query_vectors = vectorstore.embeddings.embed_documents([SECCIONES_TDR[s]["definicion"] for s in secciones])
+        similarity = batch_similarity_scores(vectorstore, query_vectors)
+        indices, scores = batch_top_k(similarity, agent_configuration.tdr_preretrieval_k)
+        total_chunks = similarity.shape[1]
+
+        candidates = {}
+        for seccion_tdr, row_indices, row_scores in zip(secciones, indices, scores):
+            selected: Dict[int, Document] = {}
+            budget = self.PRERETRIEVAL_MAX_TOKENS
+            for index in row_indices:
+                index = int(index)
+                if index in selected:
+                    continue
+                document = document_at(vectorstore, index)
+                cost = approximate_tokens(document.page_content)
+                if cost > budget:
+                    break
+                selected[index] = document
+                budget -= cost
+                budget = self._add_section_parts(vectorstore, total_chunks, index, document, selected, budget)
+            passages = [selected[index] for index in sorted(selected)]
+            candidates[seccion_tdr] = (passages, float(row_scores[0]) if len(row_scores) else 0.0)
+        return candidates
+
+    @staticmethod
+    def _add_section_parts(vectorstore, total_chunks: int, index: int, document: Document, selected: Dict[int, Document], budget: int) -> int:
+        """Agrega las partes vecinas de la misma sección mientras quede presupuesto."""
+        heading_path = document.metadata.get("heading_path")
+        if heading_path is None or "section_part" not in document.metadata:
+            return budget
+        for step in (-1, 1):
+            neighbor = index + step
+            while 0 <= neighbor < total_chunks and neighbor not in selected:
+                neighbor_document = document_at(vectorstore, neighbor)
+                cost = approximate_tokens(neighbor_document.page_content)
+                if neighbor_document.metadata.get("heading_path") != heading_path or cost > budget:
+                    break
+                selected[neighbor] = neighbor_document
+                budget -= cost
+                neighbor += step
+        return budget
+
+    def build_section_prompt(
+        self,
+        seccion_tdr: str,
+        persist_path: str,
+        candidates: Optional[Tuple[List[Document], float]],
+        agent_configuration: MultiAgentConfiguration,
+    ) -> str:
         """
-        Crea y persiste un vector store a partir de los chunks de la transcripción.
-        :param splits: Lista de chunks.
-        :return: vectorstore y la ruta de persistencia.
+        Mensaje de usuario para el agente de una sección: con pasajes pre-recuperados cuando la
+        similitud supera el umbral, o la búsqueda iterativa con la herramienta en caso contrario.
         """
-        embeddings = OpenAIEmbeddings(model="text-embedding-3-small")
-        # Usar Path para generar el directorio y convertirlo a POSIX (con "/" como separador)
-        persist_path = Path(os.getcwd()) / "temp_uploads" / "tdr_vectorstore.parquet"
-        persist_path = persist_path.as_posix()  # Se convierte a formato POSIX ("/")
-
-        vectorstore = SKLearnVectorStore.from_documents(
-            documents=splits,
-            embedding=embeddings,
+        definicion = SECCIONES_TDR[seccion_tdr]["definicion"]
+        if candidates is None or not candidates[0] or candidates[1] < agent_configuration.tdr_preretrieval_min_score:
+            return USER_PROMPT_TEMPLATE.format(seccion_tdr=seccion_tdr, persist_path=persist_path, definicion=definicion)
+
+        passages, confianza = candidates
+        pasajes = "\n\n".join(
+            f"==PASAJE {i + 1} ({doc.metadata.get('heading_path') or 'sin encabezado'})==\n{doc.page_content}"
+            for i, doc in enumerate(passages)
+        )
+        return PRERETRIEVED_PROMPT_TEMPLATE.format(
+            seccion_tdr=seccion_tdr,
             persist_path=persist_path,
-            serializer="parquet",
+            definicion=definicion,
+            pasajes=pasajes,
+            confianza=confianza,
         )
 
-        vectorstore.persist()
-        return vectorstore, persist_path
-        
     @traceable
     def run(self, state: FormuladorCTeIAgent, config: RunnableConfig) -> Command[Literal["coordinador_general", "tdr_parsing_agent"]]:
         """
@@ -93,10 +229,24 @@ class TDRVectorStore:
             )
 
         try:
-            tdr_documents = self.load_document(tdr_file_path)
-            splits = self.split_documents(tdr_documents)
-            vectorstore, persist_path = self.create_vectorstore(splits)
-            
+            agent_configuration = MultiAgentConfiguration.from_runnable_config(config)
+            document_collections_path = state.get("document_collections_path") or self.collections.manifest_path(
+                self.storage.namespace_from_config(config)
+            )
+            # Las referencias son de la ejecución (namespace del manifiesto): una por cada agente
+            # de parsing, que cada rama libera al terminar aunque corra en otro proceso
+            lease_owner = self.storage.namespace_of(document_collections_path)
+            persist_path = self.get_or_create_vectorstore(tdr_file_path, agent_configuration, leases=len(SECCIONES_TDR), owner=lease_owner)
+            self.index_collections(state, persist_path, document_collections_path, agent_configuration)
+
+            candidates = {}
+            if agent_configuration.tdr_preretrieval:
+                try:
+                    candidates = self.pre_retrieve_sections(persist_path, agent_configuration)
+                except Exception as e:
+                    # Sin pre-recuperación cada agente busca por su cuenta con la herramienta
+                    logger.warning(f"Pre-recuperación de secciones no disponible: {e}", exc_info=True)
+
             goto = [
                     Send(
                         "tdr_parsing_agent",
@@ -104,21 +254,24 @@ class TDRVectorStore:
                             "messages": [
                                 {
                                     "role": "user",
-                                    "content": USER_PROMPT_TEMPLATE.format(
-                                        seccion_tdr=seccion_tdr,
-                                        persist_path=persist_path,
-                                        definicion=SECCIONES_TDR[seccion_tdr]["definicion"]
+                                    "content": self.build_section_prompt(
+                                        seccion_tdr,
+                                        persist_path,
+                                        candidates.get(seccion_tdr),
+                                        agent_configuration,
                                     )
                                 }
                             ],
                             "seccion_tdr": seccion_tdr,
                             "persist_path": persist_path,
+                            "lease_owner": lease_owner,
                         }
                     )
                 for seccion_tdr in SECCIONES_TDR.keys()
             ]
 
             return Command(
+                update={"document_collections_path": document_collections_path},
                 goto=goto,
             )
             
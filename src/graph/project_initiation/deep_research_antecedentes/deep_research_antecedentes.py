@@ -21,8 +21,8 @@ import json
 from src.graph.state import FormuladorCTeIAgent
 from src.config.configuration import MultiAgentConfiguration
 from src.llms.llm import create_llm_model
-from src.tools.serper_dev_tool import serper_dev_search_tool
-from src.tools.web_rag_pipeline import web_rag_pipeline_tool
+from src.tools.serper_dev_tool import serper_dev_batch_search_tool, serper_dev_search_tool
+from src.tools.web_rag_pipeline import web_rag_multi_url_tool, web_rag_pipeline_tool
 from src.prompts.prompts_project_initiation import SUPERVISOR_INSTRUCTIONS, RESEARCH_INSTRUCTIONS
 from typing import Any, Dict, List, Union
 from pydantic import BaseModel
@@ -135,7 +135,7 @@ class DeepResearchAntecedentes:
     def __init__(self):
         self.tools_for_supervisor = [serper_dev_search_tool, web_rag_pipeline_tool, Sections]
         self.supervisor_tools_by_name = {tool.name: tool for tool in self.tools_for_supervisor}
-        self.tools_for_research = [serper_dev_search_tool, web_rag_pipeline_tool, Section]
+        self.tools_for_research = [serper_dev_search_tool, serper_dev_batch_search_tool, web_rag_pipeline_tool, web_rag_multi_url_tool, Section]
         self.research_tools_by_name = {tool.name: tool for tool in self.tools_for_research}
     
     def supervisor(self, state: ReportState, config: RunnableConfig):
@@ -9,8 +9,8 @@ from src.graph.state import FormuladorCTeIAgent, PerfilEntidad, SeccionTDR, Enti
 from src.config.configuration import MultiAgentConfiguration
 from src.prompts.prompts_concept_generation import PROMPT_SYSTEM_PLANNER, PROMPT_SYSTEM_WEB_RESEARCH
 from src.llms.llm import create_llm_model
-from src.tools.serper_dev_tool import serper_dev_search_tool
-from src.tools.web_rag_pipeline import web_rag_pipeline_tool
+from src.tools.serper_dev_tool import serper_dev_batch_search_tool, serper_dev_search_tool
+from src.tools.web_rag_pipeline import web_rag_multi_url_tool, web_rag_pipeline_tool
 
 
 from pydantic import BaseModel, Field
@@ -81,7 +81,7 @@ class DeepResearchEntidades:
 
     def __init__(self):
         self.TOOLS_PLANNER = [hand_off_to_web_research]
-        self.TOOLS_WEB_RESEARCH = [serper_dev_search_tool, web_rag_pipeline_tool, hand_off_to_planner]
+        self.TOOLS_WEB_RESEARCH = [serper_dev_search_tool, serper_dev_batch_search_tool, web_rag_pipeline_tool, web_rag_multi_url_tool, hand_off_to_planner]
     
     def create_planner_research_agent(self, state: ContextResearchSwarmState, config: RunnableConfig):
         agent_configuration = MultiAgentConfiguration.from_runnable_config(config)
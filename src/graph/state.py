@@ -492,6 +492,7 @@ class FormuladorCTeIAgent(AgentState):
     plan_desarrollo_departamental: Optional[str] = Field(default=None, description="Path al documento del plan de desarrollo departamental (PDF, DOCX)")
     plan_desarrollo_nacional_vectorstore: Optional[str] = Field(default=None, description="Path al vectorstore del plan de desarrollo nacional")
     plan_desarrollo_departamental_vectorstore: Optional[str] = Field(default=None, description="Path al vectorstore del plan de desarrollo departamental")
+    document_collections_path: Optional[str] = Field(default=None, description="Path al manifiesto de colecciones (TDR, planes y documentos adicionales) consultables con document_collections_query_tool")
         
     # Datos específicos del usuario procesados desde raw_user_input_data
     departamento: str = Field(description="Departamento seleccionado para el proyecto")
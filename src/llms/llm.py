@@ -1,10 +1,17 @@
 from dotenv import load_dotenv
-from langchain_openai import ChatOpenAI
+from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+from langchain_core.embeddings import Embeddings
 from langchain.chat_models import init_chat_model
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.rate_limiters import InMemoryRateLimiter
 
+from src.config.configuration import EMBEDDING_CACHE_ENABLED
+from src.databases.embedding_cache import CachedEmbeddings, get_embedding_cache
+from src.utils.record_replay import RecordReplayEmbeddings, get_cassette_store, install_record_replay
+
 load_dotenv()
+# Con RECORD_REPLAY_MODE activo, las llamadas a LLM se graban o reproducen vía la caché global de LangChain
+install_record_replay()
 
 def create_llm_model(
     model: str,
@@ -57,3 +64,28 @@ def create_llm_model(
         return llm
     else:
         raise ValueError(f"Unsupported model: {model}")
+
+
+def create_embedding_model(
+    model: str = "text-embedding-3-small",
+    **kwargs,
+) -> Embeddings:
+    """
+    Create an OpenAIEmbeddings instance backed by the persistent embedding cache.
+
+    Args:
+        model: Name of the OpenAI embedding model.
+        **kwargs: Additional parameters to pass to OpenAIEmbeddings.
+
+    Returns:
+        A CachedEmbeddings wrapper (or the bare OpenAIEmbeddings if the cache is disabled),
+        wrapped in turn by the record/replay layer when RECORD_REPLAY_MODE is active.
+    """
+    embeddings = OpenAIEmbeddings(model=model, **kwargs)
+    if EMBEDDING_CACHE_ENABLED:
+        embeddings = CachedEmbeddings(embeddings, get_embedding_cache())
+    # Por fuera de la caché persistente, para que el cassette registre todos los textos
+    store = get_cassette_store()
+    if store is not None:
+        embeddings = RecordReplayEmbeddings(embeddings, store)
+    return embeddings
@@ -30,4 +30,36 @@ Vamos a desarrollar **la sección <{seccion_tdr}>** de los Términos de Referenc
 • No inventes contenido ni edites el texto original.
 • No incluyas fragmentos fuera de la sección objetivo.
 • Responde solo con el bloque texto_extraido; nada de explicaciones adicionales.
-"""
\ No newline at end of file
+"""
+
+PRERETRIEVED_PROMPT_TEMPLATE = """
+🗂️ **Proyecto Formulación CTeI · Extracción de sección TDR**
+
+Vamos a desarrollar **la sección <{seccion_tdr}>** de los Términos de Referencia (TDR).
+
+📌 **Pasajes candidatos (pre-recuperados, en orden del documento)**  
+Similitud máxima con la guía de búsqueda: {confianza:.2f}
+
+{pasajes}
+
+📂 **Vector store**:  
+• Ruta local = {persist_path}  
+(Contiene embeddings de todo el documento; úsalo solo si los pasajes anteriores no bastan).
+
+🎯 **Qué debes lograr**  
+1. Entregar **el texto íntegro y sin truncar** que corresponde a <{seccion_tdr}>, tomado de los pasajes candidatos.  
+2. Si los pasajes cubren la sección completa, responde **de inmediato, sin usar herramientas**.  
+3. Si la sección aparece cortada o incompleta (p. ej. una tabla sin cierre o una lista que continúa), usa `local_research_query_tool` solo para recuperar lo que falta.
+
+🔍 **Guía de búsqueda**  
+{definicion}
+
+📑 **Formato de salida (texto plano extraido directamente del documento)**  
+```plain_text
+<texto_extraido>
+```
+⚠️ Reglas
+• No inventes contenido ni edites el texto original.
+• No incluyas fragmentos fuera de la sección objetivo.
+• Responde solo con el bloque texto_extraido; nada de explicaciones adicionales.
+"""
@@ -60,7 +60,7 @@ Proceso de Ejecución (Tu Bucle de Trabajo)
 1.  **Análisis del Encargo**: Lee y comprende a la perfección el campo `description` de tu paquete de trabajo. Este es tu único universo de responsabilidades.
 
 2.  **Investigación Focalizada**: Ejecuta el plan descrito en tu `description`.
-    a) **Usa las Herramientas Estratégicamente**: Emplea `serper_dev_search_tool` para búsquedas amplias y `web_rag_pipeline_tool` para profundizar en URLs específicas que encuentres.
+    a) **Usa las Herramientas Estratégicamente**: Emplea `serper_dev_search_tool` para búsquedas amplias (o `serper_dev_batch_search_tool(queries=[...])` para lanzar en una sola llamada todas las búsquedas de tu `description`, con los enlaces repetidos ya fusionados) y `web_rag_pipeline_tool` para profundizar en URLs específicas que encuentres; cuando tengas varios enlaces, usa `web_rag_multi_url_tool(website_urls=[...], search_query=...)` para consultarlos en una sola llamada.
     b) **Cubre Todos los Puntos**: Asegúrate de responder a todas las preguntas y cubrir todos los temas solicitados en tu `description`.
     c) **Finaliza la Búsqueda**: Detén la investigación solo cuando tengas datos suficientes para escribir un texto completo y riguroso.
 
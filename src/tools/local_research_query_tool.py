@@ -1,8 +1,16 @@
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_openai import OpenAIEmbeddings
-from langchain_community.vectorstores import SKLearnVectorStore
+from typing import List, Optional, Tuple
+
+from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_core.tools import tool
 
+from src.config.configuration import RETRIEVAL_MODE
+from src.databases.document_collections import DocumentCollections, select_collections
+from src.databases.lexical_index import get_lexical_index
+from src.databases.retrieval import batch_hybrid_search, batch_mmr_search, hybrid_search
+from src.databases.vectorstore_cache import get_vectorstore_cache
+from src.databases.vectorstore_io import load_vectorstore
+from src.databases.vectorstore_storage import get_vectorstore_storage
+
 @tool
 def local_research_query_tool(query: str, persist_path: str) -> str:
     """
@@ -18,13 +26,109 @@ def local_research_query_tool(query: str, persist_path: str) -> str:
     if persist_path == "":
         return "There is no provided documentation to search in."
     
-    retriever = SKLearnVectorStore(
-        embedding=OpenAIEmbeddings(model="text-embedding-3-small"),
-        persist_path=persist_path,
-        serializer="parquet").as_retriever(search_type="mmr", search_kwargs={"k": 10}
-    )
+    try:
+        # Solo la primera consulta sobre cada store paga la carga desde disco
+        vectorstore = get_vectorstore_cache().get(persist_path, load_vectorstore)
+    except FileNotFoundError:
+        # Ruta inexistente (mal copiada por el agente o ya recolectada)
+        return "There is no provided documentation to search in."
+    get_vectorstore_storage().touch(persist_path)
+    if RETRIEVAL_MODE == "vector":
+        retriever = vectorstore.as_retriever(search_type="mmr", search_kwargs={"k": 10})
+        relevant_docs = retriever.invoke(query)
+    else:
+        relevant_docs = hybrid_search(vectorstore, get_lexical_index(persist_path), query, k=10, mode=RETRIEVAL_MODE)
 
-    relevant_docs = retriever.invoke(query)
     print(f"Retrieved {len(relevant_docs)} relevant documents")
     formatted_context = "\n\n".join([f"==DOCUMENT {i+1}==\n{doc.page_content}" for i, doc in enumerate(relevant_docs)])
     return formatted_context
+
+
+def _batch_query(queries: List[str], stores: List[Tuple[str, str]]) -> str:
+    """
+    Resuelve `queries` sobre los stores `(etiqueta, persist_path)` en una sola pasada, con
+    el mismo RETRIEVAL_MODE que `local_research_query_tool`, y retorna los documentos
+    agrupados por consulta, cada uno con la etiqueta de su store. Los stores que ya no
+    existen en disco se omiten.
+    """
+    cache = get_vectorstore_cache()
+    storage = get_vectorstore_storage()
+    available, vectorstores = [], []
+    for label, path in stores:
+        try:
+            vectorstores.append(cache.get(path, load_vectorstore))
+        except FileNotFoundError:
+            print(f"Vectorstore not found, skipping: {path}")
+            continue
+        available.append((label, path))
+        storage.touch(path)
+    if not available:
+        return "There is no provided documentation to search in."
+    stores = available
+
+    if RETRIEVAL_MODE == "vector":
+        # Una sola solicitud de embeddings para todas las consultas
+        query_vectors = vectorstores[0].embeddings.embed_documents(queries)
+        results = batch_mmr_search(vectorstores, query_vectors, k=10, fetch_k=20)
+    else:
+        lexical_indexes = [get_lexical_index(path) for _, path in stores]
+        results = batch_hybrid_search(vectorstores, lexical_indexes, queries, k=10, mode=RETRIEVAL_MODE)
+
+    sections = []
+    for query, hits in zip(queries, results):
+        documents = "\n\n".join(
+            f"==DOCUMENT {i+1} ({stores[store_index][0]})==\n{doc.page_content}"
+            for i, (store_index, doc, _) in enumerate(hits)
+        )
+        sections.append(f"#### QUERY: {query}\n\n{documents}")
+    print(f"Retrieved {sum(len(hits) for hits in results)} relevant documents for {len(queries)} queries from {len(stores)} stores")
+    return "\n\n".join(sections)
+
+
+@tool
+def local_research_batch_query_tool(queries: List[str], persist_paths: List[str]) -> str:
+    """
+    Run several related queries at once over one or more local vectorstores (TDR or
+    development plans). Prefer this tool over repeated local_research_query_tool calls
+    when you already know the 2-8 queries you want to make.
+
+    Args:
+        queries (List[str]): The queries to search the documentation with
+        persist_paths (List[str]): The vectorstores to search in; results are combined
+
+    Returns:
+        str: The retrieved documents grouped by query
+    """
+    persist_paths = [path for path in persist_paths if path]
+    queries = [query for query in queries if query.strip()]
+    if not persist_paths:
+        return "There is no provided documentation to search in."
+    if not queries:
+        return "No queries were provided."
+    return _batch_query(queries, [(path, path) for path in persist_paths])
+
+
+@tool
+def document_collections_query_tool(queries: List[str], collections_path: str, collections: Optional[List[str]] = None) -> str:
+    """
+    Search the indexed input documents of this run (TDR, development plans, TDR annexes
+    and sector guides), optionally restricted to some collections. Use it to consult the
+    additional documents provided by the user.
+
+    Args:
+        queries (List[str]): The queries to search the documents with
+        collections_path (str): The document_collections_path of the current state
+        collections (Optional[List[str]]): Collection names to search in (e.g. "tdr",
+            "plan_desarrollo_nacional", "anexo_guia_sectorial"); all collections if omitted
+
+    Returns:
+        str: The retrieved documents grouped by query, labelled with their collection
+    """
+    queries = [query for query in queries if query.strip()]
+    selected = select_collections(collections_path, collections)
+    if not selected:
+        available = ", ".join(DocumentCollections.read(collections_path)) or "none"
+        return f"No matching document collections. Available collections: {available}."
+    if not queries:
+        return "No queries were provided."
+    return _batch_query(queries, list(selected.items()))
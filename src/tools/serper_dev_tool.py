@@ -1,31 +1,39 @@
 import os
 import json
 import requests
-from typing import List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
 from langchain_core.tools import tool
 from dotenv import load_dotenv
 from langsmith import traceable
 
+from src.config.configuration import SERPER_BATCH_MAX_QUERIES, SERPER_CACHE_ENABLED, SERPER_MAX_CONCURRENCY
+from src.databases.http_cache import normalize_url
+from src.databases.search_cache import get_search_cache
+from src.utils.http_client import get_http_session
+from src.utils.rate_governor import ThrottledError, get_rate_governor
+
 load_dotenv()
 
-@tool(description="Utiliza la API de Serper.dev para recuperar una lista de enlaces de artículos de investigación basados en una consulta de búsqueda. Retorna una lista de URLs. Si ocurre un error o se agota el tiempo, retorna una lista vacía.")
-@traceable
-def serper_dev_search_tool(query: str, max_results: int = 5) -> List[str]:
-    """
-    Utiliza la API de Serper.dev para recuperar una lista de enlaces de artículos de investigación
-    basados en una consulta de búsqueda. Retorna una lista de URLs.
-    Si ocurre un error o se agota el tiempo, retorna una lista vacía.
-    """
-    SERPER_URL = "https://google.serper.dev/scholar"
-    
+SERPER_URL = "https://google.serper.dev/scholar"
+# Constante de la fusión por rango recíproco (RRF) de los resultados de varias consultas
+RRF_K = 60
+
+
+def _serper_headers() -> Dict[str, str]:
     # The SERPER_API_KEY environment variable must be set
     api_key = os.environ.get("SERPER_API_KEY")
     if not api_key:
         raise ValueError("SERPER_API_KEY environment variable not set.")
-    
-    # Prepare the request payload. 
+    return {
+        "X-API-KEY": api_key,
+        "Content-Type": "application/json"
+    }
+
+
+def _serper_payload(query: str, max_results: int) -> dict:
     # You can add or remove fields (e.g. gl, hl, autocorrect) as needed.
-    payload = {
+    return {
         "q": query,
         "num": max_results,    # How many organic results to fetch
         "type": "search",      # Required by Serper for standard web search
@@ -33,34 +41,161 @@ def serper_dev_search_tool(query: str, max_results: int = 5) -> List[str]:
         "gl": "us",            # Optional: geolocation (country)
         "hl": "en"             # Optional: language
     }
-    
-    headers = {
-        "X-API-KEY": api_key,
-        "Content-Type": "application/json"
-    }
-    
-    try:
-        response = requests.post(
+
+
+def _cache_key(payload: dict) -> str:
+    params = {key: value for key, value in payload.items() if key != "q"}
+    return get_search_cache().make_key(SERPER_URL, payload["q"], **params)
+
+
+def serper_search(query: str, max_results: int = 5) -> List[dict]:
+    """
+    Resultados orgánicos de Serper para `query`, desde la caché de búsquedas cuando la
+    misma consulta (normalizada) ya se hizo o está en curso en otra rama.
+    Lanza `requests.exceptions.RequestException` si la solicitud falla, o ThrottledError
+    si Serper está aplazado por saturación.
+    """
+    payload = _serper_payload(query, max_results)
+    headers = _serper_headers()
+
+    def fetch() -> List[dict]:
+        with get_rate_governor().slot(SERPER_URL) as ticket:
+            response = get_http_session().post(
+                SERPER_URL,
+                headers=headers,
+                data=json.dumps(payload),
+                timeout=10.0
+            )
+            ticket.update(status=response.status_code, headers=response.headers)
+        response.raise_for_status()  # Raise an HTTPError if 4xx/5xx
+        # Serper's response uses the "organic" key for search results
+        return response.json().get("organic", [])
+
+    if not SERPER_CACHE_ENABLED:
+        return fetch()
+    return get_search_cache().get_or_fetch(_cache_key(payload), fetch)
+
+
+def _serper_batch_request(payloads: List[dict], headers: Dict[str, str]) -> List[List[dict]]:
+    """
+    Una sola solicitud con un arreglo JSON de consultas; Serper responde con un arreglo
+    de resultados en el mismo orden. Lanza ValueError si la respuesta no tiene esa forma.
+    """
+    with get_rate_governor().slot(SERPER_URL) as ticket:
+        response = get_http_session().post(
             SERPER_URL,
             headers=headers,
-            data=json.dumps(payload),
-            timeout=10.0
+            data=json.dumps(payloads),
+            timeout=20.0
         )
-        response.raise_for_status()  # Raise an HTTPError if 4xx/5xx
-        results = response.json()
-        
-        # Serper's response uses the "organic" key for search results
-        organic_results = results.get("organic", [])
-        
+        ticket.update(status=response.status_code, headers=response.headers)
+    response.raise_for_status()
+    results = response.json()
+    if not isinstance(results, list) or len(results) != len(payloads):
+        raise ValueError("Unexpected response to a batched Serper request")
+    return [result.get("organic", []) for result in results]
+
+
+def serper_batch_search(queries: List[str], max_results: int = 5) -> Dict[str, List[dict]]:
+    """
+    Resultados orgánicos de Serper para cada consulta de `queries`. Las consultas que no
+    están en la caché se envían en lotes de hasta SERPER_BATCH_MAX_QUERIES por solicitud,
+    reservadas en la caché de búsquedas para que otra rama que haga la misma consulta
+    espere el lote en lugar de repetirla. Las que el lote no resuelve se consultan en
+    paralelo una por una; una consulta fallida queda con una lista vacía.
+    """
+    headers = _serper_headers()
+    queries = list(dict.fromkeys(query.strip() for query in queries if query and query.strip()))
+    payloads = [_serper_payload(query, max_results) for query in queries]
+
+    def fetch_batches(positions: List[int]) -> Dict[int, List[dict]]:
+        fetched: Dict[int, List[dict]] = {}
+        for start in range(0, len(positions), SERPER_BATCH_MAX_QUERIES):
+            batch = positions[start:start + SERPER_BATCH_MAX_QUERIES]
+            try:
+                organic_lists = _serper_batch_request([payloads[position] for position in batch], headers)
+            except (requests.exceptions.RequestException, ThrottledError, ValueError) as e:
+                print(f"Batched Serper request failed ({e}); querying the remaining queries one by one")
+                break
+            fetched.update(zip(batch, organic_lists))
+        return fetched
+
+    if SERPER_CACHE_ENABLED:
+        fetched = get_search_cache().get_or_fetch_many([_cache_key(payload) for payload in payloads], fetch_batches)
+    else:
+        fetched = fetch_batches(list(range(len(queries))))
+    results: Dict[str, List[dict]] = {queries[position]: organic for position, organic in fetched.items()}
+
+    def search_one(query: str) -> List[dict]:
+        try:
+            return serper_search(query, max_results)
+        except (requests.exceptions.RequestException, ThrottledError) as e:
+            print(f"Error making request to Serper API for '{query}': {e}")
+            return []
+
+    remaining = [query for query in queries if query not in results]
+    if remaining:
+        with ThreadPoolExecutor(max_workers=min(SERPER_MAX_CONCURRENCY, len(remaining))) as executor:
+            results.update(zip(remaining, executor.map(search_one, remaining)))
+    return {query: results[query] for query in queries}
+
+
+def merge_ranked_results(results: Dict[str, List[dict]], max_results: int) -> List[dict]:
+    """
+    Fusiona los resultados de varias consultas con RRF: un enlace que aparece en varias
+    consultas (o más arriba) queda primero. Los enlaces se deduplican por URL normalizada.
+    """
+    merged: Dict[str, dict] = {}
+    for query, organic in results.items():
+        for rank, result in enumerate(organic):
+            link = result.get("link")
+            if not link:
+                continue
+            entry = merged.setdefault(
+                normalize_url(link),
+                {"link": link, "title": result.get("title", ""), "queries": [], "score": 0.0},
+            )
+            entry["score"] += 1.0 / (RRF_K + rank + 1)
+            entry["queries"].append(query)
+    ranked = sorted(merged.values(), key=lambda entry: entry["score"], reverse=True)[:max_results]
+    return [{key: entry[key] for key in ("link", "title", "queries")} for entry in ranked]
+
+
+@tool(description="Utiliza la API de Serper.dev para recuperar una lista de enlaces de artículos de investigación basados en una consulta de búsqueda. Retorna una lista de URLs. Si ocurre un error o se agota el tiempo, retorna una lista vacía.")
+@traceable
+def serper_dev_search_tool(query: str, max_results: int = 5) -> List[str]:
+    """
+    Utiliza la API de Serper.dev para recuperar una lista de enlaces de artículos de investigación
+    basados en una consulta de búsqueda. Retorna una lista de URLs.
+    Si ocurre un error o se agota el tiempo, retorna una lista vacía.
+    """
+    try:
+        organic_results = serper_search(query, max_results)
+
         # Collect the top links up to max_results
         links = []
         for result in organic_results[:max_results]:
             link = result.get("link")
             if link:
                 links.append(link)
-        
+
         return links
-    
-    except requests.exceptions.RequestException as e:
+
+    except (requests.exceptions.RequestException, ThrottledError) as e:
+        print(f"Error making request to Serper API: {e}")
+        return []
+
+
+@tool(description="Variante de serper_dev_search_tool para varias consultas a la vez (p. ej. todas las consultas_investigacion del plan): las envía a Serper.dev en una sola solicitud, elimina los enlaces repetidos entre consultas y retorna una única lista ordenada por relevancia combinada. Cada elemento tiene 'link', 'title' y 'queries' (las consultas que lo encontraron).")
+@traceable
+def serper_dev_batch_search_tool(queries: List[str], max_results_per_query: int = 5, max_results: int = 15) -> List[dict]:
+    """
+    Busca varias consultas en Serper.dev con una sola solicitud (o en paralelo si el lote no
+    es aceptado) y retorna los enlaces fusionados y deduplicados, ordenados por relevancia.
+    """
+    try:
+        results = serper_batch_search(queries, max_results_per_query)
+    except ValueError as e:
         print(f"Error making request to Serper API: {e}")
         return []
+    return merge_ranked_results(results, max_results)
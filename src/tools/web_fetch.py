@@ -0,0 +1,210 @@
+import asyncio
+import io
+import re
+import time
+from typing import List, Mapping, Optional, Tuple
+
+import httpx
+from bs4 import BeautifulSoup
+from pypdf import PdfReader
+
+from src.config.configuration import (
+    HTTP_CACHE_ENABLED,
+    HTTP_CONNECT_TIMEOUT,
+    HTTP_READ_TIMEOUT,
+    WEB_FETCH_MAX_BYTES,
+    WEB_FETCH_MAX_PDF_PAGES,
+    WEB_FETCH_TIMEOUT_SECONDS,
+    WEB_MAIN_CONTENT_ENABLED,
+    WEB_RAG_MAX_CONCURRENCY,
+)
+from src.databases.http_cache import CachedPage, get_http_cache
+from src.utils.http_client import DEFAULT_USER_AGENT, get_http_session
+from src.utils.main_content import extract_main_content
+from src.utils.rate_governor import get_rate_governor
+from src.utils.record_replay import RecordReplayTransport, get_cassette_store
+
+# Bytes iniciales usados para identificar el tipo de contenido
+SNIFF_BYTES = 1024
+_CHUNK_BYTES = 64 * 1024
+
+_BINARY_CONTENT_TYPES = ("image/", "audio/", "video/", "font/", "application/zip", "application/x-rar", "application/gzip")
+_BINARY_MAGIC = (b"PK\x03\x04", b"\x89PNG", b"\xff\xd8\xff", b"GIF8", b"\x1f\x8b", b"Rar!", b"7z\xbc\xaf", b"ID3", b"RIFF")
+_MARKUP_RE = re.compile(rb"^\s*(?:\xef\xbb\xbf)?\s*<")
+
+
+class FetchError(Exception):
+    """La URL no se pudo cargar: error HTTP, contenido binario o fuera de los límites de descarga."""
+
+
+def clean_text(text: str) -> str:
+    """Utilidad para limpiar espacios adicionales y saltos de línea."""
+    text = re.sub(r"[ \t]+", " ", text)
+    text = re.sub(r"\n+", "\n", text)
+    return text.strip()
+
+
+def html_to_text(html: bytes | str) -> str:
+    """
+    Texto de una página HTML (BeautifulSoup detecta la codificación de los bytes): solo el
+    contenido principal con WEB_MAIN_CONTENT_ENABLED, o todo el texto visible si no.
+    """
+    if WEB_MAIN_CONTENT_ENABLED:
+        return extract_main_content(html)
+    return clean_text(BeautifulSoup(html, "html.parser").get_text(" "))
+
+
+def pdf_to_text(data: bytes, max_pages: int = WEB_FETCH_MAX_PDF_PAGES) -> str:
+    """Texto de las primeras `max_pages` páginas de un PDF descargado en memoria."""
+    reader = PdfReader(io.BytesIO(data))
+    pages = reader.pages[:max_pages]
+    return clean_text("\n\n".join(page.extract_text() or "" for page in pages))
+
+
+def sniff_content_type(content_type: str, head: bytes) -> str:
+    """
+    Tipo efectivo ("application/pdf" o "text/html") a partir del encabezado Content-Type
+    y de los primeros bytes del cuerpo; los bytes mandan sobre un encabezado incorrecto.
+    Lanza FetchError para contenido binario no soportado.
+    """
+    if head.lstrip().startswith(b"%PDF-"):
+        return "application/pdf"
+    if _MARKUP_RE.match(head):
+        return "text/html"
+    if "application/pdf" in content_type:
+        return "application/pdf"
+    if content_type.startswith(_BINARY_CONTENT_TYPES) or head.startswith(_BINARY_MAGIC) or b"\x00" in head:
+        raise FetchError(f"Unsupported binary content ({content_type or 'unknown type'})")
+    return "text/html"
+
+
+def extract_text(content_type: str, body: bytes) -> str:
+    if content_type == "application/pdf":
+        return pdf_to_text(body)
+    return html_to_text(body)
+
+
+class BoundedDownload:
+    """
+    Acumula el cuerpo de una respuesta en streaming y la aborta en cuanto se sabe que no
+    sirve: Content-Length declarado o bytes recibidos por encima de `max_bytes`, contenido
+    binario detectado en los primeros bytes o descarga más larga que `timeout` segundos.
+    """
+
+    def __init__(self, headers: Mapping[str, str], max_bytes: int = WEB_FETCH_MAX_BYTES, timeout: float = WEB_FETCH_TIMEOUT_SECONDS):
+        self.declared_type = (headers.get("Content-Type") or "").lower()
+        self.max_bytes = max_bytes
+        self.deadline = time.monotonic() + timeout
+        self.buffer = bytearray()
+        self.content_type: Optional[str] = None
+        declared_length = headers.get("Content-Length")
+        if declared_length and declared_length.isdigit() and int(declared_length) > max_bytes:
+            raise FetchError(f"Response too large ({int(declared_length)} bytes > {max_bytes})")
+
+    def feed(self, chunk: bytes) -> None:
+        self.buffer += chunk
+        if self.content_type is None and len(self.buffer) >= SNIFF_BYTES:
+            self.content_type = sniff_content_type(self.declared_type, bytes(self.buffer[:SNIFF_BYTES]))
+        if len(self.buffer) > self.max_bytes:
+            raise FetchError(f"Response exceeds {self.max_bytes} bytes")
+        if time.monotonic() > self.deadline:
+            raise FetchError("Download took too long")
+
+    def finish(self) -> Tuple[str, bytes]:
+        """(tipo de contenido efectivo, cuerpo completo)."""
+        if self.content_type is None:
+            self.content_type = sniff_content_type(self.declared_type, bytes(self.buffer[:SNIFF_BYTES]))
+        return self.content_type, bytes(self.buffer)
+
+
+def fetch_url(url: str, cached: Optional[CachedPage] = None) -> Tuple[Optional[str], str, Mapping[str, str], int]:
+    """
+    Descarga `url` con un único GET en streaming (condicional si hay una entrada vencida
+    en caché) y extrae su texto. Retorna (texto, tipo de contenido, encabezados, código de
+    estado); el texto es None cuando el servidor confirma con 304 que la entrada en caché
+    sigue vigente.
+    """
+    headers = cached.conditional_headers() if cached is not None else {}
+    # El cupo del dominio se mantiene durante toda la descarga del cuerpo
+    with get_rate_governor().slot(url) as ticket, get_http_session().get(url, headers=headers, stream=True) as response:
+        ticket.update(status=response.status_code, headers=response.headers)
+        if response.status_code == 304 and cached is not None:
+            return None, cached.content_type, response.headers, response.status_code
+        if response.status_code >= 400:
+            raise FetchError(f"HTTP {response.status_code}")
+        download = BoundedDownload(response.headers)
+        for chunk in response.iter_content(_CHUNK_BYTES):
+            download.feed(chunk)
+        content_type, body = download.finish()
+    return extract_text(content_type, body), content_type, response.headers, response.status_code
+
+
+def fetch_url_text(url: str) -> str:
+    """Texto de `url` desde la caché HTTP cuando está vigente; si no, se descarga y se almacena."""
+    cache = get_http_cache() if HTTP_CACHE_ENABLED else None
+    cached = cache.get(url) if cache is not None else None
+    if cached is not None and cached.is_fresh:
+        return cached.text
+    text, content_type, headers, status_code = fetch_url(url, cached)
+    if text is None:
+        cache.revalidate(url, headers)
+        return cached.text
+    if not text:
+        raise FetchError("No content could be extracted")
+    if cache is not None:
+        cache.put(url, text, content_type, headers, status_code)
+    return text
+
+
+# --- Descarga concurrente ---
+async def _fetch_page(client: httpx.AsyncClient, semaphore: asyncio.Semaphore, url: str) -> Tuple[str, Optional[str], Optional[str]]:
+    """Descarga y extrae el texto de una URL: (url, texto, error)."""
+    cache = get_http_cache() if HTTP_CACHE_ENABLED else None
+    cached = cache.get(url) if cache is not None else None
+    if cached is not None and cached.is_fresh:
+        return url, cached.text, None
+
+    headers = cached.conditional_headers() if cached is not None else {}
+    try:
+        async with semaphore, get_rate_governor().aslot(url) as ticket:
+            async with client.stream("GET", url, headers=headers) as response:
+                ticket.update(status=response.status_code, headers=response.headers)
+                if response.status_code == 304 and cached is not None:
+                    cache.revalidate(url, response.headers)
+                    return url, cached.text, None
+                if response.status_code >= 400:
+                    raise FetchError(f"HTTP {response.status_code}")
+                download = BoundedDownload(response.headers)
+                async for chunk in response.aiter_bytes(_CHUNK_BYTES):
+                    download.feed(chunk)
+                content_type, body = download.finish()
+        # El parseo (CPU) se hace fuera del event loop para no frenar las demás descargas
+        text = await asyncio.to_thread(extract_text, content_type, body)
+    except (httpx.HTTPError, FetchError) as e:
+        return url, None, f"{type(e).__name__}: {e}"
+    except Exception as e:
+        return url, None, f"Error extracting content: {e}"
+    if not text:
+        return url, None, "No content could be extracted"
+    if cache is not None:
+        cache.put(url, text, content_type, response.headers, response.status_code)
+    return url, text, None
+
+
+async def fetch_pages(urls: List[str], max_concurrency: int = WEB_RAG_MAX_CONCURRENCY) -> List[Tuple[str, Optional[str], Optional[str]]]:
+    """Descarga concurrente de `urls` con a lo sumo `max_concurrency` solicitudes simultáneas."""
+    semaphore = asyncio.Semaphore(max_concurrency)
+    limits = httpx.Limits(max_connections=max_concurrency, max_keepalive_connections=max_concurrency)
+    timeout = httpx.Timeout(HTTP_READ_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT)
+    # Con un transporte explícito httpx ignora `limits`, así que se pasan al transporte
+    transport = httpx.AsyncHTTPTransport(limits=limits)
+    store = get_cassette_store()
+    if store is not None:
+        transport = RecordReplayTransport(store, transport)
+    async with httpx.AsyncClient(
+        transport=transport,
+        timeout=timeout,
+        follow_redirects=True,
+        headers={"User-Agent": DEFAULT_USER_AGENT},
+    ) as client:
+        return await asyncio.gather(*(_fetch_page(client, semaphore, url) for url in urls))
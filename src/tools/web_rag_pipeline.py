@@ -1,21 +1,63 @@
-import os
-import re
-import requests
-from bs4 import BeautifulSoup
-from typing import Optional, List
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
 from pydantic import BaseModel, Field
 from langchain_core.tools import tool
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_openai import OpenAIEmbeddings
-from langchain_core.vectorstores import InMemoryVectorStore
-from langchain_community.document_loaders import PyPDFLoader
+from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
 
-def clean_text(text: str) -> str:
-    """Utilidad para limpiar espacios adicionales y saltos de línea."""
-    text = re.sub(r"[ \t]+", " ", text)
-    text = re.sub(r"\n+", "\n", text)
-    return text.strip()
+from src.config.configuration import WEB_INDEX_CACHE_ENABLED, WEB_RAG_MAX_URLS
+from src.databases.web_index_cache import URLIndex, get_url_index_cache, hash_content, mmr_search
+from src.llms.llm import create_embedding_model
+from src.tools.web_fetch import fetch_pages, fetch_url_text
+
+
+def split_content(url: str, content: str) -> List[Document]:
+    """Fragmentos del contenido de una URL, con la URL como fuente."""
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=1000,
+        chunk_overlap=200,
+        separators=["\n\n", "\n", " "]
+    )
+    return splitter.split_documents([Document(page_content=content, metadata={"source": url})])
+
+
+def _model_name(embeddings: Embeddings) -> str:
+    return getattr(embeddings, "model", type(embeddings).__name__)
+
+
+def index_pages(pages: List[tuple], embeddings: Embeddings) -> List[URLIndex]:
+    """
+    Índices (chunks + embeddings) de las páginas `(url, contenido)`. Las que ya están en
+    la caché de índices por URL se reutilizan, las que otra rama está indexando se esperan
+    y los chunks de las demás se embeben en una sola solicitud.
+    """
+    model = _model_name(embeddings)
+    keys = [(url, hash_content(content), model) for url, content in pages]
+
+    def build(positions: List[int]) -> List[URLIndex]:
+        splits = [split_content(pages[position][0], pages[position][1]) for position in positions]
+        texts = [doc.page_content for page_splits in splits for doc in page_splits]
+        vectors = embeddings.embed_documents(texts) if texts else []
+        indexes = []
+        offset = 0
+        for position, page_splits in zip(positions, splits):
+            url, content_hash, _ = keys[position]
+            indexes.append(URLIndex.build(url, content_hash, model, page_splits, vectors[offset:offset + len(page_splits)]))
+            offset += len(page_splits)
+        return indexes
+
+    if not WEB_INDEX_CACHE_ENABLED:
+        return build(list(range(len(pages))))
+    return get_url_index_cache().get_or_build_many(keys, build)
+
+
+def format_documents(docs: List[Document]) -> str:
+    return "\n\n".join(
+        f"Source: {doc.metadata.get('source', 'No URL available')}\nContent: {doc.page_content}"
+        for doc in docs
+    )
 
 class WebRAGPipelineToolInput(BaseModel):
     website_url: str = Field(
@@ -26,12 +68,12 @@ class WebRAGPipelineToolInput(BaseModel):
     )
 
 @tool(description="""Esta herramienta realiza los siguientes pasos:
-    1) Obtiene el contenido del sitio web desde la URL proporcionada.
-       - Utiliza una solicitud HEAD para determinar si el contenido es un PDF o HTML.
-       - Si es PDF, carga el contenido usando PyPDFLoader.
-       - Si es HTML, carga el contenido usando requests y BeautifulSoup.
+    1) Obtiene el contenido del sitio web desde la URL proporcionada (o desde la caché HTTP si sigue vigente).
+       - Utiliza una única solicitud GET en streaming; el tipo (PDF o HTML) se detecta por encabezados y primeros bytes.
+       - Descarta respuestas binarias o que superen los límites de tamaño y páginas.
+       - Si es PDF, lo procesa en memoria con pypdf; si es HTML, extrae con BeautifulSoup solo el contenido principal (sin menús, banners ni pies de página).
     2) Divide el contenido cargado en fragmentos más pequeños.
-    3) Crea un vector store en memoria a partir de los fragmentos utilizando OpenAIEmbeddings.
+    3) Crea un índice en memoria a partir de los fragmentos utilizando OpenAIEmbeddings (reutilizado en llamadas posteriores sobre la misma página).
     4) Usa búsqueda de máxima relevancia marginal con la consulta de búsqueda proporcionada para recuperar los fragmentos más relevantes.
 
     Retorna:
@@ -39,12 +81,14 @@ class WebRAGPipelineToolInput(BaseModel):
 def web_rag_pipeline_tool(website_url: str, search_query: str) -> dict:
     """
     Esta herramienta realiza los siguientes pasos:
-      1) Obtiene el contenido del sitio web desde la URL proporcionada.
-         - Utiliza una solicitud HEAD para determinar si el contenido es un PDF o HTML.
-         - Si es PDF, carga el contenido usando PyPDFLoader.
-         - Si es HTML, carga el contenido usando requests y BeautifulSoup.
+      1) Obtiene el contenido del sitio web desde la URL proporcionada (o desde la caché HTTP si sigue vigente).
+         - Utiliza una única solicitud GET en streaming; el tipo (PDF o HTML) se detecta por encabezados y primeros bytes.
+         - Descarta respuestas binarias o que superen los límites de tamaño y páginas.
+         - Si es PDF, lo procesa en memoria con pypdf; si es HTML, extrae con BeautifulSoup solo el contenido principal (sin menús, banners ni pies de página).
       2) Divide el contenido cargado en fragmentos más pequeños.
-      3) Crea un vector store en memoria a partir de los fragmentos utilizando OpenAIEmbeddings.
+      3) Crea un índice en memoria a partir de los fragmentos utilizando OpenAIEmbeddings; el
+         índice queda en la caché por URL y hash de contenido, así que una nueva consulta sobre
+         la misma página solo embebe la consulta.
       4) Usa búsqueda de máxima relevancia marginal con la consulta de búsqueda proporcionada para recuperar los fragmentos más relevantes.
     
     Retorna:
@@ -54,76 +98,94 @@ def web_rag_pipeline_tool(website_url: str, search_query: str) -> dict:
     url = website_url
 
     # --- Step 1: Fetch URL content ---
-    def fetch_url(url: str) -> Optional[str]:
-        try:
-            head_response = requests.head(url, allow_redirects=True, timeout=10)
-            content_type = head_response.headers.get("Content-Type", "").lower()
-        except Exception as e:
-            print(f"HEAD request failed for {url}: {e}")
-            return None
-
-        # If the content is PDF, use PyPDFLoader.
-        if "application/pdf" in content_type or "pdf" in url.lower():
-            try:
-                loader = PyPDFLoader(url)
-                docs = loader.lazy_load()
-                if docs:
-                    joined_text = "\n\n".join(doc.page_content for doc in docs)
-                    return clean_text(joined_text)
-                else:
-                    return None
-            except Exception as e:
-                print(f"Error loading PDF from {url}: {e}")
-                return None
-        else:
-            # Otherwise, treat as HTML.
-            try:
-                response = requests.get(url, timeout=15, headers={
-                    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"
-                })
-                response.encoding = response.apparent_encoding
-                parsed = BeautifulSoup(response.text, "html.parser")
-                text = parsed.get_text(" ")
-                return clean_text(text)
-            except Exception as e:
-                print(f"Error loading HTML from {url}: {e}")
-                return None
-
-    content = fetch_url(url)
+    try:
+        content = fetch_url_text(url)
+    except Exception as e:
+        print(f"Error loading {url}: {e}")
+        content = None
     if not content:
         print("Failed to load content from the URL.")
         return "Failed to load content from the URL."
 
-    # --- Step 2: Split the content into chunks ---
-    splitter = RecursiveCharacterTextSplitter(
-        chunk_size=1000,
-        chunk_overlap=200,
-        separators=["\n\n", "\n", " "]
-    )
-    doc = Document(page_content=content, metadata={"source": url})
-    doc_splits = splitter.split_documents([doc])
-    if not doc_splits:
+    # --- Steps 2-3: Split the content into chunks and index them (or reuse the cached index) ---
+    embeddings = create_embedding_model(model="text-embedding-3-small", chunk_size=256)  # Use smaller chunk_size for API batching
+    content_hash = hash_content(content)
+
+    def build_index() -> URLIndex:
+        doc_splits = split_content(url, content)
+        vectors = embeddings.embed_documents([doc.page_content for doc in doc_splits]) if doc_splits else []
+        return URLIndex.build(url, content_hash, _model_name(embeddings), doc_splits, vectors)
+
+    if WEB_INDEX_CACHE_ENABLED:
+        index = get_url_index_cache().get_or_build(url, content_hash, _model_name(embeddings), build_index)
+    else:
+        index = build_index()
+    if not index.documents:
         print("Document splitting returned no chunks.")
         return "Document splitting returned no chunks."
 
-    # --- Step 3: Create vector store from the chunks ---
-    embeddings = OpenAIEmbeddings(model="text-embedding-3-small", chunk_size=256)  # Use smaller chunk_size for API batching
-    vector_store = InMemoryVectorStore.from_documents(
-        embedding=embeddings,
-        documents=doc_splits
+    # --- Step 4: Perform max marginal relevance search ---
+    try:
+        final_docs = mmr_search([index], embeddings.embed_query(search_query), k=10)
+        document_context = format_documents(final_docs)
+    except Exception as e:
+        print(f"Error during vector search: {e}")
+        return f"Error during vector search: {e}"
+
+    return document_context
+
+
+class WebRAGMultiURLToolInput(BaseModel):
+    website_urls: List[str] = Field(
+        ..., description="Las URLs (p. ej. los enlaces retornados por serper_dev_search_tool) de las cuales obtener el contenido."
+    )
+    search_query: str = Field(
+        ..., description="Consulta de búsqueda que se usará para recuperar los fragmentos más relevantes entre todas las fuentes."
     )
 
-    # --- Step 4: Perform max marginal relevance search ---
+
+def _run_async(coroutine):
+    """Ejecuta una corrutina desde código síncrono, también si el hilo ya tiene un event loop activo."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coroutine)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coroutine).result()
+
+
+@tool(args_schema=WebRAGMultiURLToolInput, description="""Variante de web_rag_pipeline_tool para varias URLs a la vez:
+    1) Descarga concurrentemente todas las URLs (HTML o PDF), reutilizando la caché HTTP cuando sigue vigente.
+    2) Divide el contenido de todas las fuentes y lo indexa en memoria, reutilizando el índice de las páginas ya consultadas.
+    3) Usa búsqueda de máxima relevancia marginal con la consulta de búsqueda para recuperar los fragmentos más relevantes entre todas las fuentes.
+
+    Prefiera esta herramienta a varias llamadas a web_rag_pipeline_tool cuando ya tenga la lista de enlaces (p. ej. de serper_dev_search_tool).
+
+    Retorna:
+      Una cadena con los mejores fragmentos, cada uno con su URL de origen, y la lista de URLs que no se pudieron cargar.""")
+def web_rag_multi_url_tool(website_urls: List[str], search_query: str) -> str:
+    urls = list(dict.fromkeys(url.strip() for url in website_urls if url and url.strip()))[:WEB_RAG_MAX_URLS]
+    if not urls:
+        return "No URLs were provided."
+
+    pages = _run_async(fetch_pages(urls))
+    failed = [f"- {url}: {error}" for url, text, error in pages if not text]
+
+    # Los fragmentos de las páginas no indexadas aún se embeben en una sola pasada
+    embeddings = create_embedding_model(model="text-embedding-3-small", chunk_size=256)
+    indexes = index_pages([(url, text) for url, text, _ in pages if text], embeddings)
+    num_chunks = sum(len(index.documents) for index in indexes)
+    print(f"Fetched {len(urls) - len(failed)}/{len(urls)} URLs, {num_chunks} chunks")
+    if not num_chunks:
+        return "Failed to load content from the URLs.\n" + "\n".join(failed)
+
     try:
-        final_docs = vector_store.max_marginal_relevance_search(
-            search_query, k=10
-        )
-        document_context = "\n\n".join(
-            f"Source: {doc.metadata.get('source', 'No URL available')}\nContent: {doc.page_content}"
-            for doc in final_docs
-        )
+        final_docs = mmr_search(indexes, embeddings.embed_query(search_query), k=10, fetch_k=30)
     except Exception as e:
         print(f"Error during vector search: {e}")
         return f"Error during vector search: {e}"
 
+    document_context = format_documents(final_docs)
+    if failed:
+        document_context += "\n\nURLs that could not be loaded:\n" + "\n".join(failed)
     return document_context
@@ -0,0 +1,125 @@
+import threading
+import time
+from typing import Any, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import MaxRetryError, ResponseError
+from urllib3.util.retry import Retry
+
+from src.config.configuration import (
+    HTTP_BACKOFF_FACTOR,
+    HTTP_CONNECT_TIMEOUT,
+    HTTP_MAX_RETRIES,
+    HTTP_POOL_CONNECTIONS,
+    HTTP_POOL_MAXSIZE,
+    HTTP_READ_TIMEOUT,
+    HTTP_RETRY_AFTER_MAX_SECONDS,
+    HTTP_RETRY_MAX_SECONDS,
+    RATE_GOVERNOR_ENABLED,
+)
+from src.utils.rate_governor import retry_after_seconds
+from src.utils.record_replay import RecordReplayAdapter, get_cassette_store
+
+# Errores transitorios que se reintentan con backoff exponencial (respetando Retry-After)
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+DEFAULT_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"
+
+
+class BoundedRetry(Retry):
+    """
+    `Retry` de urllib3 con límites de tiempo para no bloquear el hilo de una herramienta:
+    una respuesta cuyo Retry-After supera `retry_after_max` se retorna sin reintentar, y
+    los reintentos de una solicitud (esperas incluidas) se detienen cuando han pasado
+    `max_retry_seconds` desde su primer fallo.
+    """
+
+    def __init__(self, *args: Any, max_retry_seconds: float = HTTP_RETRY_MAX_SECONDS, first_failure_at: Optional[float] = None, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.max_retry_seconds = max_retry_seconds
+        self.first_failure_at = first_failure_at
+
+    def new(self, **kw: Any) -> "BoundedRetry":
+        kw.setdefault("max_retry_seconds", self.max_retry_seconds)
+        # `new` se llama en cada fallo: el primero fija el inicio del presupuesto de reintentos
+        kw.setdefault("first_failure_at", self.first_failure_at if self.first_failure_at is not None else time.monotonic())
+        return super().new(**kw)
+
+    def remaining_seconds(self) -> float:
+        if self.first_failure_at is None:
+            return self.max_retry_seconds
+        return self.max_retry_seconds - (time.monotonic() - self.first_failure_at)
+
+    def increment(self, method=None, url=None, response=None, error=None, _pool=None, _stacktrace=None) -> "BoundedRetry":
+        retry = super().increment(method, url, response=response, error=error, _pool=_pool, _stacktrace=_stacktrace)
+        retry_after = retry_after_seconds(response.headers) if response is not None and self.respect_retry_after_header else None
+        if retry_after is not None and retry_after > self.retry_after_max:
+            raise MaxRetryError(_pool, url, ResponseError(f"Retry-After of {retry_after:.0f}s exceeds {self.retry_after_max}s"))
+        if retry.remaining_seconds() <= max(retry.get_backoff_time(), retry_after or 0.0):
+            raise MaxRetryError(_pool, url, ResponseError(f"Retries exceeded {self.max_retry_seconds}s"))
+        return retry
+
+
+class PooledSession(requests.Session):
+    """
+    Sesión de `requests` compartida por las herramientas de investigación.
+
+    Mantiene conexiones keep-alive por host (hasta `pool_maxsize` por host, suficiente
+    para el ancho de los fan-outs con `Send`), aplica timeouts de conexión/lectura por
+    defecto a toda solicitud que no indique uno y reintenta con backoff los errores de
+    conexión y las respuestas 429/5xx, con esperas y tiempo total de reintentos acotados
+    (`BoundedRetry`). Con el regulador de tráfico activo las respuestas 429/5xx no se
+    reintentan aquí: cada intento debe pasar por el regulador, que aplaza el dominio
+    saturado. Con RECORD_REPLAY_MODE activo las respuestas se graban en (o se
+    reproducen desde) el cassette.
+    """
+
+    def __init__(
+        self,
+        pool_connections: int = HTTP_POOL_CONNECTIONS,
+        pool_maxsize: int = HTTP_POOL_MAXSIZE,
+        max_retries: int = HTTP_MAX_RETRIES,
+        backoff_factor: float = HTTP_BACKOFF_FACTOR,
+        timeout: tuple = (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT),
+        retry_statuses: bool = not RATE_GOVERNOR_ENABLED,
+    ):
+        super().__init__()
+        self.timeout = timeout
+        retry = BoundedRetry(
+            total=max_retries,
+            connect=max_retries,
+            read=max_retries,
+            status=max_retries if retry_statuses else 0,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUS_CODES if retry_statuses else None,
+            # La búsqueda de Serper (POST) es idempotente y también se reintenta
+            allowed_methods=frozenset({"HEAD", "GET", "POST"}),
+            respect_retry_after_header=True,
+            retry_after_max=HTTP_RETRY_AFTER_MAX_SECONDS,
+            raise_on_status=False,
+        )
+        store = get_cassette_store()
+        if store is not None:
+            adapter = RecordReplayAdapter(store, pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=retry)
+        else:
+            adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=retry)
+        self.mount("https://", adapter)
+        self.mount("http://", adapter)
+        self.headers["User-Agent"] = DEFAULT_USER_AGENT
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        return super().request(method, url, **kwargs)
+
+
+_session: Optional[PooledSession] = None
+_session_lock = threading.Lock()
+
+
+def get_http_session() -> PooledSession:
+    """Retorna la sesión HTTP con pool de conexiones compartida por todo el proceso."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = PooledSession()
+        return _session
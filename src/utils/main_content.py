@@ -0,0 +1,225 @@
+import re
+from typing import List, Optional
+
+from bs4 import BeautifulSoup, NavigableString, Tag
+from bs4.element import Comment
+
+# Elementos que nunca aportan contenido
+_DROP_TAGS = ("script", "style", "noscript", "template", "svg", "canvas", "iframe", "object", "embed", "button", "select", "input", "textarea", "nav", "footer", "aside", "dialog")
+# Tokens de id/class/role típicos de menús, banners de cookies, barras laterales y pies
+# de página. Cada token del atributo se compara completo o como prefijo ("sidebar",
+# "sidebar-left", "menu_principal"), nunca como subcadena: "has-sidebar" o
+# "desarrollo-social" no son plantilla.
+_BOILERPLATE_TOKENS = (
+    "cookie", "cookies", "consent", "gdpr", "banner", "navbar", "nav", "navigation", "menu", "breadcrumb",
+    "breadcrumbs", "migas", "sidebar", "footer", "header-top", "topbar", "social", "share", "compartir", "redes",
+    "newsletter", "suscribete", "subscribe", "popup", "modal", "advert", "ads", "publicidad", "related",
+    "relacionados", "relacionadas", "comments", "comentarios", "skip-link", "login", "search", "buscador",
+    "site-header", "site-footer", "main-menu", "main-nav", "top-bar",
+)
+_BOILERPLATE_RE = re.compile(
+    r"^(?:" + "|".join(re.escape(token) for token in _BOILERPLATE_TOKENS) + r")(?:[-_].*)?$",
+    re.IGNORECASE,
+)
+# Un nodo marcado como plantilla se conserva si tiene al menos esta fracción del texto de
+# la página, o si es texto corrido (poca densidad de enlaces) más largo que un aviso
+_DOMINANT_TEXT_RATIO = 0.5
+_LOW_LINK_DENSITY = 0.3
+_NOTICE_MAX_CHARS = 300
+# Contenedores que no se eliminan aunque su id/class coincida con el patrón anterior
+_PROTECTED_TAGS = ("html", "body", "main", "article")
+_HEADINGS = {"h1": 1, "h2": 2, "h3": 3, "h4": 4, "h5": 5, "h6": 6}
+_BLOCK_TAGS = {
+    "p", "div", "section", "article", "main", "header", "blockquote", "pre", "ul", "ol", "li", "dl", "dt", "dd",
+    "figure", "figcaption", "address", "center", "details", "summary", "table", "tr", "td", "th", "tbody", "thead", "tfoot",
+    "caption", "br", "hr",
+}
+# Elementos cuyo texto puntúa a su contenedor (algoritmo tipo Readability)
+_SCORED_TAGS = ("p", "pre", "td", "blockquote", "li", "dd")
+_LIST_CONTAINERS = ("ul", "ol", "div", "section", "dl", "table")
+_WHITESPACE_RE = re.compile(r"[ \t\r\f\v\xa0]+")
+_CLASS_ATTRS = ("id", "class", "role", "aria-label")
+
+
+def _text(node: Tag) -> str:
+    return _WHITESPACE_RE.sub(" ", node.get_text(" ")).strip()
+
+
+def _contains(ancestor: Tag, node: Tag) -> bool:
+    return any(parent is ancestor for parent in node.parents)
+
+
+def link_density(node: Tag) -> float:
+    """Fracción del texto de `node` que está dentro de enlaces."""
+    text_length = len(_text(node))
+    if not text_length:
+        return 0.0
+    return sum(len(_text(link)) for link in node.find_all("a")) / text_length
+
+
+def _descriptor_tokens(node: Tag) -> List[str]:
+    tokens = []
+    for attr in _CLASS_ATTRS:
+        value = node.get(attr)
+        if value:
+            tokens.extend(value if isinstance(value, list) else str(value).split())
+    return tokens
+
+
+def _is_boilerplate(node: Tag) -> bool:
+    return any(_BOILERPLATE_RE.match(token) for token in _descriptor_tokens(node))
+
+
+def _carries_content(node: Tag, page_chars: int) -> bool:
+    """Un nodo con la mayor parte del texto de la página, o con texto corrido largo, no es plantilla."""
+    text_length = len(_text(node))
+    if page_chars and text_length >= _DOMINANT_TEXT_RATIO * page_chars:
+        return True
+    return text_length > _NOTICE_MAX_CHARS and link_density(node) < _LOW_LINK_DENSITY
+
+
+def _remove_boilerplate(soup: BeautifulSoup, page_chars: int) -> None:
+    for comment in soup.find_all(string=lambda text: isinstance(text, Comment)):
+        comment.extract()
+    for node in soup.find_all(_DROP_TAGS):
+        node.decompose()
+    # Formularios de búsqueda o contacto; los sitios ASP.NET envuelven toda la página en un <form>
+    for node in soup.find_all("form"):
+        if not node.decomposed and len(_text(node)) < 200:
+            node.decompose()
+    for node in soup.find_all(True):
+        if node.decomposed or node.name in _PROTECTED_TAGS:
+            continue
+        # Encabezados de sitio (logo + menú), no los <header> de un artículo
+        if node.name == "header" and node.find_parent("article") is None:
+            if not _carries_content(node, page_chars):
+                node.decompose()
+            continue
+        if _is_boilerplate(node) and not node.find(("article", "main")) and not _carries_content(node, page_chars):
+            node.decompose()
+
+
+def _score_candidates(root: Tag) -> Optional[Tag]:
+    """
+    Contenedor con más texto corrido: cada párrafo suma a su padre y la mitad a su
+    abuelo según su largo y número de comas; el puntaje final se penaliza por la
+    densidad de enlaces del contenedor.
+    """
+    scores = {}
+    nodes = {}
+    for paragraph in root.find_all(_SCORED_TAGS):
+        text = _text(paragraph)
+        if len(text) < 25:
+            continue
+        score = 1 + text.count(",") + min(len(text) // 100, 3)
+        for ancestor, weight in ((paragraph.parent, 1.0), (paragraph.parent.parent if paragraph.parent else None, 0.5)):
+            if isinstance(ancestor, Tag):
+                nodes[id(ancestor)] = ancestor
+                scores[id(ancestor)] = scores.get(id(ancestor), 0.0) + score * weight
+    if not scores:
+        return None
+    best = max(scores, key=lambda key: scores[key] * (1 - link_density(nodes[key])))
+    return nodes[best]
+
+
+def _table_lines(table: Tag) -> List[str]:
+    """Filas de una tabla de datos como líneas "celda | celda"."""
+    lines = []
+    caption = table.find("caption")
+    if caption is not None and _text(caption):
+        lines.append(_text(caption))
+    for row in table.find_all("tr"):
+        cells = [_text(cell) for cell in row.find_all(("th", "td"), recursive=False)]
+        if any(cells):
+            lines.append(" | ".join(cells))
+    return lines
+
+
+def _is_layout_table(table: Tag) -> bool:
+    """Tablas usadas para maquetar (anidadas o de una sola columna) se recorren como bloques."""
+    if table.find("table") is not None:
+        return True
+    rows = table.find_all("tr")
+    return not rows or max(len(row.find_all(("th", "td"), recursive=False)) for row in rows) <= 1
+
+
+def _render(node: Tag, blocks: List[str]) -> None:
+    """Recorre `node` y agrega sus bloques de texto (títulos, párrafos, ítems, filas) en orden."""
+    inline: List[str] = []
+
+    def flush() -> None:
+        text = _WHITESPACE_RE.sub(" ", " ".join(inline)).strip()
+        inline.clear()
+        if text:
+            blocks.append(text)
+
+    for child in node.children:
+        if isinstance(child, NavigableString):
+            inline.append(str(child))
+            continue
+        if not isinstance(child, Tag):
+            continue
+        if child.name in _HEADINGS:
+            flush()
+            heading = _text(child)
+            if heading:
+                blocks.append(f"{'#' * _HEADINGS[child.name]} {heading}")
+        elif child.name == "table" and not _is_layout_table(child):
+            flush()
+            blocks.append("\n".join(_table_lines(child)))
+        elif child.name in _BLOCK_TAGS:
+            flush()
+            # Listas de enlaces cortas dentro del contenido (menús locales, etiquetas, "ver también")
+            if child.name in _LIST_CONTAINERS and link_density(child) > 0.5 and len(_text(child)) < 300:
+                continue
+            if child.name == "li":
+                item = []
+                _render(child, item)
+                if item:
+                    blocks.append("- " + "\n".join(item))
+            else:
+                _render(child, blocks)
+        else:
+            inline.append(child.get_text(" "))
+    flush()
+
+
+def extract_main_content(html: bytes | str, min_chars: int = 200, min_ratio: float = 0.1) -> str:
+    """
+    Texto del contenido principal de una página HTML, sin menús, banners de cookies,
+    barras laterales ni pies de página. Se eliminan primero los elementos de plantilla
+    (por etiqueta o por id/class), luego se elige el contenedor con mayor densidad de
+    texto y menor densidad de enlaces, y se conservan sus títulos (como "# Título"), las
+    filas de tablas de datos ("celda | celda") y los ítems de listas. Los bloques se
+    separan con una línea en blanco para que el splitter corte en sus bordes.
+
+    Si el contenido principal resulta más corto que `min_chars` (páginas índice,
+    formularios, fichas cortas) o que la fracción `min_ratio` del texto visible de la
+    página (la extracción perdió el cuerpo), se retorna el texto visible de toda la página.
+    """
+    soup = BeautifulSoup(html, "html.parser")
+    for node in soup.find_all(("script", "style", "noscript", "template")):
+        node.decompose()
+    root = soup.body or soup
+    full_text = _WHITESPACE_RE.sub(" ", root.get_text(" ")).strip()
+    _remove_boilerplate(soup, len(full_text))
+
+    candidate = soup.find("main") or soup.find(attrs={"role": "main"})
+    if candidate is None or len(_text(candidate)) < min_chars:
+        candidate = _score_candidates(root)
+        articles = root.find_all("article")
+        if len(articles) == 1 and (candidate is None or _contains(candidate, articles[0])):
+            candidate = articles[0]
+    if candidate is None:
+        candidate = root
+
+    blocks: List[str] = []
+    # El título principal suele estar fuera del contenedor del cuerpo del texto
+    title = soup.find("h1")
+    if title is not None and not _contains(candidate, title) and _text(title):
+        blocks.append(f"# {_text(title)}")
+    _render(candidate, blocks)
+    text = "\n\n".join(blocks)
+    if len(text) < min(min_chars, len(full_text)) or len(text) < min_ratio * len(full_text):
+        return full_text
+    return text
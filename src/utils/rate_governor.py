@@ -0,0 +1,282 @@
+import asyncio
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from typing import Dict, Mapping, Optional, Tuple
+from urllib.parse import urlsplit
+
+from src.config.configuration import (
+    RATE_DOMAIN_MAX_CONCURRENCY,
+    RATE_DOMAIN_MIN_INTERVAL_SECONDS,
+    RATE_GLOBAL_BURST,
+    RATE_GLOBAL_RPS,
+    RATE_GOVERNOR_ENABLED,
+    RATE_MAX_WAIT_SECONDS,
+    RATE_THROTTLE_BACKOFF_SECONDS,
+    RATE_THROTTLE_MAX_PAUSE_SECONDS,
+    SERPER_MAX_CONCURRENCY,
+)
+
+# Códigos con los que un servidor indica que se le está saturando
+THROTTLE_STATUS_CODES = (429, 503)
+# Límites propios por dominio: (solicitudes simultáneas, segundos mínimos entre inicios)
+DEFAULT_DOMAIN_LIMITS = {
+    # API de pago pensada para concurrencia: sin pausa de cortesía
+    "google.serper.dev": (SERPER_MAX_CONCURRENCY, 0.0),
+}
+
+
+class ThrottledError(RuntimeError):
+    """La solicitud tendría que esperar en cola más de `max_wait` segundos (dominio saturado)."""
+
+
+def domain_of(url: str) -> str:
+    return (urlsplit(url).hostname or "").lower()
+
+
+def retry_after_seconds(headers: Optional[Mapping[str, str]]) -> Optional[float]:
+    """Segundos indicados en Retry-After (en segundos o como fecha HTTP), o None."""
+    value = (headers or {}).get("Retry-After")
+    if not value:
+        return None
+    if value.strip().isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """
+    Token bucket con reservas: `reserve()` descuenta un token (aunque el saldo quede
+    negativo) y retorna cuánto debe esperar el llamador, de modo que el mismo bucket
+    sirve a código síncrono (time.sleep) y asíncrono (asyncio.sleep).
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+
+@dataclass
+class _DomainState:
+    max_concurrency: int
+    min_interval: float
+    active: int = 0
+    next_start: float = 0.0
+    requests: int = 0
+    throttled: int = 0
+    rejected: int = 0
+    wait_total: float = 0.0
+    wait_max: float = 0.0
+    condition: threading.Condition = field(default_factory=threading.Condition)
+
+
+class RateGovernor:
+    """
+    Regulador de tráfico de las herramientas de investigación compartido por todo el
+    proceso, para que los fan-outs con `Send` no disparen ráfagas contra Serper y los
+    mismos portales institucionales.
+
+    Cada solicitud pasa por tres controles antes de salir:
+
+    - un token bucket global (`global_rps` solicitudes por segundo, ráfagas de `burst`);
+    - un máximo de solicitudes simultáneas por dominio;
+    - una pausa de cortesía mínima entre inicios de solicitudes al mismo dominio.
+
+    Una respuesta 429/503 aplaza las siguientes solicitudes a ese dominio según
+    Retry-After (o `throttle_backoff` segundos), con a lo sumo `max_throttle_pause`
+    segundos. Ninguna solicitud espera en cola más de `max_wait` segundos: si le
+    correspondería esperar más, `acquire` lanza ThrottledError de inmediato. Se registran,
+    por dominio, solicitudes, respuestas de saturación, rechazos y tiempo de espera en cola.
+
+    Los reintentos de respuestas 429/5xx de la sesión HTTP compartida se desactivan
+    mientras el regulador está activo, para que cada intento pase por él.
+    """
+
+    def __init__(
+        self,
+        global_rps: float = RATE_GLOBAL_RPS,
+        burst: int = RATE_GLOBAL_BURST,
+        domain_max_concurrency: int = RATE_DOMAIN_MAX_CONCURRENCY,
+        domain_min_interval: float = RATE_DOMAIN_MIN_INTERVAL_SECONDS,
+        throttle_backoff: float = RATE_THROTTLE_BACKOFF_SECONDS,
+        max_throttle_pause: float = RATE_THROTTLE_MAX_PAUSE_SECONDS,
+        max_wait: float = RATE_MAX_WAIT_SECONDS,
+        domain_limits: Optional[Dict[str, Tuple[int, float]]] = None,
+    ):
+        self.bucket = TokenBucket(global_rps, burst)
+        self.domain_max_concurrency = domain_max_concurrency
+        self.domain_min_interval = domain_min_interval
+        self.throttle_backoff = throttle_backoff
+        self.max_throttle_pause = max_throttle_pause
+        self.max_wait = max_wait
+        self.domain_limits = dict(DEFAULT_DOMAIN_LIMITS if domain_limits is None else domain_limits)
+        self._domains: Dict[str, _DomainState] = {}
+        self._lock = threading.Lock()
+
+    def _domain(self, domain: str) -> _DomainState:
+        with self._lock:
+            state = self._domains.get(domain)
+            if state is None:
+                max_concurrency, min_interval = self.domain_limits.get(
+                    domain, (self.domain_max_concurrency, self.domain_min_interval)
+                )
+                state = self._domains[domain] = _DomainState(max_concurrency, min_interval)
+            return state
+
+    def acquire(self, url: str) -> float:
+        """
+        Bloquea hasta que `url` pueda solicitarse; retorna los segundos esperados en cola.
+        Lanza ThrottledError si la espera superaría `max_wait` segundos.
+        """
+        domain = domain_of(url)
+        state = self._domain(domain)
+        start = time.monotonic()
+        deadline = start + self.max_wait
+        with state.condition:
+            while state.active >= state.max_concurrency:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    state.rejected += 1
+                    raise ThrottledError(f"No free slot for {domain} after {self.max_wait:.0f}s")
+                state.condition.wait(remaining)
+            now = time.monotonic()
+            # Turno de inicio dentro del dominio (pausa de cortesía o aplazamiento por saturación)
+            start_at = max(now, state.next_start)
+            if start_at > deadline:
+                state.rejected += 1
+                # El cupo sigue libre: se pasa el aviso a otra solicitud en espera
+                state.condition.notify()
+                raise ThrottledError(f"{domain} is throttled for another {start_at - now:.0f}s")
+            state.active += 1
+            state.next_start = start_at + state.min_interval
+        delay = max(start_at - now, self.bucket.reserve())
+        if delay > 0:
+            time.sleep(delay)
+        waited = time.monotonic() - start
+        with state.condition:
+            state.requests += 1
+            state.wait_total += waited
+            state.wait_max = max(state.wait_max, waited)
+        return waited
+
+    def release(self, url: str, status_code: Optional[int] = None, headers: Optional[Mapping[str, str]] = None) -> None:
+        """Libera el cupo de `url`; una respuesta de saturación aplaza el dominio."""
+        state = self._domain(domain_of(url))
+        with state.condition:
+            state.active -= 1
+            if status_code in THROTTLE_STATUS_CODES:
+                state.throttled += 1
+                pause = retry_after_seconds(headers)
+                pause = min(pause if pause is not None else self.throttle_backoff, self.max_throttle_pause)
+                state.next_start = max(state.next_start, time.monotonic() + pause)
+            state.condition.notify()
+
+    @contextmanager
+    def slot(self, url: str):
+        """
+        Cupo para una solicitud síncrona a `url`. El bloque puede registrar el código de
+        respuesta con `ticket["status"] = ...` (y `ticket["headers"]`) para el control de saturación.
+        """
+        ticket = {"status": None, "headers": None}
+        self.acquire(url)
+        try:
+            yield ticket
+        finally:
+            self.release(url, ticket["status"], ticket["headers"])
+
+    @asynccontextmanager
+    async def aslot(self, url: str):
+        """
+        Variante asíncrona de `slot`. La espera se hace en un hilo porque el regulador es
+        compartido entre event loops (cada herramienta puede correr el suyo) y sus
+        primitivas son de `threading`.
+        """
+        ticket = {"status": None, "headers": None}
+        acquiring = asyncio.ensure_future(asyncio.to_thread(self.acquire, url))
+        try:
+            await asyncio.shield(acquiring)
+        except asyncio.CancelledError:
+            # El hilo sigue esperando el cupo aunque la tarea se cancele: se libera al obtenerlo
+            acquiring.add_done_callback(lambda future: self._release_acquired(url, future))
+            raise
+        try:
+            yield ticket
+        finally:
+            self.release(url, ticket["status"], ticket["headers"])
+
+    def _release_acquired(self, url: str, future: "asyncio.Future[float]") -> None:
+        if not future.cancelled() and future.exception() is None:
+            self.release(url)
+
+    def stats(self) -> dict:
+        with self._lock:
+            domains = dict(self._domains)
+        per_domain = {}
+        for domain, state in domains.items():
+            with state.condition:
+                per_domain[domain] = {
+                    "requests": state.requests,
+                    "active": state.active,
+                    "throttled": state.throttled,
+                    "rejected": state.rejected,
+                    "wait_total": state.wait_total,
+                    "wait_mean": state.wait_total / state.requests if state.requests else 0.0,
+                    "wait_max": state.wait_max,
+                }
+        requests = sum(domain["requests"] for domain in per_domain.values())
+        wait_total = sum(domain["wait_total"] for domain in per_domain.values())
+        return {
+            "requests": requests,
+            "throttled": sum(domain["throttled"] for domain in per_domain.values()),
+            "rejected": sum(domain["rejected"] for domain in per_domain.values()),
+            "wait_total": wait_total,
+            "wait_mean": wait_total / requests if requests else 0.0,
+            "wait_max": max((domain["wait_max"] for domain in per_domain.values()), default=0.0),
+            "domains": per_domain,
+        }
+
+
+class _NoopGovernor:
+    """Regulador desactivado (RATE_GOVERNOR_ENABLED=false): mismos métodos, sin esperas."""
+
+    @contextmanager
+    def slot(self, url: str):
+        yield {"status": None, "headers": None}
+
+    @asynccontextmanager
+    async def aslot(self, url: str):
+        yield {"status": None, "headers": None}
+
+    def stats(self) -> dict:
+        return {"requests": 0, "throttled": 0, "rejected": 0, "wait_total": 0.0, "wait_mean": 0.0, "wait_max": 0.0, "domains": {}}
+
+
+_governor: Optional[RateGovernor] = None
+_governor_lock = threading.Lock()
+
+
+def get_rate_governor() -> RateGovernor:
+    """Retorna el regulador de tráfico compartido por todo el proceso."""
+    global _governor
+    with _governor_lock:
+        if _governor is None:
+            _governor = RateGovernor() if RATE_GOVERNOR_ENABLED else _NoopGovernor()
+        return _governor
@@ -0,0 +1,416 @@
+import hashlib
+import io
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Mapping, Optional, Tuple
+
+import httpx
+import requests
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.embeddings import Embeddings
+from langchain_core.globals import set_llm_cache
+from langchain_core.load import dumps, loads
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from src.config.configuration import (
+    RECORD_REPLAY_CASSETTE,
+    RECORD_REPLAY_MODE,
+    RECORD_REPLAY_STRICT,
+    TEMP_UPLOADS_DIR,
+    VECTORSTORE_DIR,
+    WEB_FETCH_MAX_BYTES,
+)
+
+RECORD_REPLAY_MODES = ("off", "record", "replay")
+# Encabezados que cambian la respuesta y por eso forman parte de la llave de una solicitud
+_KEY_HEADERS = ("If-None-Match", "If-Modified-Since", "Range", "Accept")
+# El cuerpo se guarda ya decodificado; estos encabezados ya no lo describirían
+_DROP_RESPONSE_HEADERS = {"content-encoding", "transfer-encoding", "content-length"}
+# Credenciales de relleno para reproducir sin red ni llaves reales
+_REPLAY_API_KEYS = ("OPENAI_API_KEY", "GOOGLE_API_KEY", "SERPER_API_KEY")
+_CHUNK_BYTES = 64 * 1024
+# Fecha y hora que apply_prompt_template inserta en los prompts (CURRENT_TIME)
+_PROMPT_TIME_RE = re.compile(
+    r"\b(?:Mon|Tue|Wed|Thu|Fri|Sat|Sun) (?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec) \d{2} \d{4} \d{2}:\d{2}:\d{2}(?: [+-]\d{4})?"
+)
+
+
+class CassetteMissError(RuntimeError):
+    """En modo replay estricto, una llamada externa no tiene respuesta grabada en el cassette."""
+
+
+def _hash(*parts: Any) -> str:
+    return hashlib.sha256(json.dumps(parts, ensure_ascii=False, default=str).encode("utf-8")).hexdigest()
+
+
+def _body_bytes(body: Any) -> bytes:
+    if body is None:
+        return b""
+    if isinstance(body, str):
+        return body.encode("utf-8")
+    if isinstance(body, (bytes, bytearray)):
+        return bytes(body)
+    raise TypeError(f"Unsupported request body for record/replay: {type(body).__name__}")
+
+
+def http_key(method: str, url: str, headers: Mapping[str, str], body: bytes) -> str:
+    """Llave de una solicitud HTTP: método, URL, encabezados condicionales y sha256 del cuerpo."""
+    relevant = {name: headers.get(name) for name in _KEY_HEADERS if headers.get(name)}
+    return _hash("http", method.upper(), url, relevant, hashlib.sha256(body).hexdigest())
+
+
+def _read_bounded(chunks: Iterator[bytes], max_bytes: int) -> bytes:
+    """
+    Lee el cuerpo en streaming hasta `max_bytes` + 1 bytes: se graba lo suficiente para que
+    el consumidor (BoundedDownload) rechace la respuesta igual que sin cassette, sin
+    cargar en memoria un archivo de cientos de MB.
+    """
+    body = bytearray()
+    for chunk in chunks:
+        body += chunk
+        if len(body) > max_bytes:
+            break
+    return bytes(body[:max_bytes + 1])
+
+
+async def _aread_bounded(chunks: AsyncIterator[bytes], max_bytes: int) -> bytes:
+    body = bytearray()
+    async for chunk in chunks:
+        body += chunk
+        if len(body) > max_bytes:
+            break
+    return bytes(body[:max_bytes + 1])
+
+
+def _stored_headers(headers: Mapping[str, str], body: bytes) -> dict:
+    stored = {name: value for name, value in headers.items() if name.lower() not in _DROP_RESPONSE_HEADERS}
+    stored["Content-Length"] = str(len(body))
+    return stored
+
+
+class CassetteStore:
+    """
+    Cassette (SQLite) con las interacciones externas de una ejecución: respuestas HTTP
+    (status, encabezados y cuerpo exacto), vectores de embeddings por texto y
+    generaciones de LLM. Cada entrada se indexa por el sha256 de su solicitud, por lo
+    que el orden de las llamadas (fan-outs en paralelo) no afecta la reproducción.
+
+    Modos:
+    - "record": toda llamada va a la red y su respuesta se graba (reemplaza la anterior).
+    - "replay": las llamadas se responden desde el cassette; una llamada sin grabar lanza
+      CassetteMissError si `strict`, o va a la red y se graba si no.
+    """
+
+    def __init__(self, path: Path | str, mode: str = RECORD_REPLAY_MODE, strict: bool = RECORD_REPLAY_STRICT):
+        if mode not in RECORD_REPLAY_MODES or mode == "off":
+            raise ValueError(f"Unsupported record/replay mode: {mode}")
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.mode = mode
+        self.strict = strict
+        self.recorded = 0
+        self.replayed = 0
+        self.missed = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path.as_posix(), check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS interactions (
+                key TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                request TEXT NOT NULL,
+                response BLOB NOT NULL,
+                recorded_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.commit()
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            row = self._conn.execute("SELECT response FROM interactions WHERE key = ?", (key,)).fetchone()
+        return row[0] if row is not None else None
+
+    def put(self, key: str, kind: str, request: dict, response: bytes) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO interactions (key, kind, request, response, recorded_at) VALUES (?, ?, ?, ?, ?)",
+                (key, kind, json.dumps(request, ensure_ascii=False, default=str), response, time.time()),
+            )
+            self._conn.commit()
+            self.recorded += 1
+
+    def replay(self, key: str, description: str) -> Optional[bytes]:
+        """Respuesta grabada de `key` en modo replay; None si hay que ir a la red (record o miss no estricto)."""
+        if not self.replaying:
+            return None
+        response = self.get(key)
+        with self._lock:
+            if response is not None:
+                self.replayed += 1
+                return response
+            self.missed += 1
+        if self.strict:
+            raise CassetteMissError(f"No recorded response in {self.path} for {description}")
+        return None
+
+    def stats(self) -> dict:
+        with self._lock:
+            rows = self._conn.execute("SELECT kind, COUNT(*) FROM interactions GROUP BY kind").fetchall()
+            return {
+                "mode": self.mode,
+                "strict": self.strict,
+                "entries": dict(rows),
+                "recorded": self.recorded,
+                "replayed": self.replayed,
+                "missed": self.missed,
+            }
+
+
+def _encode_http(status: int, reason: str, headers: Mapping[str, str], body: bytes) -> bytes:
+    meta = json.dumps({"status": status, "reason": reason, "headers": dict(headers)}).encode("utf-8")
+    return len(meta).to_bytes(4, "big") + meta + body
+
+
+def _decode_http(blob: bytes) -> Tuple[int, str, dict, bytes]:
+    size = int.from_bytes(blob[:4], "big")
+    meta = json.loads(blob[4:4 + size].decode("utf-8"))
+    return meta["status"], meta["reason"], meta["headers"], blob[4 + size:]
+
+
+# --- requests ---
+class RecordReplayAdapter(HTTPAdapter):
+    """
+    HTTPAdapter de `requests` que graba o reproduce cada respuesta (incluidos los saltos de
+    redirección). Al grabar, el cuerpo se lee en streaming hasta `max_bytes`.
+    """
+
+    def __init__(self, store: CassetteStore, max_bytes: int = WEB_FETCH_MAX_BYTES, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.store = store
+        self.max_bytes = max_bytes
+
+    def send(self, request: requests.PreparedRequest, stream: bool = False, **kwargs: Any) -> requests.Response:
+        body = _body_bytes(request.body)
+        key = http_key(request.method, request.url, request.headers, body)
+        blob = self.store.replay(key, f"{request.method} {request.url}")
+        if blob is not None:
+            return self._replayed_response(request, *_decode_http(blob))
+
+        response = super().send(request, stream=True, **kwargs)
+        try:
+            content = _read_bounded(response.iter_content(_CHUNK_BYTES), self.max_bytes)
+        finally:
+            response.close()
+        status, reason, headers = response.status_code, response.reason or "", _stored_headers(response.headers, content)
+        self.store.put(key, "http", {"method": request.method, "url": request.url}, _encode_http(status, reason, headers, content))
+        # Se retorna lo mismo que se reproducirá: grabar y reproducir se comportan igual
+        return self._replayed_response(request, status, reason, headers, content)
+
+    def _replayed_response(self, request: requests.PreparedRequest, status: int, reason: str, headers: dict, body: bytes) -> requests.Response:
+        response = requests.Response()
+        response.status_code = status
+        response.reason = reason
+        response.headers = CaseInsensitiveDict(headers)
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        response.raw = io.BytesIO(body)
+        response._content = body
+        response._content_consumed = True
+        return response
+
+
+# --- httpx ---
+class RecordReplayTransport(httpx.AsyncBaseTransport):
+    """Transporte asíncrono de `httpx` que graba o reproduce las respuestas de `inner` (cuerpos hasta `max_bytes`)."""
+
+    def __init__(self, store: CassetteStore, inner: httpx.AsyncBaseTransport, max_bytes: int = WEB_FETCH_MAX_BYTES):
+        self.store = store
+        self.inner = inner
+        self.max_bytes = max_bytes
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        body = await request.aread()
+        key = http_key(request.method, str(request.url), request.headers, body)
+        blob = self.store.replay(key, f"{request.method} {request.url}")
+        if blob is None:
+            response = await self.inner.handle_async_request(request)
+            try:
+                # Respuesta a nivel de transporte: se decodifica igual que lo haría el cliente
+                decoded = httpx.Response(response.status_code, headers=response.headers, stream=response.stream)
+                content = await _aread_bounded(decoded.aiter_bytes(_CHUNK_BYTES), self.max_bytes)
+            finally:
+                await response.aclose()
+            reason = response.extensions.get("reason_phrase", b"").decode("ascii", "replace")
+            blob = _encode_http(response.status_code, reason, _stored_headers(response.headers, content), content)
+            self.store.put(key, "http", {"method": request.method, "url": str(request.url)}, blob)
+        status, _, headers, content = _decode_http(blob)
+        return httpx.Response(status, headers=headers, content=content, request=request)
+
+    async def aclose(self) -> None:
+        await self.inner.aclose()
+
+
+# --- Embeddings ---
+class RecordReplayEmbeddings(Embeddings):
+    """Envoltorio de un modelo de embeddings que graba o reproduce el vector de cada texto."""
+
+    def __init__(self, underlying: Embeddings, store: CassetteStore):
+        self.underlying = underlying
+        self.store = store
+        self.model = getattr(underlying, "model", type(underlying).__name__)
+        self.dimensions = getattr(underlying, "dimensions", None)
+
+    def _key(self, kind: str, text: str) -> str:
+        return _hash(kind, self.model, self.dimensions, text)
+
+    def _embed(self, kind: str, texts: List[str], embed: Callable[[List[str]], List[List[float]]]) -> List[List[float]]:
+        vectors: List[Optional[List[float]]] = [None] * len(texts)
+        for i, text in enumerate(texts):
+            blob = self.store.replay(self._key(kind, text), f"{kind} ({self.model}) of {text[:80]!r}")
+            if blob is not None:
+                vectors[i] = json.loads(blob)
+        missing = list(dict.fromkeys(text for text, vector in zip(texts, vectors) if vector is None))
+        if missing:
+            computed = dict(zip(missing, embed(missing)))
+            for text in missing:
+                self.store.put(self._key(kind, text), kind, {"model": self.model}, json.dumps(list(computed[text])).encode("utf-8"))
+            vectors = [vector if vector is not None else list(computed[text]) for text, vector in zip(texts, vectors)]
+        return vectors
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._embed("embedding", texts, self.underlying.embed_documents)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed("embedding_query", [text], lambda texts: [self.underlying.embed_query(texts[0])])[0]
+
+
+# --- LLM ---
+# Metadatos de los mensajes previos que no son parte de la conversación: LangChain marca
+# con total_cost=0 los mensajes respondidos desde la caché, y el uso de tokens varía
+_MESSAGE_METADATA_FIELDS = ("usage_metadata", "response_metadata")
+
+
+def _strip_message_metadata(prompt: str) -> str:
+    """Prompt de un chat model (mensajes serializados) sin metadatos de uso ni de respuesta."""
+    try:
+        messages = json.loads(prompt)
+    except json.JSONDecodeError:
+        return prompt
+    if not isinstance(messages, list):
+        return prompt
+    for message in messages:
+        kwargs = message.get("kwargs") if isinstance(message, dict) else None
+        if isinstance(kwargs, dict):
+            for name in _MESSAGE_METADATA_FIELDS:
+                kwargs.pop(name, None)
+    return json.dumps(messages, ensure_ascii=False, sort_keys=True)
+
+
+def default_path_roots() -> Dict[str, Path]:
+    """Directorios locales cuyas rutas aparecen en los prompts (stores, manifiestos, documentos)."""
+    return {"VECTORSTORE_DIR": VECTORSTORE_DIR, "TEMP_UPLOADS_DIR": TEMP_UPLOADS_DIR, "CWD": Path.cwd()}
+
+
+class RecordReplayLLMCache(BaseCache):
+    """
+    Caché global de LangChain (`set_llm_cache`) usada como cassette de LLM: en replay
+    responde las generaciones grabadas para (prompt, configuración del modelo); en
+    record nunca responde, de modo que toda llamada va al modelo y se graba.
+
+    Los prompts muestran rutas locales (vector stores, manifiestos de colecciones,
+    documentos cargados) y la hora de la ejecución. Para reproducir en otra máquina o en
+    otro directorio, la llave usa el prompt con esas rutas reemplazadas por el nombre de
+    su directorio raíz (`%VECTORSTORE_DIR%`, …), sin la hora y sin los metadatos de uso
+    de los mensajes anteriores. Las generaciones se graban con el mismo reemplazo y al
+    reproducirse las rutas se reescriben con los directorios locales, de modo que las
+    herramientas reciben rutas válidas. El namespace de almacenamiento es fijo mientras el
+    cassette está activo (RECORD_REPLAY_NAMESPACE), así que no depende del thread.
+    """
+
+    def __init__(self, store: CassetteStore, roots: Optional[Mapping[str, Path | str]] = None):
+        self.store = store
+        roots = default_path_roots() if roots is None else roots
+        self._placeholders: Dict[str, str] = {}
+        self._replacements: List[Tuple[str, str]] = []
+        for name, root in roots.items():
+            placeholder = f"%{name}%"
+            self._placeholders[placeholder] = Path(root).as_posix()
+            for form in {Path(root).as_posix(), Path(root).resolve().as_posix()}:
+                if len(form) > 1:
+                    self._replacements.append((form, placeholder))
+        # Primero los directorios más largos: VECTORSTORE_DIR suele estar dentro de TEMP_UPLOADS_DIR
+        self._replacements.sort(key=lambda item: len(item[0]), reverse=True)
+
+    def normalize(self, text: str) -> str:
+        """`text` con las rutas locales reemplazadas por el nombre de su directorio raíz."""
+        for form, placeholder in self._replacements:
+            text = text.replace(form, placeholder)
+        return text
+
+    def restore(self, text: str) -> str:
+        for placeholder, root in self._placeholders.items():
+            text = text.replace(placeholder, root)
+        return text
+
+    def _key(self, prompt: str, llm_string: str) -> str:
+        return _hash("llm", _PROMPT_TIME_RE.sub("%CURRENT_TIME%", self.normalize(_strip_message_metadata(prompt))), llm_string)
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        blob = self.store.replay(self._key(prompt, llm_string), f"LLM call {llm_string[:120]!r}")
+        if blob is None:
+            return None
+        return [loads(self.restore(generation)) for generation in json.loads(blob)]
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        blob = json.dumps([self.normalize(dumps(generation)) for generation in return_val]).encode("utf-8")
+        self.store.put(self._key(prompt, llm_string), "llm", {"llm": llm_string}, blob)
+
+    def clear(self, **kwargs: Any) -> None:
+        """Los cassettes no se borran desde la caché de LangChain."""
+
+
+_cassette_store: Optional[CassetteStore] = None
+_cassette_store_lock = threading.Lock()
+
+
+def get_cassette_store() -> Optional[CassetteStore]:
+    """Cassette compartido por todo el proceso, o None con RECORD_REPLAY_MODE=off."""
+    global _cassette_store
+    if RECORD_REPLAY_MODE == "off":
+        return None
+    with _cassette_store_lock:
+        if _cassette_store is None:
+            _cassette_store = CassetteStore(RECORD_REPLAY_CASSETTE)
+        return _cassette_store
+
+
+def install_record_replay() -> Optional[CassetteStore]:
+    """
+    Activa la grabación/reproducción de llamadas a LLM (caché global de LangChain). En
+    replay completa con valores de relleno las llaves de API ausentes, para poder
+    reproducir en una máquina sin credenciales. Las sesiones HTTP, los clientes httpx y
+    los modelos de embeddings consultan `get_cassette_store()` al crearse.
+    """
+    store = get_cassette_store()
+    if store is None:
+        return None
+    if store.replaying:
+        for name in _REPLAY_API_KEYS:
+            os.environ.setdefault(name, "replay")
+    set_llm_cache(RecordReplayLLMCache(store))
+    return store
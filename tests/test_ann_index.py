@@ -0,0 +1,29 @@
+import numpy as np
+
+from src.config.configuration import ANN_MIN_VECTORS, ANN_TARGET_RECALL
+from src.databases.ann_index import IVFIndex, should_build_ann
+
+
+def _clustered(n_vectors: int, dim: int, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    topics = rng.normal(size=(200, dim))
+    vectors = topics[rng.integers(0, len(topics), n_vectors)] + 1.5 * rng.normal(size=(n_vectors, dim))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+def test_calibrated_nprobe_reaches_target_recall_at_auto_threshold():
+    vectors = _clustered(ANN_MIN_VECTORS + 100, dim=32, seed=0)
+    matrix, queries = vectors[:ANN_MIN_VECTORS], vectors[ANN_MIN_VECTORS:]
+    assert should_build_ann("auto", len(matrix))
+
+    index = IVFIndex.build(matrix, n_iter=5)
+
+    assert index.params["calibrated_recall"] >= ANN_TARGET_RECALL
+    assert index.nprobe < index.params["n_lists"]
+    recalls = []
+    for query in queries:
+        exact = set(np.argpartition(-(matrix @ query), 9)[:10].tolist())
+        found = set(index.search(query, 10)[0].tolist())
+        recalls.append(len(exact & found) / 10)
+    # Consultas fuera de la muestra de calibración: margen para la varianza del muestreo
+    assert np.mean(recalls) >= ANN_TARGET_RECALL - 0.05
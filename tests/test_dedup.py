@@ -0,0 +1,53 @@
+from langchain_core.documents import Document
+
+from src.databases.dedup import ChunkDeduplicator
+
+
+def _filter(texts):
+    deduplicator = ChunkDeduplicator()
+    kept = list(deduplicator.filter(Document(page_content=text, metadata={"page": i}) for i, text in enumerate(texts)))
+    return kept, deduplicator.stats
+
+
+def test_chunks_que_solo_difieren_en_cifras_se_conservan():
+    texts = [
+        "Meta de producto 2024: aumentar la cobertura de asistencia técnica agropecuaria al 35% en 12 municipios del departamento.",
+        "Meta de producto 2027: aumentar la cobertura de asistencia técnica agropecuaria al 80% en 40 municipios del departamento.",
+    ]
+    kept, stats = _filter(texts)
+    assert [doc.page_content for doc in kept] == texts
+    assert stats.exact_duplicates == 0
+    assert stats.near_duplicates == 0
+
+
+def test_duplicados_exactos_ignoran_tildes_mayusculas_y_espacios():
+    kept, stats = _filter([
+        "Evaluación de la propuesta:  criterio técnico con 30 puntos.",
+        "evaluacion de la propuesta: criterio tecnico con 30 puntos.",
+    ])
+    assert len(kept) == 1
+    assert stats.exact_duplicates == 1
+    assert kept[0].metadata["duplicate_pages"] == [1]
+
+
+def test_casi_duplicados_con_las_mismas_cifras_se_descartan():
+    base = " ".join(f"palabra{i}" for i in range(60))
+    kept, stats = _filter([f"{base} total 2024", f"{base} final total 2024"])
+    assert len(kept) == 1
+    assert stats.near_duplicates == 1
+
+
+def test_encabezados_con_numero_de_pagina_se_eliminan():
+    temas = ["agricultura", "educación", "salud", "vías", "turismo", "vivienda"]
+    pages = [
+        Document(
+            page_content=f"Gobernación del Meta - Página {i}\n" + "\n".join(f"Diagnóstico de {tema}, párrafo {j}." for j in range(8)),
+            metadata={"page": i},
+        )
+        for i, tema in enumerate(temas, start=1)
+    ]
+    deduplicator = ChunkDeduplicator()
+    cleaned = list(deduplicator.strip_boilerplate(pages))
+    assert all("Gobernación" not in page.page_content for page in cleaned)
+    assert all(page.page_content.startswith("Diagnóstico de") for page in cleaned)
+    assert deduplicator.stats.boilerplate_lines == 6
@@ -0,0 +1,82 @@
+import os
+import shutil
+
+import pytest
+
+from src.databases.document_collections import DocumentCollections
+from src.databases.ingestion import IngestionResult
+from src.databases.vectorstore_registry import VectorStoreRegistry
+from src.databases.vectorstore_storage import VectorStoreStorage
+
+# Cuota holgada: con 0 la recolección expulsa de inmediato los stores sin referencias
+QUOTA_BYTES = 1 << 30
+
+
+class CountingBuild:
+    """`build` de prueba: escribe un store mínimo en `persist_path` y cuenta las llamadas."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, file_path: str, persist_path: str) -> IngestionResult:
+        self.calls.append(persist_path)
+        os.makedirs(persist_path, exist_ok=True)
+        with open(os.path.join(persist_path, "embeddings.npy"), "wb") as f:
+            f.write(b"\0" * 64)
+        return IngestionResult(texts=["chunk uno", "chunk dos"])
+
+
+@pytest.fixture
+def collections(tmp_path):
+    instance = DocumentCollections()
+    instance.registry = VectorStoreRegistry(tmp_path / "registry.json", tmp_path / "shared")
+    instance.storage = VectorStoreStorage(tmp_path, quota_bytes=QUOTA_BYTES)
+    return instance
+
+
+@pytest.fixture
+def document(tmp_path):
+    path = tmp_path / "plan_desarrollo.pdf"
+    path.write_bytes(b"%PDF-1.4 contenido de prueba")
+    return str(path)
+
+
+def test_same_file_and_params_reuse_the_store(collections, document, tmp_path):
+    build = CountingBuild()
+    params = {"chunk_size": 1000, "chunk_overlap": 200}
+    first = collections.get_or_create_store(document, params, build)
+
+    # Una ejecución posterior (otra instancia del registro sobre el mismo archivo) lo reutiliza
+    later_run = DocumentCollections()
+    later_run.registry = VectorStoreRegistry(tmp_path / "registry.json", tmp_path / "shared")
+    later_run.storage = VectorStoreStorage(tmp_path, quota_bytes=QUOTA_BYTES)
+    second = later_run.get_or_create_store(document, dict(params), build)
+
+    assert second == first
+    assert build.calls == [first]
+
+
+def test_changed_params_build_a_new_store(collections, document):
+    build = CountingBuild()
+    first = collections.get_or_create_store(document, {"chunk_size": 1000}, build)
+    second = collections.get_or_create_store(document, {"chunk_size": 500}, build)
+
+    assert second != first
+    assert build.calls == [first, second]
+    assert os.path.exists(first) and os.path.exists(second)
+
+
+def test_deleted_store_is_dropped_from_the_registry_and_rebuilt(collections, document):
+    build = CountingBuild()
+    params = {"chunk_size": 1000}
+    first = collections.get_or_create_store(document, params, build)
+    key = collections.registry.make_key(document, **params)
+
+    shutil.rmtree(first)
+    assert collections.registry.lookup(key) is None
+    assert key not in collections.registry._read()
+
+    rebuilt = collections.get_or_create_store(document, params, build)
+    assert len(build.calls) == 2
+    assert os.path.exists(rebuilt)
+    assert collections.registry.lookup(key) == rebuilt
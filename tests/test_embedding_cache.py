@@ -0,0 +1,67 @@
+import time
+
+from langchain_core.embeddings import Embeddings
+
+from src.databases.embedding_cache import CachedEmbeddings, EmbeddingCache
+
+
+class CountingEmbeddings(Embeddings):
+    """Modelo de prueba: registra los textos enviados y retorna vectores derivados de su longitud."""
+
+    def __init__(self, model: str = "text-embedding-3-small", dimensions=None):
+        self.model = model
+        self.dimensions = dimensions
+        self.requests = []
+
+    def embed_documents(self, texts):
+        self.requests.append(list(texts))
+        return [[float(len(text)), 1.0, 0.0, 0.5] for text in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+def test_missing_texts_reach_the_model_once_and_count_as_misses(tmp_path):
+    cache = EmbeddingCache(tmp_path / "embeddings.sqlite")
+    model = CountingEmbeddings()
+    embeddings = CachedEmbeddings(model, cache)
+
+    first = embeddings.embed_documents(["meta", "indicador", "meta"])
+    second = embeddings.embed_documents(["indicador", "meta", "línea base"])
+
+    assert model.requests == [["meta", "indicador"], ["línea base"]]
+    assert first == [[4.0, 1.0, 0.0, 0.5], [9.0, 1.0, 0.0, 0.5], [4.0, 1.0, 0.0, 0.5]]
+    assert second[:2] == first[1::-1]
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (2, 4, 3)
+
+
+def test_keys_differ_by_model_and_dimensions(tmp_path):
+    cache = EmbeddingCache(tmp_path / "embeddings.sqlite")
+    small = CountingEmbeddings("text-embedding-3-small")
+    reduced = CountingEmbeddings("text-embedding-3-small", dimensions=256)
+    large = CountingEmbeddings("text-embedding-3-large")
+
+    for model in (small, reduced, large, small):
+        CachedEmbeddings(model, cache).embed_query("objetivo general")
+
+    assert [len(model.requests) for model in (small, reduced, large)] == [1, 1, 1]
+    assert cache.stats()["entries"] == 3
+
+
+def test_lru_eviction_frees_down_to_ninety_percent_of_the_quota(tmp_path):
+    # Vectores de 4 floats: 16 bytes por entrada, cuota de 10 entradas
+    cache = EmbeddingCache(tmp_path / "embeddings.sqlite", max_bytes=160)
+    for i in range(10):
+        cache.put_many("m", None, [f"chunk {i}"], [[float(i)] * 4])
+        time.sleep(0.002)
+    cache.get_many("m", None, ["chunk 0"])
+    time.sleep(0.002)
+
+    cache.put_many("m", None, ["chunk 10"], [[10.0] * 4])
+
+    stats = cache.stats()
+    assert stats["bytes"] <= 0.9 * 160
+    assert (stats["entries"], stats["evictions"]) == (9, 2)
+    found = cache.get_many("m", None, ["chunk 0", "chunk 1", "chunk 2", "chunk 3", "chunk 10"])
+    assert [vector is not None for vector in found] == [True, False, False, True, True]
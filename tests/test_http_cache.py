@@ -0,0 +1,14 @@
+from src.databases.http_cache import HTTPCache
+
+URL = "https://portal.gov.co/plan"
+
+
+def test_only_successful_responses_are_stored(tmp_path):
+    cache = HTTPCache(tmp_path / "http.sqlite")
+    headers = {"Cache-Control": "max-age=600"}
+
+    cache.put(URL, "Página no encontrada", "text/html", headers, 404)
+    assert cache.get(URL) is None
+
+    cache.put(URL, "Plan de desarrollo", "text/html", headers, 200)
+    assert cache.get(URL).text == "Plan de desarrollo"
@@ -0,0 +1,62 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from src.utils.http_client import PooledSession
+
+
+class _Handler(BaseHTTPRequestHandler):
+    requests_seen = 0
+
+    def do_GET(self):
+        type(self).requests_seen += 1
+        retry_after = {"/dia": "86400", "/breve": "1"}.get(self.path)
+        self.send_response(429 if retry_after else 503)
+        if retry_after:
+            self.send_header("Retry-After", retry_after)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    _Handler.requests_seen = 0
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+
+
+def test_retry_after_mayor_al_maximo_no_se_reintenta(server):
+    start = time.monotonic()
+    response = PooledSession(max_retries=3, retry_statuses=True).get(f"{server}/dia")
+    assert response.status_code == 429
+    assert _Handler.requests_seen == 1
+    assert time.monotonic() - start < 2
+
+
+def test_retry_after_corto_se_respeta(server):
+    response = PooledSession(max_retries=1, retry_statuses=True).get(f"{server}/breve")
+    assert response.status_code == 429
+    assert _Handler.requests_seen == 2
+
+
+def test_reintentos_acotados_por_tiempo_total(server):
+    session = PooledSession(max_retries=10, backoff_factor=0.4, retry_statuses=True)
+    session.adapters["http://"].max_retries.max_retry_seconds = 1.0
+    start = time.monotonic()
+    response = session.get(f"{server}/error")
+    assert response.status_code == 503
+    assert time.monotonic() - start < 2
+    assert 1 < _Handler.requests_seen < 11
+
+
+def test_sin_reintentos_de_estado_cada_intento_pasa_por_el_regulador(server):
+    response = PooledSession(max_retries=3, retry_statuses=False).get(f"{server}/error")
+    assert response.status_code == 503
+    assert _Handler.requests_seen == 1
@@ -0,0 +1,40 @@
+import pypdf
+
+from src.config.configuration import MultiAgentConfiguration
+from src.databases.loaders import ParallelPDFLoader, _page_count, create_document_loader
+
+
+def _blank_pdf(path, pages: int) -> str:
+    writer = pypdf.PdfWriter()
+    for _ in range(pages):
+        writer.add_blank_page(width=200, height=200)
+    with open(path, "wb") as f:
+        writer.write(f)
+    return str(path)
+
+
+def test_page_count_reads_page_tree_count(tmp_path):
+    assert _page_count(_blank_pdf(tmp_path / "doc.pdf", 7)) == 7
+
+
+def test_parallel_loader_keeps_page_order_with_spawned_workers(tmp_path):
+    path = _blank_pdf(tmp_path / "doc.pdf", 40)
+    loader = ParallelPDFLoader(path, max_workers=2, min_pages=8, pages_per_task=16)
+    documents = list(loader.lazy_load())
+    assert [doc.metadata["page"] for doc in documents] == list(range(40))
+    assert {doc.metadata["total_pages"] for doc in documents} == {40}
+
+
+def test_runnable_config_selects_the_parallel_loader(tmp_path):
+    config = {"configurable": {"thread_id": "run-1", "pdf_loader": "parallel", "pdf_parallel_workers": 2}}
+    configuration = MultiAgentConfiguration.from_runnable_config(config)
+
+    loader = create_document_loader(
+        _blank_pdf(tmp_path / "doc.pdf", 2),
+        pdf_loader=configuration.pdf_loader,
+        pdf_parallel_workers=configuration.pdf_parallel_workers,
+    )
+
+    assert isinstance(loader, ParallelPDFLoader)
+    assert loader.max_workers == 2
+    assert MultiAgentConfiguration.from_runnable_config(None).pdf_loader == "sequential"
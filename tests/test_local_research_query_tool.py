@@ -0,0 +1,101 @@
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+import src.graph  # noqa: F401  (resuelve el import circular de src.tools)
+from src.databases.document_collections import DocumentCollections
+from src.databases.npy_vectorstore import NpyVectorStore
+from src.tools import local_research_query_tool as query_tool
+
+TEMAS = ["agua", "energía", "educación"]
+
+
+class KeywordEmbeddings(Embeddings):
+    """Embeddings de prueba: un eje por tema, según las palabras clave del texto."""
+
+    def __init__(self):
+        self.requests = []
+
+    def embed_documents(self, texts):
+        self.requests.append(list(texts))
+        vectors = []
+        for text in texts:
+            vector = np.array([float(tema in text.lower()) for tema in TEMAS] + [0.1], dtype=np.float32)
+            vectors.append((vector / np.linalg.norm(vector)).tolist())
+        return vectors
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+def _store(tmp_path, name, texts):
+    path = str(tmp_path / f"{name}.npystore")
+    NpyVectorStore.write(path, texts, np.asarray(KeywordEmbeddings().embed_documents(texts), dtype=np.float32))
+    return path
+
+
+def _stores(tmp_path, monkeypatch):
+    embeddings = KeywordEmbeddings()
+    monkeypatch.setattr(query_tool, "RETRIEVAL_MODE", "vector")
+    monkeypatch.setattr(query_tool, "load_vectorstore", lambda persist_path: NpyVectorStore(embeddings, persist_path))
+    plan = _store(tmp_path, "plan", ["Acueductos y agua potable rural", "Transición hacia energía solar"])
+    tdr = _store(tmp_path, "tdr", ["Proyectos de educación rural", "Requisitos de la convocatoria"])
+    return embeddings, plan, tdr
+
+
+def _sections(result):
+    return [section for section in result.split("#### QUERY: ") if section]
+
+
+def test_batch_query_groups_documents_by_query_with_their_store(tmp_path, monkeypatch):
+    embeddings, plan, tdr = _stores(tmp_path, monkeypatch)
+
+    result = query_tool.local_research_batch_query_tool.invoke(
+        {"queries": ["agua potable", "educación rural", " "], "persist_paths": [plan, tdr, ""]}
+    )
+
+    # Las consultas vacías se descartan y todas las demás van en una sola solicitud de embeddings
+    assert embeddings.requests == [["agua potable", "educación rural"]]
+    agua, educacion = _sections(result)
+    assert agua.startswith("agua potable\n\n")
+    assert f"==DOCUMENT 1 ({plan})==\nAcueductos y agua potable rural" in agua
+    assert educacion.startswith("educación rural\n\n")
+    assert f"==DOCUMENT 1 ({tdr})==\nProyectos de educación rural" in educacion
+    # Cada consulta recupera de ambos stores combinados
+    assert agua.count("==DOCUMENT ") == 4
+
+
+def test_batch_query_skips_missing_stores(tmp_path, monkeypatch):
+    _, plan, _ = _stores(tmp_path, monkeypatch)
+    missing = str(tmp_path / "recolectado.npystore")
+
+    result = query_tool.local_research_batch_query_tool.invoke({"queries": ["energía"], "persist_paths": [missing, plan]})
+    assert f"==DOCUMENT 1 ({plan})==\nTransición hacia energía solar" in result
+    assert missing not in result
+
+    result = query_tool.local_research_batch_query_tool.invoke({"queries": ["energía"], "persist_paths": [missing]})
+    assert result == "There is no provided documentation to search in."
+    result = query_tool.local_research_batch_query_tool.invoke({"queries": ["energía"], "persist_paths": [""]})
+    assert result == "There is no provided documentation to search in."
+
+
+def test_collections_query_labels_documents_with_their_collection(tmp_path, monkeypatch):
+    _, plan, tdr = _stores(tmp_path, monkeypatch)
+    manifest_path = str(tmp_path / "collections.json")
+    collections = DocumentCollections()
+    collections.add(manifest_path, "plan_desarrollo_nacional", plan)
+    collections.add(manifest_path, "tdr", tdr)
+
+    result = query_tool.document_collections_query_tool.invoke({"queries": ["agua"], "collections_path": manifest_path})
+    assert "==DOCUMENT 1 (plan_desarrollo_nacional)==\nAcueductos y agua potable rural" in result
+    assert "(tdr)==" in result
+
+    result = query_tool.document_collections_query_tool.invoke(
+        {"queries": ["agua"], "collections_path": manifest_path, "collections": ["tdr"]}
+    )
+    assert "(plan_desarrollo_nacional)" not in result
+    assert result.count("==DOCUMENT ") == 2
+
+    result = query_tool.document_collections_query_tool.invoke(
+        {"queries": ["agua"], "collections_path": manifest_path, "collections": ["anexo_guia_sectorial"]}
+    )
+    assert result == "No matching document collections. Available collections: plan_desarrollo_nacional, tdr."
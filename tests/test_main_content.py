@@ -0,0 +1,67 @@
+from pathlib import Path
+
+import pytest
+
+from src.utils.main_content import extract_main_content
+
+PAGES = Path(__file__).parent / "fixtures" / "pages"
+
+
+def _extract(name: str) -> str:
+    return extract_main_content((PAGES / name).read_bytes())
+
+
+@pytest.mark.parametrize(
+    "name, body, boilerplate",
+    [
+        (
+            "wordpress_has_sidebar.html",
+            ["14,2 sacos por hectárea", "83% de las unidades productivas", "encadenamientos productivos"],
+            ["Usamos cookies", "Entradas recientes", "WhatsApp", "Horario de atención", "Transparencia"],
+        ),
+        (
+            "portal_desarrollo_social.html",
+            ["24.600 niños y niñas", "142 unidades de servicio", "pobreza multidimensional"],
+            ["PQRSD", "Participa", "Instagram", "NIT 800.000.000-1"],
+        ),
+        (
+            "aspnet_form_portal.html",
+            ["Acuerdo 007 de 2024", "350 unidades productivas", "412.000 millones"],
+            ["Contratación", "Carrera 3 # 4-12"],
+        ),
+    ],
+)
+def test_conserva_el_cuerpo_y_elimina_la_plantilla(name, body, boilerplate):
+    text = _extract(name)
+    for fragment in body:
+        assert fragment in text
+    for fragment in boilerplate:
+        assert fragment not in text
+
+
+def test_envoltorios_con_tokens_parecidos_a_plantilla_no_se_eliminan():
+    # "has-sidebar" y "desarrollo-social" contienen "sidebar" y "social" pero no son plantilla
+    assert "Brechas en asistencia técnica" in _extract("wordpress_has_sidebar.html")
+    assert "Programas vigentes" in _extract("portal_desarrollo_social.html")
+
+
+def test_tablas_de_datos_se_conservan_como_filas():
+    text = _extract("wordpress_has_sidebar.html")
+    assert "Subregión | Unidades productivas | Con asistencia técnica" in text
+    assert "Centro | 18.215 | 3.120" in text
+
+
+def test_nodo_marcado_como_plantilla_que_domina_la_pagina_se_conserva():
+    paragraphs = "".join(f"<p>Párrafo {i} del informe de gestión, con cifras, metas y avances del periodo.</p>" for i in range(20))
+    html = f'<html><body><div class="sidebar-layout">{paragraphs}</div><nav><a href="/">Inicio</a></nav></body></html>'
+    text = extract_main_content(html)
+    assert "Párrafo 0 del informe" in text
+    assert "Párrafo 19 del informe" in text
+
+
+def test_extraccion_que_pierde_el_cuerpo_retorna_el_texto_completo():
+    body = " ".join(f"Frase {i} del documento sin estructura." for i in range(200))
+    notice = "<p>" + "Aviso institucional breve con enlaces a los trámites en línea de la entidad. " * 3 + "</p>"
+    html = f"<html><body><main>{notice}</main><span>{body}</span></body></html>"
+    text = extract_main_content(html)
+    assert "Frase 199 del documento" in text
@@ -0,0 +1,75 @@
+import os
+import threading
+
+import numpy as np
+
+from src.databases.npy_vectorstore import NpyVectorStore
+
+
+def _vectors(n: int, seed: int) -> np.ndarray:
+    return np.random.default_rng(seed).normal(size=(n, 8)).astype(np.float32)
+
+
+def _texts(store: NpyVectorStore) -> list:
+    return [store.get_document(i).page_content for i in range(len(store))]
+
+
+def test_write_keeps_existing_store_unless_overwrite(tmp_path):
+    path = str(tmp_path / "docs.npystore")
+    NpyVectorStore.write(path, ["a", "b"], _vectors(2, 0))
+    reader = NpyVectorStore(None, path)
+
+    # Ruta direccionada por contenido ya escrita: el segundo escritor no la toca
+    NpyVectorStore.write(path, ["c"], _vectors(1, 1))
+    assert _texts(NpyVectorStore(None, path)) == ["a", "b"]
+
+    NpyVectorStore.write(path, ["c"], _vectors(1, 1), overwrite=True)
+    assert _texts(NpyVectorStore(None, path)) == ["c"]
+    # Un lector abierto antes del reemplazo sigue leyendo su copia
+    assert _texts(reader) == ["a", "b"]
+    assert os.listdir(tmp_path) == ["docs.npystore"]
+
+
+def test_concurrent_writers_publish_one_complete_store(tmp_path):
+    path = str(tmp_path / "docs.npystore")
+    texts = [f"chunk {i}" for i in range(50)]
+    vectors = _vectors(50, 0)
+    errors = []
+
+    def write() -> None:
+        try:
+            NpyVectorStore.write(path, texts, vectors)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=write) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert _texts(NpyVectorStore(None, path)) == texts
+    assert os.listdir(tmp_path) == ["docs.npystore"]
+
+
+def test_quantized_stores_return_the_float32_top_k(tmp_path):
+    rng = np.random.default_rng(0)
+    topics = rng.normal(size=(20, 64))
+    corpus = (topics[rng.integers(0, 20, 2000)] + 0.8 * rng.normal(size=(2000, 64))).astype(np.float32)
+    queries = corpus[:25] + 0.3 * rng.normal(size=(25, 64)).astype(np.float32)
+    texts = [f"chunk {i}" for i in range(len(corpus))]
+    stores = {}
+    for dtype in ("float32", "float16", "int8"):
+        path = str(tmp_path / f"{dtype}.npystore")
+        NpyVectorStore.write(path, texts, corpus, dtype=dtype)
+        stores[dtype] = NpyVectorStore(None, path)
+
+    for dtype in ("float16", "int8"):
+        assert "rescore.npy" not in os.listdir(tmp_path / f"{dtype}.npystore")
+        for query in queries:
+            expected_indices, expected_scores = stores["float32"].search_vector(query, 10)
+            indices, scores = stores[dtype].search_vector(query, 10)
+            assert indices.tolist() == expected_indices.tolist()
+            # Los scores retornados vienen del re-puntaje exacto, no de la matriz cuantizada
+            np.testing.assert_allclose(scores, expected_scores, rtol=1e-6)
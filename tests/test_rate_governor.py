@@ -0,0 +1,68 @@
+import asyncio
+import time
+
+import pytest
+
+from src.utils.rate_governor import RateGovernor, ThrottledError
+
+URL = "https://portal.example.gov.co/documento"
+
+
+def _governor(**kwargs) -> RateGovernor:
+    params = dict(global_rps=0, burst=1, domain_max_concurrency=1, domain_min_interval=0.0, max_wait=0.5, domain_limits={})
+    params.update(kwargs)
+    return RateGovernor(**params)
+
+
+def test_retry_after_largo_se_acota_y_falla_rapido():
+    governor = _governor(max_throttle_pause=60)
+    with governor.slot(URL) as ticket:
+        ticket.update(status=429, headers={"Retry-After": "86400"})
+    start = time.monotonic()
+    with pytest.raises(ThrottledError):
+        governor.acquire(URL)
+    assert time.monotonic() - start < 0.1
+    state = governor._domains["portal.example.gov.co"]
+    # La pausa quedó acotada a max_throttle_pause, no a un día
+    assert state.next_start - time.monotonic() <= 60
+    assert governor.stats()["rejected"] == 1
+    assert state.active == 0
+
+
+def test_pausa_corta_de_saturacion_se_espera():
+    governor = _governor()
+    with governor.slot(URL) as ticket:
+        ticket.update(status=503, headers={"Retry-After": "0"})
+    assert governor.acquire(URL) < 0.5
+    governor.release(URL)
+
+
+def test_sin_cupo_dentro_de_max_wait_falla():
+    governor = _governor(max_wait=0.2)
+    governor.acquire(URL)
+    with pytest.raises(ThrottledError):
+        governor.acquire(URL)
+    governor.release(URL)
+    assert governor._domains["portal.example.gov.co"].active == 0
+
+
+def test_cancelar_aslot_no_deja_el_cupo_tomado():
+    governor = _governor(max_wait=5)
+
+    async def scenario():
+        governor.acquire(URL)  # cupo ocupado: la siguiente solicitud espera en un hilo
+
+        async def request():
+            async with governor.aslot(URL):
+                await asyncio.sleep(10)
+
+        task = asyncio.create_task(request())
+        await asyncio.sleep(0.1)
+        task.cancel()
+        governor.release(URL)  # el hilo obtiene el cupo después de la cancelación
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        await asyncio.sleep(0.2)
+
+    asyncio.run(scenario())
+    assert governor._domains["portal.example.gov.co"].active == 0
@@ -0,0 +1,72 @@
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+import requests
+
+from src.utils.record_replay import CassetteMissError, CassetteStore, RecordReplayAdapter, RecordReplayTransport
+
+BODIES = {"/pagina": b"<html><body><p>Contenido de la pagina</p></body></html>", "/grande": b"x" * 50_000}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = BODIES.get(self.path)
+        self.send_response(200 if body is not None else 404)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(body or b"")))
+        self.end_headers()
+        self.wfile.write(body or b"")
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+
+
+def _session(store: CassetteStore, max_bytes: int = 10_000) -> requests.Session:
+    session = requests.Session()
+    adapter = RecordReplayAdapter(store, max_bytes=max_bytes)
+    session.mount("http://", adapter)
+    return session
+
+
+def test_http_grabado_se_reproduce_sin_red(server, tmp_path):
+    cassette = tmp_path / "cassette.sqlite"
+    recorded = _session(CassetteStore(cassette, mode="record")).get(f"{server}/pagina")
+    replayed = _session(CassetteStore(cassette, mode="replay")).get(f"{server}/pagina")
+    assert recorded.status_code == replayed.status_code == 200
+    assert recorded.content == replayed.content == BODIES["/pagina"]
+    with pytest.raises(CassetteMissError):
+        _session(CassetteStore(cassette, mode="replay")).get(f"{server}/otra")
+
+
+def test_grabacion_respeta_el_limite_de_bytes(server, tmp_path):
+    store = CassetteStore(tmp_path / "cassette.sqlite", mode="record")
+    response = _session(store, max_bytes=10_000).get(f"{server}/grande", stream=True)
+    body = b"".join(response.iter_content(4096))
+    # Se lee y graba solo lo necesario para que el consumidor detecte el exceso
+    assert len(body) == 10_001
+    assert response.headers["Content-Length"] == "10001"
+
+
+def test_transporte_httpx_graba_con_limite_y_reproduce(server, tmp_path):
+    cassette = tmp_path / "cassette.sqlite"
+
+    async def get(mode: str, path: str) -> httpx.Response:
+        transport = RecordReplayTransport(CassetteStore(cassette, mode=mode), httpx.AsyncHTTPTransport(), max_bytes=10_000)
+        async with httpx.AsyncClient(transport=transport) as client:
+            return await client.get(f"{server}{path}")
+
+    assert len(asyncio.run(get("record", "/grande")).content) == 10_001
+    asyncio.run(get("record", "/pagina"))
+    assert asyncio.run(get("replay", "/pagina")).content == BODIES["/pagina"]
@@ -0,0 +1,93 @@
+"""Grabación y reproducción de un agente ReAct completo en otro directorio y otro thread."""
+from pathlib import Path
+from typing import ClassVar, List
+
+import pytest
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.tools import tool
+from langgraph.prebuilt import create_react_agent
+
+from src.databases import vectorstore_storage
+from src.databases.vectorstore_storage import VectorStoreStorage
+from src.utils.record_replay import CassetteStore, RecordReplayLLMCache
+
+TOOL_CALLS: List[str] = []
+
+
+@tool
+def consultar_plan(persist_path: str) -> str:
+    """Retorna el contenido del plan almacenado en `persist_path`."""
+    TOOL_CALLS.append(persist_path)
+    path = Path(persist_path)
+    return path.read_text(encoding="utf-8") if path.exists() else "There is no provided documentation to search in."
+
+
+class ScriptedChatModel(BaseChatModel):
+    """Modelo de prueba: responde con `script` en orden y cuenta las llamadas reales."""
+
+    script: ClassVar[List[AIMessage]] = []
+    calls: ClassVar[int] = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        type(self).calls += 1
+        if not type(self).script:
+            raise AssertionError("The model was called during replay")
+        return ChatResult(generations=[ChatGeneration(message=type(self).script.pop(0))])
+
+
+def _run_agent(root: Path, thread_id: str, current_time: str, store: CassetteStore) -> str:
+    storage = VectorStoreStorage(root=root / "vectorstores")
+    namespace = storage.namespace_from_config({"configurable": {"thread_id": thread_id}})
+    collections_path = storage.allocate(namespace, "collections.json")
+    plan_path = storage.allocate("shared", "plan_desarrollo_departamental_abc.npy")
+    Path(plan_path).write_text("Meta: 80% de cobertura de asistencia técnica en 2027.", encoding="utf-8")
+
+    ScriptedChatModel.script = [
+        AIMessage(content="", tool_calls=[{"name": "consultar_plan", "args": {"persist_path": plan_path}, "id": "call_1"}]),
+        AIMessage(content="La meta del plan es 80% de cobertura en 2027."),
+    ] if store.mode == "record" else []
+    model = ScriptedChatModel(cache=RecordReplayLLMCache(store, roots={"TEMP_UPLOADS_DIR": root, "CWD": root}))
+    system_prompt = (
+        f"Fecha: {current_time}\n"
+        f"Plan de Desarrollo Departamental: {plan_path}\n"
+        f"Colecciones: {collections_path}"
+    )
+    agent = create_react_agent(model, tools=[consultar_plan])
+    result = agent.invoke({"messages": [SystemMessage(content=system_prompt), HumanMessage(content="¿Cuál es la meta del plan?")]})
+    return result["messages"][-1].content
+
+
+def test_agente_grabado_se_reproduce_en_otro_directorio_y_thread(tmp_path, monkeypatch):
+    monkeypatch.setattr(vectorstore_storage, "RECORD_REPLAY_MODE", "record")
+    cassette = tmp_path / "cassette.sqlite"
+    TOOL_CALLS.clear()
+    ScriptedChatModel.calls = 0
+
+    recorded = _run_agent(tmp_path / "maquina_a", "thread-1", "Mon Mar 04 2024 10:00:00", CassetteStore(cassette, mode="record"))
+    assert ScriptedChatModel.calls == 2
+
+    monkeypatch.setattr(vectorstore_storage, "RECORD_REPLAY_MODE", "replay")
+    replayed = _run_agent(tmp_path / "maquina_b", "thread-2", "Sat Oct 18 2026 16:30:00", CassetteStore(cassette, mode="replay"))
+
+    assert replayed == recorded
+    # Ninguna llamada adicional al modelo, y la herramienta recibió la ruta de la nueva máquina
+    assert ScriptedChatModel.calls == 2
+    assert TOOL_CALLS[-1].startswith((tmp_path / "maquina_b").as_posix())
+
+
+def test_prompt_con_otra_ruta_no_normalizada_falla_en_replay_estricto(tmp_path):
+    from src.utils.record_replay import CassetteMissError
+
+    store = CassetteStore(tmp_path / "cassette.sqlite", mode="replay")
+    cache = RecordReplayLLMCache(store, roots={"TEMP_UPLOADS_DIR": tmp_path / "a"})
+    with pytest.raises(CassetteMissError):
+        cache.lookup("plan en /otra/ruta/plan.npy", "llm")
@@ -0,0 +1,64 @@
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from src.databases.lexical_index import BM25Index
+from src.databases.npy_vectorstore import NpyVectorStore
+from src.databases.retrieval import batch_hybrid_search
+
+PLAN = [
+    "Meta de cobertura de acueducto rural en municipios PDET",
+    "Programa de formación doctoral y becas de investigación",
+    "Reducción de la deforestación en la Amazonía",
+]
+GUIA = [
+    "Guía sectorial de agua potable y saneamiento básico rural",
+    "Indicadores de ciencia, tecnología e innovación del sector",
+]
+
+
+class FixedEmbeddings(Embeddings):
+    """Embeddings de prueba: cuenta las llamadas y retorna vectores fijos."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def embed_documents(self, texts):
+        self.calls += 1
+        return [[1.0, 0.0, 0.0, 0.0] for _ in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+def _store(tmp_path, name, texts, embedding):
+    path = str(tmp_path / f"{name}.npystore")
+    vectors = np.random.default_rng(len(texts)).normal(size=(len(texts), 4))
+    NpyVectorStore.write(path, texts, vectors)
+    return NpyVectorStore(embedding, path), BM25Index.build(texts)
+
+
+def test_lexical_mode_searches_every_store_without_embeddings(tmp_path):
+    embedding = FixedEmbeddings()
+    plan, plan_index = _store(tmp_path, "plan", PLAN, embedding)
+    guia, guia_index = _store(tmp_path, "guia", GUIA, embedding)
+
+    results = batch_hybrid_search(
+        [plan, guia], [plan_index, guia_index], ["acueducto rural", "deforestación"], k=3, mode="lexical"
+    )
+
+    assert embedding.calls == 0
+    acueducto, deforestacion = results
+    assert {(store, doc.page_content) for store, doc, _ in acueducto} == {(0, PLAN[0]), (1, GUIA[0])}
+    assert [(store, doc.page_content) for store, doc, _ in deforestacion] == [(0, PLAN[2])]
+
+
+def test_hybrid_mode_embeds_all_queries_in_one_request(tmp_path):
+    embedding = FixedEmbeddings()
+    plan, plan_index = _store(tmp_path, "plan", PLAN, embedding)
+    guia, guia_index = _store(tmp_path, "guia", GUIA, embedding)
+
+    results = batch_hybrid_search([plan, guia], [plan_index, guia_index], ["acueducto rural", "becas"], k=4)
+
+    assert embedding.calls == 1
+    assert all(len(hits) == 4 for hits in results)
+    assert results[1][0][1].page_content == PLAN[1]
@@ -0,0 +1,34 @@
+import threading
+import time
+
+from src.databases.search_cache import SearchCache
+
+
+def test_single_search_waits_for_the_batch_that_claimed_its_query():
+    cache = SearchCache()
+    keys = [cache.make_key("scholar", query) for query in ("bioeconomía Caldas", "acueducto rural")]
+    calls = []
+    batch_started = threading.Event()
+
+    def fetch_batch(positions):
+        batch_started.set()
+        time.sleep(0.2)
+        calls.append("batch")
+        # La segunda consulta falla en el lote y queda para el llamador
+        return {0: ["plan.pdf"]}
+
+    def fetch_one():
+        calls.append("single")
+        return ["otro.pdf"]
+
+    results = {}
+    batch = threading.Thread(target=lambda: results.update(cache.get_or_fetch_many(keys, fetch_batch)))
+    batch.start()
+    batch_started.wait()
+    value = cache.get_or_fetch(cache.make_key("scholar", "Bioeconomía  Caldas?"), fetch_one)
+    batch.join()
+
+    assert value == ["plan.pdf"]
+    assert calls == ["batch"]
+    assert results == {0: ["plan.pdf"]}
+    assert cache.get(keys[1]) == (False, None)
@@ -0,0 +1,30 @@
+from langchain_core.documents import Document
+
+from src.databases.splitters import StructuralTDRSplitter, approximate_tokens
+
+
+def test_long_numbered_list_items_are_not_headings():
+    text = "\n".join(
+        [
+            "2. Obligaciones del contratista",
+            "1. Entregar los informes mensuales de avance dentro de los cinco días hábiles siguientes al corte",
+            "2. Mantener vigentes las pólizas de cumplimiento y calidad durante toda la ejecución del contrato",
+        ]
+    )
+
+    chunks = StructuralTDRSplitter().split_documents([Document(page_content=text)])
+
+    assert len(chunks) == 1
+    assert chunks[0].metadata["heading_path"] == "2. Obligaciones del contratista"
+
+
+def test_oversized_table_row_falls_back_to_recursive_split():
+    row = "Experiencia | " + " ".join(f"contrato{i}" for i in range(200)) + " | 40 puntos"
+    text = "\n".join(["3. CRITERIOS DE EVALUACIÓN", "Criterio | Descripción | Puntaje", "Precio | Oferta económica | 60 puntos", row])
+    splitter = StructuralTDRSplitter(chunk_token_budget=100, chunk_overlap_tokens=0)
+
+    chunks = splitter.split_documents([Document(page_content=text)])
+
+    assert len(chunks) > 2
+    assert all(approximate_tokens(chunk.page_content) <= 100 for chunk in chunks)
+    assert "Precio | Oferta económica" in chunks[0].page_content
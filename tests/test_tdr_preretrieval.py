@@ -0,0 +1,79 @@
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from src.config.configuration import SECCIONES_TDR, MultiAgentConfiguration
+from src.databases.npy_vectorstore import NpyVectorStore
+from src.graph.process_init import tdr_vectorstore
+from src.graph.process_init.tdr_vectorstore import TDRVectorStore
+
+SECCIONES = list(SECCIONES_TDR)
+DIM = len(SECCIONES) + 1
+
+
+def _axis(position: int, weight: float = 1.0) -> np.ndarray:
+    vector = np.zeros(DIM, dtype=np.float32)
+    vector[position] = weight
+    # El resto del peso va a un eje que ninguna sección usa
+    vector[-1] = np.sqrt(max(0.0, 1.0 - weight**2))
+    return vector
+
+
+class SectionEmbeddings(Embeddings):
+    """Embeddings de prueba: la definición de cada sección es un eje propio."""
+
+    def embed_documents(self, texts):
+        definiciones = [SECCIONES_TDR[s]["definicion"] for s in SECCIONES]
+        return [_axis(definiciones.index(text)).tolist() for text in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+def _tdr_store(tmp_path, monkeypatch):
+    objetivo, lineas, criterios = (SECCIONES.index(s) for s in ("objetivo_tdr", "lineas_tematicas_tdr", "criterios_evaluacion_proyectos_tdr"))
+    chunks = [
+        ("Objetivo general de la convocatoria", {}, _axis(objetivo, 0.9)),
+        *[("L" * 6000, {}, _axis(lineas, 0.8 - 0.05 * i)) for i in range(6)],
+        ("3. CRITERIOS\nCriterio | Puntaje", {"heading_path": "3. CRITERIOS", "section_part": 0}, _axis(criterios, 0.7)),
+        ("3. CRITERIOS\nPertinencia | 40", {"heading_path": "3. CRITERIOS", "section_part": 1}, _axis(0, 0.0)),
+        ("4. ANEXOS\nFormato A", {"heading_path": "4. ANEXOS", "section_part": 0}, _axis(0, 0.0)),
+    ]
+    path = str(tmp_path / "tdr.npystore")
+    NpyVectorStore.write(path, [text for text, _, _ in chunks], np.stack([v for _, _, v in chunks]), metadatas=[m for _, m, _ in chunks])
+    monkeypatch.setattr(tdr_vectorstore, "load_vectorstore", lambda persist_path: NpyVectorStore(SectionEmbeddings(), persist_path))
+    return path
+
+
+def test_pre_retrieval_respects_the_token_budget_and_joins_section_parts(tmp_path, monkeypatch):
+    path = _tdr_store(tmp_path, monkeypatch)
+    configuration = MultiAgentConfiguration.from_runnable_config({"configurable": {"tdr_preretrieval_k": 6}})
+
+    candidates = TDRVectorStore().pre_retrieve_sections(path, configuration)
+
+    passages, confianza = candidates["lineas_tematicas_tdr"]
+    # 6000 tokens de presupuesto: caben 4 chunks de 1500 tokens, en orden del documento
+    assert len(passages) == 4
+    assert confianza == np.float32(0.8)
+    assert candidates["dirigida_a_tdr"][1] < 0.1
+
+    # Con un solo candidato se agrega la otra parte de su sección, no la sección siguiente
+    configuration = MultiAgentConfiguration.from_runnable_config({"configurable": {"tdr_preretrieval_k": 1}})
+    passages, _ = TDRVectorStore().pre_retrieve_sections(path, configuration)["criterios_evaluacion_proyectos_tdr"]
+    assert [doc.page_content for doc in passages] == ["3. CRITERIOS\nCriterio | Puntaje", "3. CRITERIOS\nPertinencia | 40"]
+
+
+def test_section_prompt_uses_passages_only_above_the_confidence_threshold(tmp_path, monkeypatch):
+    path = _tdr_store(tmp_path, monkeypatch)
+    configuration = MultiAgentConfiguration.from_runnable_config({"configurable": {"tdr_preretrieval_min_score": 0.85}})
+    tdr = TDRVectorStore()
+    candidates = tdr.pre_retrieve_sections(path, configuration)
+
+    above = tdr.build_section_prompt("objetivo_tdr", path, candidates["objetivo_tdr"], configuration)
+    below = tdr.build_section_prompt("lineas_tematicas_tdr", path, candidates["lineas_tematicas_tdr"], configuration)
+    missing = tdr.build_section_prompt("dirigida_a_tdr", path, None, configuration)
+
+    assert "==PASAJE 1 (sin encabezado)==\nObjetivo general de la convocatoria" in above
+    assert "Similitud máxima con la guía de búsqueda: 0.90" in above
+    for prompt in (below, missing):
+        assert "PASAJE" not in prompt
+        assert path in prompt
@@ -0,0 +1,63 @@
+import os
+import time
+
+from src.databases.vectorstore_storage import SHARED_NAMESPACE, VectorStoreStorage
+
+
+def _store(storage: VectorStoreStorage, name: str, size: int = 1000) -> str:
+    path = storage.allocate(SHARED_NAMESPACE, name)
+    os.makedirs(path)
+    with open(os.path.join(path, "embeddings.npy"), "wb") as f:
+        f.write(b"\0" * size)
+    return path
+
+
+def test_leases_are_shared_between_processes(tmp_path):
+    # Dos instancias sobre la misma raíz hacen las veces de dos procesos del servidor
+    worker_a = VectorStoreStorage(tmp_path, quota_bytes=0)
+    worker_b = VectorStoreStorage(tmp_path, quota_bytes=0)
+    path = _store(worker_a, "plan.npystore")
+    assert worker_a.acquire(path, owner="thread-1")
+    worker_a.register(path, SHARED_NAMESPACE)
+
+    assert worker_b.is_referenced(path)
+    assert worker_b.collect_garbage() == []
+    assert os.path.exists(path)
+
+    worker_b.release(path, owner="thread-1")
+    assert worker_a.collect_garbage() == [path]
+    assert not os.path.exists(path)
+
+
+def test_remove_namespace_releases_the_run_leases(tmp_path):
+    storage = VectorStoreStorage(tmp_path, quota_bytes=0)
+    manifest_path = storage.allocate("thread-1", "collections.json")
+    open(manifest_path, "w").close()
+    owner = storage.namespace_of(manifest_path)
+    tdr = _store(storage, "tdr.npystore")
+    plan = _store(storage, "plan.npystore")
+    storage.acquire(tdr, 3, owner=owner)
+    storage.acquire(plan, owner=owner)
+    storage.acquire(plan, owner="thread-2")
+
+    storage.remove_namespace(owner)
+
+    assert owner == "thread-1"
+    assert not os.path.exists(tmp_path / "thread-1")
+    assert not storage.is_referenced(tdr)
+    assert storage.is_referenced(plan)
+
+
+def test_garbage_collection_removes_abandoned_namespaces(tmp_path):
+    storage = VectorStoreStorage(tmp_path, lease_ttl=60)
+    abandoned = storage.allocate("thread-1", "collections.json")
+    active = storage.allocate("thread-2", "collections.json")
+    for path in (abandoned, active):
+        open(path, "w").close()
+    old = time.time() - 120
+    os.utime(abandoned, (old, old))
+
+    storage.collect_garbage()
+
+    assert not os.path.exists(tmp_path / "thread-1")
+    assert os.path.exists(active)
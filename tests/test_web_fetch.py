@@ -0,0 +1,51 @@
+import pytest
+
+import src.graph  # noqa: F401  (mismo orden de importación que la aplicación: src.graph antes que src.tools)
+from src.tools.web_fetch import SNIFF_BYTES, BoundedDownload, FetchError, sniff_content_type
+
+HTML = b"<!DOCTYPE html><html><body>" + b"Plan de desarrollo departamental " * 64 + b"</body></html>"
+PDF = b"%PDF-1.7\n" + b"\x00\x01binary stream " * 128
+
+
+def _download(headers, chunks, **limits):
+    download = BoundedDownload(headers, **limits)
+    for chunk in chunks:
+        download.feed(chunk)
+    return download.finish()
+
+
+def test_declared_content_length_over_the_limit_aborts_before_reading():
+    with pytest.raises(FetchError, match="too large"):
+        BoundedDownload({"Content-Length": "5000"}, max_bytes=4096)
+
+
+def test_streamed_bytes_over_the_limit_abort_the_download():
+    download = BoundedDownload({"Content-Type": "text/html"}, max_bytes=4096)
+    download.feed(HTML[:2048])
+    with pytest.raises(FetchError, match="exceeds 4096 bytes"):
+        download.feed(b"x" * 4096)
+
+
+def test_binary_magic_and_nul_bytes_are_rejected_while_streaming():
+    png = b"\x89PNG\r\n\x1a\n" + b"\x10" * SNIFF_BYTES
+    with pytest.raises(FetchError, match="binary"):
+        _download({"Content-Type": "text/html"}, [png])
+    with pytest.raises(FetchError, match="binary"):
+        _download({}, [b"texto" + b"\x00" * 32])
+
+
+def test_pdf_labelled_as_html_is_detected_from_its_bytes():
+    assert _download({"Content-Type": "text/html; charset=utf-8"}, [PDF[:100], PDF[100:]]) == ("application/pdf", PDF)
+    assert sniff_content_type("", b"\n  %PDF-1.4\n") == "application/pdf"
+
+
+def test_html_that_mentions_the_pdf_signature_stays_html():
+    page = b"<html><body><pre>Los archivos PDF empiezan con %PDF-1.7</pre></body></html>"
+    assert sniff_content_type("application/pdf", page) == "text/html"
+    assert sniff_content_type("text/plain", b"Ejemplo: %PDF-1.7 en texto plano") == "text/html"
+
+
+def test_slow_downloads_are_aborted():
+    download = BoundedDownload({"Content-Type": "text/html"}, timeout=-1)
+    with pytest.raises(FetchError, match="too long"):
+        download.feed(HTML[:10])
@@ -0,0 +1,56 @@
+import threading
+import time
+
+import numpy as np
+from langchain_core.documents import Document
+
+from src.databases.web_index_cache import URLIndex, URLIndexCache
+
+MODEL = "text-embedding-3-small"
+
+
+def _index(url: str, chunks: int = 4) -> URLIndex:
+    documents = [Document(page_content=f"{url} chunk {i}", metadata={"source": url}) for i in range(chunks)]
+    vectors = np.random.default_rng(chunks).normal(size=(chunks, 64))
+    return URLIndex.build(url, "hash", MODEL, documents, vectors)
+
+
+def test_batch_and_single_builders_share_one_embedding_pass():
+    cache = URLIndexCache()
+    urls = ["https://a.gov.co/plan", "https://b.gov.co/informe"]
+    built = []
+    batch_started = threading.Event()
+
+    def build_many(positions):
+        batch_started.set()
+        time.sleep(0.2)
+        built.extend(urls[position] for position in positions)
+        return [_index(urls[position]) for position in positions]
+
+    def build_one():
+        built.append("single")
+        return _index(urls[0])
+
+    batch = threading.Thread(target=cache.get_or_build_many, args=([(url, "hash", MODEL) for url in urls], build_many))
+    batch.start()
+    batch_started.wait()
+    # Llega mientras el lote embebe la misma página: espera en lugar de embeberla otra vez
+    index = cache.get_or_build(urls[0], "hash", MODEL, build_one)
+    batch.join()
+
+    assert built == urls
+    assert index.url == urls[0]
+
+
+def test_persisted_indexes_respect_the_disk_quota(tmp_path):
+    one_file = len(np.zeros((4, 64), dtype=np.float32).tobytes())
+    cache = URLIndexCache(persist_dir=tmp_path, disk_max_bytes=3 * one_file)
+    for i in range(6):
+        cache.put(_index(f"https://portal.gov.co/{i}"))
+        time.sleep(0.01)
+
+    files = list(tmp_path.glob("*.npz"))
+    assert sum(f.stat().st_size for f in files) <= 3 * one_file
+    assert cache.stats()["disk_evictions"] == 6 - len(files)
+    # Los más recientes siguen en disco
+    assert URLIndexCache(persist_dir=tmp_path).get("https://portal.gov.co/5", "hash", MODEL) is not None
@@ -0,0 +1,90 @@
+import asyncio
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+import src.graph  # noqa: F401  (resuelve el import circular de src.tools)
+from src.tools import web_rag_pipeline
+
+TEMAS = ["agua", "energía", "educación"]
+
+PAGES = {
+    "https://minambiente.gov.co/agua": "Programa de agua potable para municipios rurales.",
+    "https://minenergia.gov.co/solar": "Convocatoria de energía solar en zonas no interconectadas.",
+}
+
+
+class KeywordEmbeddings(Embeddings):
+    """Embeddings de prueba: un eje por tema, según las palabras clave del texto."""
+
+    model = "keyword-test"
+
+    def __init__(self):
+        self.requests = []
+
+    def embed_documents(self, texts):
+        self.requests.append(list(texts))
+        vectors = []
+        for text in texts:
+            vector = np.array([float(tema in text.lower()) for tema in TEMAS] + [0.1], dtype=np.float32)
+            vectors.append((vector / np.linalg.norm(vector)).tolist())
+        return vectors
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+def _stub(monkeypatch, pages=PAGES):
+    embeddings = KeywordEmbeddings()
+    fetched = []
+
+    async def fake_fetch_pages(urls):
+        fetched.append(list(urls))
+        return [(url, pages.get(url), None if url in pages else "HTTP 404") for url in urls]
+
+    monkeypatch.setattr(web_rag_pipeline, "fetch_pages", fake_fetch_pages)
+    monkeypatch.setattr(web_rag_pipeline, "create_embedding_model", lambda **kwargs: embeddings)
+    monkeypatch.setattr(web_rag_pipeline, "WEB_INDEX_CACHE_ENABLED", False)
+    return embeddings, fetched
+
+
+def _sources(result):
+    return [line.removeprefix("Source: ") for line in result.splitlines() if line.startswith("Source: ")]
+
+
+def test_multi_url_results_are_attributed_to_their_source(monkeypatch):
+    embeddings, fetched = _stub(monkeypatch)
+    urls = list(PAGES) + ["https://caida.gov.co/pagina", "https://minambiente.gov.co/agua", " "]
+
+    result = web_rag_pipeline.web_rag_multi_url_tool.invoke({"website_urls": urls, "search_query": "agua potable"})
+
+    # URLs sin duplicados ni vacías, descargadas en un solo lote
+    assert fetched == [list(PAGES) + ["https://caida.gov.co/pagina"]]
+    # Los chunks de todas las páginas se embeben en una sola solicitud, luego la consulta
+    assert embeddings.requests == [list(PAGES.values()), ["agua potable"]]
+    assert _sources(result) == ["https://minambiente.gov.co/agua", "https://minenergia.gov.co/solar"]
+    assert result.startswith(f"Source: https://minambiente.gov.co/agua\nContent: {PAGES['https://minambiente.gov.co/agua']}")
+    assert result.endswith("URLs that could not be loaded:\n- https://caida.gov.co/pagina: HTTP 404")
+
+
+def test_multi_url_reports_when_no_page_loads(monkeypatch):
+    embeddings, _ = _stub(monkeypatch, pages={})
+
+    result = web_rag_pipeline.web_rag_multi_url_tool.invoke(
+        {"website_urls": ["https://caida.gov.co/a", "https://caida.gov.co/b"], "search_query": "agua"}
+    )
+
+    assert result == "Failed to load content from the URLs.\n- https://caida.gov.co/a: HTTP 404\n- https://caida.gov.co/b: HTTP 404"
+    assert embeddings.requests == []
+    assert web_rag_pipeline.web_rag_multi_url_tool.invoke({"website_urls": ["", " "], "search_query": "agua"}) == "No URLs were provided."
+
+
+def test_multi_url_runs_inside_an_active_event_loop(monkeypatch):
+    _stub(monkeypatch)
+
+    async def agent_step():
+        # Los nodos async del grafo invocan la herramienta con un loop ya en ejecución
+        return web_rag_pipeline.web_rag_multi_url_tool.invoke({"website_urls": list(PAGES), "search_query": "energía solar"})
+
+    result = asyncio.run(agent_step())
+    assert _sources(result)[0] == "https://minenergia.gov.co/solar"